@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+WB Auto - пакетный запуск без интерфейса (см. python cli.py --help)
+"""
+
+import sys
+import os
+
+# Добавляем путь к src для импортов
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from core.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,17 +5,31 @@ WB Auto - Быстрый запуск без splash screen
 
 import sys
 import os
-from PyQt5 import QtWidgets, QtCore, QtGui
 
 # Добавляем путь к src для импортов
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+# Таймер запуска импортируем первым, чтобы замер начинался как можно раньше
+from core.startup import startup_timer
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+startup_timer.mark('import_qt')
+
+from core.log import setup_logging
+from core.tracing import enable_from_env as enable_tracing_from_env
+from core.metrics import enable_from_env as enable_metrics_from_env
+
 def main():
     """Основная функция запуска приложения - быстрый старт"""
+    # Журнал пишет отдельный поток, поэтому настройка не замедляет запуск
+    setup_logging()
+    enable_tracing_from_env()
+    enable_metrics_from_env()
     # Создаем приложение
     app = QtWidgets.QApplication(sys.argv)
     app.setApplicationName('WB Auto')
     app.setOrganizationName('WBAuto')
+    startup_timer.mark('qt_application')
     
     # Устанавливаем глобальную тёмную тему
     app.setStyle('Fusion')
@@ -96,9 +110,11 @@ def main():
         except ImportError:
             # Для exe файла
             from app import MainWindow
+        startup_timer.mark('import_main_window')
         
         # Создаем и показываем главное окно сразу
         main_window = MainWindow()
+        startup_timer.mark('main_window_created')
         main_window.show()
         main_window.raise_()
         main_window.activateWindow()
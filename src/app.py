@@ -1,20 +1,52 @@
+import logging
 import os
 import sys
+import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List
 
 from PyQt5 import QtCore, QtGui, QtWidgets
-import keyring
 
+from core import diagnostics
 from core.parser import group_photos_flat
-from core.profiles import list_profiles, load_profile
-from core.xlsx_gen import create_wb_workbook, append_row
-from core.yadisk_client import upload_sku_photos
-from core.reports import generate_upload_report, export_csv_report
-from core.setup_wizard import show_setup_wizard
-from core.auto_updater import AutoUpdater
+from core.profiles import get_profile, list_profiles
+from core.history import RunHistory, TREND_HEADERS, detect_degradation, trend_rows
+from core.paths import get_data_dir
+from core.progress import ProgressBuffer, format_eta
+from core.run_control import RunControl
+from core.startup import lazy_import, preload_in_background, startup_timer
+from ui.sku_table import SkuFilterProxyModel, SkuTableModel
+from ui.thumbnails import ThumbnailService
+
+logger = logging.getLogger(__name__)
+
+# Сколько фото SKU показывать в превью
+PREVIEW_MAX_PHOTOS = 12
+# Сколько соседних SKU предзагружать по направлению навигации и в обратную сторону
+PREFETCH_AHEAD = 3
+PREFETCH_BEHIND = 1
+# Как часто окно забирает прогресс и сообщения у потока загрузки, мс
+PROGRESS_POLL_MS = 100
+# Максимум строк в панели лога
+LOG_MAX_BLOCKS = 5000
+# Задержка записи правок карточки SKU в хранилище, мс
+SKU_SAVE_DELAY_MS = 500
+
+# Тяжёлые модули (keyring, yadisk/requests/tenacity, openpyxl, мастер, автообновление)
+# загружаются при первом использовании или в фоне после показа окна
+DEFERRED_MODULES = [
+    'keyring',
+    'core.yadisk_client',
+    'core.pipeline',
+    'core.xlsx_gen',
+    'core.export',
+    'core.importer',
+    'core.sku_store',
+    'core.reports',
+    'core.auto_updater',
+    'core.setup_wizard',
+]
 
 
 def get_resource_path(relative_path):
@@ -34,11 +66,11 @@ def get_resource_path(relative_path):
 
 
 class Worker(QtCore.QThread):
-    progress = QtCore.pyqtSignal(int, int)  # done, total
-    message = QtCore.pyqtSignal(str)
+    # Прогресс и сообщения идут через self.events (ProgressBuffer), окно опрашивает его по таймеру
     finished_ok = QtCore.pyqtSignal(dict)  # sku -> [links]
 
-    def __init__(self, grouped, token, root, overwrite_mode, max_photos, concurrency=1, limit=0, parent=None):
+    def __init__(self, grouped, token, root, overwrite_mode, max_photos, concurrency=1, limit=0, limiter=None,
+                 parent=None):
         super().__init__(parent)
         self.grouped = grouped
         self.token = token
@@ -47,46 +79,76 @@ class Worker(QtCore.QThread):
         self.max_photos = int(max_photos or 6)
         self.concurrency = max(1, int(concurrency or 1))
         self.limit = max(0, int(limit or 0))
-        self.results: Dict[str, List[str]] = {}
+        self.limiter = limiter
+        self.events = ProgressBuffer()
+        self.control = RunControl()
+        self.outcome = None
 
-    def _upload_one(self, sku, files):
-        files_to_upload = [f.path for f in files][: self.max_photos]
-        urls = upload_sku_photos(keyring, self.token, self.root, sku, files_to_upload, self.overwrite_mode)
-        return sku, [u.direct_url for u in urls][: self.max_photos]
+    # Итоги прогона (заполняются по ходу загрузки)
+    @property
+    def results(self) -> Dict[str, List[str]]:
+        return self.outcome.results if self.outcome else {}
+
+    @property
+    def metrics(self) -> List:
+        return self.outcome.metrics if self.outcome else []
+
+    @property
+    def attempted(self) -> List[str]:
+        return self.outcome.attempted if self.outcome else []
+
+    @property
+    def started_at(self) -> float:
+        return self.outcome.started_at if self.outcome else 0.0
+
+    @property
+    def finished_at(self) -> float:
+        return self.outcome.finished_at if self.outcome else 0.0
 
     def run(self):
         try:
-            items = list(self.grouped.by_sku.items())
-            if self.limit > 0:
-                items = items[: self.limit]
-            total = len(items)
-            done = 0
-            if self.concurrency <= 1:
-                for sku, files in items:
-                    try:
-                        sku, links = self._upload_one(sku, files)
-                        self.results[sku] = links
-                    except Exception as e:
-                        self.message.emit(f"Ошибка для {sku}: {e}")
-                    finally:
-                        done += 1
-                        self.progress.emit(done, total)
-            else:
-                with ThreadPoolExecutor(max_workers=self.concurrency) as ex:
-                    futures = {ex.submit(self._upload_one, sku, files): sku for sku, files in items}
-                    for fut in as_completed(futures):
-                        sku_key = futures[fut]
-                        try:
-                            sku_res, links = fut.result()
-                            self.results[sku_res] = links
-                        except Exception as e:
-                            self.message.emit(f"Ошибка для {sku_key}: {e}")
-                        finally:
-                            done += 1
-                            self.progress.emit(done, total)
-            self.finished_ok.emit(self.results)
+            pipeline = lazy_import('core.pipeline')
+            self.outcome = pipeline.UploadOutcome()
+            with diagnostics.profile_operation('upload'):
+                pipeline.run_uploads(
+                    self.grouped, self.token, self.root, self.overwrite_mode, self.max_photos,
+                    concurrency=self.concurrency, limit=self.limit, keyring=lazy_import('keyring'),
+                    events=self.events, control=self.control, outcome=self.outcome, limiter=self.limiter,
+                )
+        except Exception as e:
+            self.events.message(str(e), error=True)
+        if self.outcome is not None and not self.outcome.finished_at:
+            self.outcome.finished_at = time.time()
+        self.finished_ok.emit(self.results)
+
+
+class ImportWorker(QtCore.QThread):
+    """Чтение и нормализация файла данных SKU вне GUI-потока"""
+    progress = QtCore.pyqtSignal(int, int)
+    finished_ok = QtCore.pyqtSignal(object)  # ImportResult
+    failed = QtCore.pyqtSignal(str, str)  # вид ошибки ('format' | 'pandas' | 'error'), текст
+
+    def __init__(self, path, skus=None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.skus = skus  # импортировать только эти SKU (None — все)
+
+    def run(self):
+        try:
+            importer = lazy_import('core.importer')
+        except ImportError as e:
+            self.failed.emit('pandas', str(e))
+            return
+        try:
+            self.progress.emit(0, 1)
+            result = importer.import_attributes(self.path, self.skus, progress=self.progress.emit)
+        except importer.ImportFormatError as e:
+            self.failed.emit('format', str(e))
+            return
         except Exception as e:
-            self.message.emit(str(e))
+            self.failed.emit('error', str(e))
+            return
+        self.finished_ok.emit(result)
 
 
 class FlowLayout(QtWidgets.QLayout):
@@ -185,10 +247,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.profile = None
         self.profile_files = {}
         self.upload_results: Dict[str, List[str]] = {}
+        self.upload_metrics = []
         self.current_category = self.settings.value('last_category', 'kruzhki')  # Восстанавливаем последнюю категорию
+        diagnostics.configure(self.settings.value('profiling_mode', False, type=bool),
+                              memory=self.settings.value('profiling_memory', False, type=bool))
         
-        # Инициализация автообновления
-        self.auto_updater = AutoUpdater(self)
+        # Автообновление создаётся при первом обращении (см. auto_updater)
+        self._auto_updater = None
         
         self._build_ui()
         self._create_menu()  # Создаем меню
@@ -201,6 +266,18 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.profile_files:
             self._load_profiles()
 
+    @property
+    def auto_updater(self):
+        """Менеджер автообновления, создаётся при первом обращении"""
+        if self._auto_updater is None:
+            auto_updater = lazy_import('core.auto_updater')
+            try:
+                interval_h = float(self.settings.value('update_check_interval_h', 6) or 0)
+            except (TypeError, ValueError):
+                interval_h = 6
+            self._auto_updater = auto_updater.AutoUpdater(self, check_interval_s=interval_h * 3600)
+        return self._auto_updater
+
     def _set_window_icon(self):
         """Устанавливает иконку окна"""
         try:
@@ -373,20 +450,44 @@ class MainWindow(QtWidgets.QMainWindow):
         searchLayout.addWidget(QtWidgets.QLabel('Поиск:'))
         searchLayout.addWidget(self.searchEdit)
         centerLayout.addLayout(searchLayout)
-        self.table = QtWidgets.QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(['SKU', 'Файлов', 'Список файлов'])
+        # Модель над GroupResult + прокси-фильтр: строки не создаются заранее,
+        # представление запрашивает только видимые ячейки
+        self.skuModel = SkuTableModel(self)
+        self.skuProxy = SkuFilterProxyModel(self)
+        self.skuProxy.setSourceModel(self.skuModel)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.skuProxy)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.setAlternatingRowColors(True)
         self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
         self.table.verticalHeader().setDefaultSectionSize(28)
+        self.table.setColumnWidth(0, 220)
+        self.table.setColumnWidth(1, 70)
         self.table.setShowGrid(False)
+        self.table.setWordWrap(False)
         centerLayout.addWidget(self.table)
 
+        # Фильтр применяется после паузы в наборе, а не на каждую клавишу
+        self._filterTimer = QtCore.QTimer(self)
+        self._filterTimer.setSingleShot(True)
+        self._filterTimer.setInterval(200)
+        self._filterTimer.timeout.connect(self._apply_filter_now)
+
         self.progress = QtWidgets.QProgressBar()
         self.progress.setRange(0, 100)
-        centerLayout.addWidget(self.progress)
+        self.pauseBtn = QtWidgets.QPushButton('Пауза')
+        self.cancelBtn = QtWidgets.QPushButton('Остановить')
+        for btn in (self.pauseBtn, self.cancelBtn):
+            btn.setEnabled(False)
+        progressLayout = QtWidgets.QHBoxLayout()
+        progressLayout.addWidget(self.progress, 1)
+        progressLayout.addWidget(self.pauseBtn)
+        progressLayout.addWidget(self.cancelBtn)
+        centerLayout.addLayout(progressLayout)
 
         splitter.addWidget(center)
 
@@ -428,7 +529,14 @@ class MainWindow(QtWidgets.QMainWindow):
         skuForm.addRow('Комплектация:', self.skuComplectEdit)
         
         self.currentSku = None
-        self.skuData = {}  # sku -> {name, price, color, volume, material, gift, pattern, complect}
+        # Данные SKU хранятся в SQLite (core.sku_store); правки формы копятся здесь
+        # и пишутся пачкой после паузы в наборе
+        self._skuStore = None
+        self._pendingSku = {}  # (профиль, sku) -> {name, price, color, volume, material, gift, pattern, complect}
+        self._skuSaveTimer = QtCore.QTimer(self)
+        self._skuSaveTimer.setSingleShot(True)
+        self._skuSaveTimer.setInterval(SKU_SAVE_DELAY_MS)
+        self._skuSaveTimer.timeout.connect(self._flush_sku_data)
         
         rightLayout.addWidget(grpSku)
         
@@ -443,6 +551,10 @@ class MainWindow(QtWidgets.QMainWindow):
         scroll.viewport().setStyleSheet('background:#242424;')
         self.previewContainer = QtWidgets.QWidget()
         self.previewFlow = FlowLayout(self.previewContainer)
+        self.previewTiles: Dict[str, QtWidgets.QLabel] = {}  # путь к фото -> плитка превью
+        self.thumbnails = ThumbnailService(self)
+        self.thumbnails.ready.connect(self._on_thumbnail_ready)
+        self._lastPreviewRow = -1
         scroll.setWidget(self.previewContainer)
         rightLayout.addWidget(scroll)
         splitter.addWidget(right)
@@ -465,7 +577,7 @@ class MainWindow(QtWidgets.QMainWindow):
         logTop.addWidget(btnCopyLog)
         self.logEdit = QtWidgets.QPlainTextEdit()
         self.logEdit.setReadOnly(True)
-        self.logEdit.setMaximumBlockCount(5000)
+        self.logEdit.setMaximumBlockCount(LOG_MAX_BLOCKS)
         logL.addLayout(logTop)
         logL.addWidget(self.logEdit)
         logW.setLayout(logL)
@@ -500,12 +612,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self.scanBtn.clicked.connect(self.scan)
         self.importBtn.clicked.connect(self.import_data)
         self.startBtn.clicked.connect(self.start_upload)
+        self.pauseBtn.clicked.connect(self.toggle_pause)
+        self.cancelBtn.clicked.connect(self.cancel_upload)
         self.saveBtn.clicked.connect(self.save_xlsx)
         self.reportBtn.clicked.connect(self.export_report)
         self.openFolderBtn.clicked.connect(self.open_current_folder)
         self.profileCombo.currentIndexChanged.connect(self.profile_changed)
         self.searchEdit.textChanged.connect(self.apply_filter)
-        self.table.itemSelectionChanged.connect(self.on_table_selection_changed)
+        self.table.selectionModel().selectionChanged.connect(self.on_table_selection_changed)
         actScan.triggered.connect(self.scan)
         actStart.triggered.connect(self.start_upload)
         actSave.triggered.connect(self.save_xlsx)
@@ -556,6 +670,26 @@ class MainWindow(QtWidgets.QMainWindow):
         settings_action.triggered.connect(self.show_settings)
         tools_menu.addAction(settings_action)
         
+        # Действие "История загрузок"
+        history_action = QtWidgets.QAction('История загрузок', self)
+        history_action.triggered.connect(self.show_history)
+        tools_menu.addAction(history_action)
+        
+        # Режим профилирования: cProfile (и tracemalloc) для сканирования, загрузки и экспорта
+        diag_menu = tools_menu.addMenu('Диагностика')
+        self.profilingAction = QtWidgets.QAction('Режим профилирования', self, checkable=True)
+        self.profilingAction.setChecked(diagnostics.is_enabled())
+        self.profilingAction.toggled.connect(self.toggle_profiling)
+        diag_menu.addAction(self.profilingAction)
+        self.profilingMemoryAction = QtWidgets.QAction('Учитывать память (медленнее)', self, checkable=True)
+        self.profilingMemoryAction.setChecked(self.settings.value('profiling_memory', False, type=bool))
+        self.profilingMemoryAction.toggled.connect(self.toggle_profiling)
+        diag_menu.addAction(self.profilingMemoryAction)
+        open_diag_action = QtWidgets.QAction('Открыть папку диагностики', self)
+        open_diag_action.triggered.connect(
+            lambda: QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(diagnostics.diagnostics_dir())))
+        diag_menu.addAction(open_diag_action)
+        
         # Меню "Справка"
         help_menu = menubar.addMenu('Справка')
         
@@ -617,7 +751,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.currentSku:
             return
         
-        self.skuData[self.currentSku] = {
+        self._pendingSku[(self._sku_profile_key(), self.currentSku)] = {
             'name': self.skuNameEdit.text().strip(),
             'price': self.skuPriceEdit.text().strip(),
             'color': self.skuColorEdit.text().strip(),
@@ -627,11 +761,42 @@ class MainWindow(QtWidgets.QMainWindow):
             'pattern': self.skuPatternEdit.text().strip(),
             'complect': self.skuComplectEdit.text().strip()
         }
+        self._skuSaveTimer.start()
+
+    @property
+    def sku_store(self):
+        if self._skuStore is None:
+            self._skuStore = lazy_import('core.sku_store').SkuStore()
+        return self._skuStore
+
+    def _sku_profile_key(self) -> str:
+        return self.profileCombo.currentText() or ''
+
+    def _flush_sku_data(self):
+        """Записывает накопленные правки карточек SKU одной транзакцией на профиль"""
+        self._skuSaveTimer.stop()
+        if not self._pendingSku:
+            return
+        pending, self._pendingSku = self._pendingSku, {}
+        by_profile = {}
+        for (profile, sku), data in pending.items():
+            by_profile.setdefault(profile, {})[sku] = data
+        try:
+            for profile, records in by_profile.items():
+                self.sku_store.upsert_many(profile, records)
+        except Exception:
+            logger.exception("Не удалось сохранить данные SKU")
 
     def _load_sku_data(self, sku: str):
         """Load SKU data into the form"""
         self.currentSku = sku
-        data = self.skuData.get(sku, {})
+        data = self._pendingSku.get((self._sku_profile_key(), sku))
+        if data is None:
+            try:
+                data = self.sku_store.get(self._sku_profile_key(), sku)
+            except Exception:
+                logger.warning("Не удалось прочитать данные SKU %s", sku, exc_info=True)
+                data = {}
         
         # Temporarily disconnect signals to avoid recursive save
         self.skuNameEdit.textChanged.disconnect()
@@ -732,7 +897,7 @@ class MainWindow(QtWidgets.QMainWindow):
             QSpinBox, QDoubleSpinBox { background:#232323; color:#eee; border:1px solid #4a4a4a; border-radius:6px; padding: 2px 6px; }
             QSlider::groove:horizontal { height:6px; background:#3a3a3a; border-radius:3px; }
             QSlider::handle:horizontal { background:#4a90e2; width:14px; margin:-4px 0; border-radius:7px; }
-            QTableWidget { gridline-color: #555; background:#1f1f1f; }
+            QTableView { gridline-color: #555; background:#1f1f1f; }
             QHeaderView::section { background: #343434; color: #ddd; padding: 8px; border: 0; }
             QToolBar { background:#2b2b2b; border-bottom: 1px solid #3a3a3a; }
             /* Toolbar buttons: make text brighter and more legible */
@@ -789,7 +954,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.hide()
         
         # Показываем мастер настройки
-        result = show_setup_wizard(self)
+        result = lazy_import('core.setup_wizard').show_setup_wizard(self)
         
         if result:
             # Сохраняем настройки из мастера
@@ -919,7 +1084,10 @@ class MainWindow(QtWidgets.QMainWindow):
     def profile_changed(self, idx):
         name = self.profileCombo.currentText()
         if name and name in self.profile_files:
-            self.profile = load_profile(self.profile_files[name])
+            self.profile = get_profile(self.profile_files[name])
+            # Данные SKU у каждого профиля свои
+            if self.currentSku:
+                self._load_sku_data(self.currentSku)
             root = self.profile.get('yadisk_root') or '/WB/Kruzhki'
             self.rootEdit.setText(root)
 
@@ -931,124 +1099,58 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         if not path:
             return
-            
+
+        self.importBtn.setEnabled(False)
+        self.progress.setValue(0)
+        self.statusBar().showMessage(f'Импорт данных: {os.path.basename(path)}…')
+        skus = list(self.grouped.by_sku) if self.grouped and self.grouped.by_sku else None
+        self.importWorker = ImportWorker(path, skus, self)
+        self.importWorker.progress.connect(lambda done, total: self.progress.setValue(int(done * 100 / max(1, total))))
+        self.importWorker.finished_ok.connect(self._on_import_finished)
+        self.importWorker.failed.connect(self._on_import_failed)
+        self.importWorker.start()
+
+    def _on_import_finished(self, result):
+        self.importBtn.setEnabled(True)
+        self.progress.setValue(100)
         try:
-            import pandas as pd
-            
-            # Try to read the file
-            if path.lower().endswith('.csv'):
-                df = pd.read_csv(path, encoding='utf-8')
-            else:
-                df = pd.read_excel(path)
-            
-            # Expected columns: sku, name, price, barcode, color
-            # (case-insensitive matching)
-            columns = {col.lower(): col for col in df.columns}
-            
-            sku_col = None
-            for possible in ['sku', 'артикул', 'article', 'артикул продавца']:
-                if possible in columns:
-                    sku_col = columns[possible]
-                    break
-                    
-            if not sku_col:
-                QtWidgets.QMessageBox.warning(
-                    self, 'Ошибка импорта', 
-                    'Не найден столбец SKU/Артикул в файле'
-                )
-                return
-            
-            imported_count = 0
-            
-            for _, row in df.iterrows():
-                sku = str(row[sku_col]).strip()
-                if not sku or sku.lower() in ['nan', 'none']:
-                    continue
-                
-                data = {}
-                
-                # Import name
-                for possible in ['name', 'название', 'наименование', 'title']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        data['name'] = str(row[columns[possible]]).strip()
-                        break
-                        
-                # Import price
-                for possible in ['price', 'цена', 'cost']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        try:
-                            price_val = float(row[columns[possible]])
-                            data['price'] = str(int(price_val) if price_val.is_integer() else price_val)
-                        except (ValueError, TypeError):
-                            data['price'] = str(row[columns[possible]]).strip()
-                        break
-                        
-                # Import color
-                for possible in ['color', 'цвет', 'colour']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        data['color'] = str(row[columns[possible]]).strip()
-                        break
-                        
-                # Import volume
-                for possible in ['volume', 'объем', 'объём', 'мл']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        data['volume'] = str(row[columns[possible]]).strip()
-                        break
-                        
-                # Import material
-                for possible in ['material', 'материал', 'состав']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        data['material'] = str(row[columns[possible]]).strip()
-                        break
-                        
-                # Import gift purpose
-                for possible in ['gift', 'подарок', 'назначение', 'для кого']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        data['gift'] = str(row[columns[possible]]).strip()
-                        break
-                        
-                # Import pattern
-                for possible in ['pattern', 'рисунок', 'узор']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        data['pattern'] = str(row[columns[possible]]).strip()
-                        break
-                        
-                # Import complect
-                for possible in ['complect', 'комплектация', 'комплект']:
-                    if possible in columns and not pd.isna(row[columns[possible]]):
-                        data['complect'] = str(row[columns[possible]]).strip()
-                        break
-                
-                # Update SKU data
-                if sku not in self.skuData:
-                    self.skuData[sku] = {}
-                self.skuData[sku].update(data)
-                imported_count += 1
-            
-            # Update current form if the displayed SKU was imported
-            if self.currentSku and self.currentSku in self.skuData:
-                self._load_sku_data(self.currentSku)
-            
-            QtWidgets.QMessageBox.information(
-                self, 'Импорт завершен', 
-                f'Импортированы данные для {imported_count} SKU'
-            )
-            self.statusBar().showMessage(f'Импортированы данные для {imported_count} SKU', 5000)
-            
-        except ImportError:
+            # Ключевое слияние в базе: заданные в файле поля заменяют старые, остальные сохраняются
+            self._flush_sku_data()
+            self.sku_store.upsert_frame(self._sku_profile_key(), result.attributes)
+        except Exception as e:
+            self._on_import_failed('error', str(e))
+            return
+
+        # Update current form if the displayed SKU was imported
+        if self.currentSku and self.currentSku in result.attributes.index:
+            self._load_sku_data(self.currentSku)
+
+        imported_count = result.rows
+        text = f'Импортированы данные для {imported_count} SKU'
+        if result.skipped:
+            text += f'\nПропущено строк с SKU не из текущей папки: {result.skipped}'
+        QtWidgets.QMessageBox.information(self, 'Импорт завершен', text)
+        self.statusBar().showMessage(f'Импортированы данные для {imported_count} SKU', 5000)
+
+    def _on_import_failed(self, kind, text):
+        self.importBtn.setEnabled(True)
+        self.statusBar().clearMessage()
+        if kind == 'format':
+            QtWidgets.QMessageBox.warning(self, 'Ошибка импорта', text)
+        elif kind == 'pandas':
             QtWidgets.QMessageBox.critical(
                 self, 'Ошибка', 
                 'Для импорта требуется библиотека pandas.\nУстановите её: pip install pandas openpyxl'
             )
-        except Exception as e:
+        else:
             QtWidgets.QMessageBox.critical(
                 self, 'Ошибка импорта', 
-                f'Не удалось импортировать данные:\n{str(e)}'
+                f'Не удалось импортировать данные:\n{text}'
             )
 
     def show_setup_wizard(self):
         """Запуск мастера настройки"""
-        result = show_setup_wizard(self)
+        result = lazy_import('core.setup_wizard').show_setup_wizard(self)
         
         if result:
             # Применяем настройки из мастера
@@ -1089,7 +1191,9 @@ class MainWindow(QtWidgets.QMainWindow):
             
             try:
                 warnings = getattr(self.grouped, 'warnings', [])
-                report_path = generate_upload_report(self.grouped, self.upload_results, warnings, path)
+                with diagnostics.profile_operation('report'):
+                    report_path = lazy_import('core.reports').generate_upload_report(
+                        self.grouped, self.upload_results, warnings, path, metrics=self.upload_metrics)
                 QtWidgets.QMessageBox.information(self, 'Отчёт создан', f'Подробный отчёт сохранён:\n{report_path}')
                 self.statusBar().showMessage(f'Отчёт сохранён: {os.path.basename(report_path)}', 5000)
             except Exception as e:
@@ -1104,7 +1208,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 return
             
             try:
-                report_path = export_csv_report(self.grouped, self.upload_results, path)
+                report_path = lazy_import('core.reports').export_csv_report(self.grouped, self.upload_results, path)
                 QtWidgets.QMessageBox.information(self, 'Отчёт создан', f'CSV отчёт сохранён:\n{report_path}')
                 self.statusBar().showMessage(f'Отчёт сохранён: {os.path.basename(report_path)}', 5000)
             except Exception as e:
@@ -1116,20 +1220,10 @@ class MainWindow(QtWidgets.QMainWindow):
             self.photosEdit.setText(path)
 
     def populate_table(self, filter_text: str = ""):
-        self.table.setRowCount(0)
-        if not self.grouped:
-            return
-        for sku, files in self.grouped.by_sku.items():
-            if filter_text and filter_text.lower() not in sku.lower():
-                continue
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(sku))
-            self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(str(len(files))))
-            names = ', '.join(os.path.basename(f.path) for f in files)
-            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(names))
-        self.table.resizeColumnsToContents()
-        self.table.sortItems(0, QtCore.Qt.AscendingOrder)
+        self.skuModel.set_grouped(self.grouped)
+        self.skuProxy.set_filter_text(filter_text)
+        header = self.table.horizontalHeader()
+        self.skuModel.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
 
     def scan(self):
         folder = self.photosEdit.text().strip()
@@ -1138,11 +1232,12 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, 'Ошибка', 'Укажите корректную папку с фото')
             return
         
-        # Clear previous SKU data when scanning new folder
-        self.skuData.clear()
+        # Данные SKU остаются в хранилище; сбрасываем только форму
+        self._flush_sku_data()
         self._clear_sku_form()
         
-        self.grouped = group_photos_flat(folder, pattern)
+        with diagnostics.profile_operation('scan'):
+            self.grouped = group_photos_flat(folder, pattern)
         self.populate_table(self.searchEdit.text().strip())
         if self.grouped.warnings:
             self.statusBar().showMessage('Предупреждения: ' + ' | '.join(self.grouped.warnings), 10000)
@@ -1150,19 +1245,48 @@ class MainWindow(QtWidgets.QMainWindow):
             self.statusBar().showMessage(f'Найдено SKU: {len(self.grouped.by_sku)}', 5000)
 
     def apply_filter(self, _text: str = ""):
-        self.populate_table(self.searchEdit.text().strip())
+        self._filterTimer.start()
 
-    def on_table_selection_changed(self):
-        items = self.table.selectedItems()
-        if not items:
+    def _apply_filter_now(self):
+        self.skuProxy.set_filter_text(self.searchEdit.text())
+
+    def _selected_sku(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.skuProxy.sku_for(rows[0])
+
+    def on_table_selection_changed(self, *_):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
             self.clear_preview()
             self._clear_sku_form()
+            self.thumbnails.cancel_prefetch()
             return
-        sku = self.table.item(items[0].row(), 0).text()
+        sku = self.skuProxy.sku_for(rows[0])
         self.update_preview_for_sku(sku)
         self._load_sku_data(sku)
+        self._prefetch_neighbours(rows[0].row())
+
+    def _prefetch_neighbours(self, row: int):
+        """
+        Предзагружает превью SKU, которые вероятно выберут следующими: соседние
+        строки в текущем порядке сортировки/фильтра, в первую очередь по
+        направлению навигации. Устаревшие предзагрузки отменяются сервисом.
+        """
+        step = -1 if 0 <= row < self._lastPreviewRow else 1
+        self._lastPreviewRow = row
+        order = [row + step * i for i in range(1, PREFETCH_AHEAD + 1)]
+        order += [row - step * i for i in range(1, PREFETCH_BEHIND + 1)]
+        paths = []
+        for r in order:
+            if 0 <= r < self.skuProxy.rowCount():
+                files = self.grouped.by_sku.get(self.skuProxy.sku_for(self.skuProxy.index(r, 0)), [])
+                paths.extend(pf.path for pf in files[:PREVIEW_MAX_PHOTOS])
+        self.thumbnails.prefetch(paths)
 
     def clear_preview(self):
+        self.previewTiles.clear()
         while self.previewFlow.count():
             item = self.previewFlow.takeAt(0)
             if item:
@@ -1177,20 +1301,35 @@ class MainWindow(QtWidgets.QMainWindow):
         files = self.grouped.by_sku[sku]
         count = 0
         for pf in files:
-            if count >= 12:
+            if count >= PREVIEW_MAX_PHOTOS:
                 break
             lbl = QtWidgets.QLabel()
             lbl.setFixedSize(160, 160)
             lbl.setAlignment(QtCore.Qt.AlignCenter)
-            pix = QtGui.QPixmap(pf.path)
-            if not pix.isNull():
-                lbl.setPixmap(pix.scaled(150, 150, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
-            else:
-                lbl.setText(os.path.basename(pf.path))
             lbl.setToolTip(os.path.basename(pf.path))
             self.previewFlow.addWidget(lbl)
+            self.previewTiles[pf.path] = lbl
+            pix = self.thumbnails.request(pf.path)
+            if pix is None:
+                # Плейсхолдер, пока миниатюра декодируется в фоне
+                lbl.setText('…')
+                lbl.setStyleSheet('color:#777; background:#2c2c2c; border-radius:4px;')
+            else:
+                self._set_tile_pixmap(lbl, pf.path, pix)
             count += 1
 
+    def _set_tile_pixmap(self, lbl: QtWidgets.QLabel, path: str, pix: QtGui.QPixmap):
+        lbl.setStyleSheet('')
+        if pix.isNull():
+            lbl.setText(os.path.basename(path))
+        else:
+            lbl.setPixmap(pix)
+
+    def _on_thumbnail_ready(self, path: str, pix: QtGui.QPixmap):
+        lbl = self.previewTiles.get(path)
+        if lbl is not None:
+            self._set_tile_pixmap(lbl, path, pix)
+
     def start_upload(self):
         if not self.grouped or not self.grouped.by_sku:
             QtWidgets.QMessageBox.warning(self, 'Ошибка', 'Сначала выполните сканирование')
@@ -1209,36 +1348,98 @@ class MainWindow(QtWidgets.QMainWindow):
         if not token:
             QtWidgets.QMessageBox.warning(self, 'OAuth', 'Введите OAuth токен Яндекс.Диска')
             return
+        try:
+            limiter = lazy_import('core.throttle').limiter_from_profile(self.profile)
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, 'Профиль', f'Лимит скорости в профиле задан неверно: {e}')
+            return
+        if limiter:
+            self.logEdit.appendPlainText(f'🚦 Ограничение скорости: {limiter.describe()}')
 
         # Disable controls while working
         for w in (self.scanBtn, self.startBtn, self.saveBtn, self.profileCombo):
             w.setEnabled(False)
         concurrency = int(self.concSlider.value())
         limit = int(self.limitSpin.value())
-        self.worker = Worker(self.grouped, token, root, overwrite_mode, max_photos, concurrency=concurrency, limit=limit)
-        self.worker.progress.connect(self.on_progress)
-        self.worker.message.connect(self.on_message)
+        self.worker = Worker(self.grouped, token, root, overwrite_mode, max_photos, concurrency=concurrency, limit=limit,
+                             limiter=limiter)
         self.worker.finished_ok.connect(self.on_finished)
         self.progress.setValue(0)
+        if not hasattr(self, '_progressTimer'):
+            self._progressTimer = QtCore.QTimer(self)
+            self._progressTimer.setInterval(PROGRESS_POLL_MS)
+            self._progressTimer.timeout.connect(self._drain_progress)
+        self._progressTimer.start()
+        self.pauseBtn.setText('Пауза')
+        for w in (self.pauseBtn, self.cancelBtn):
+            w.setEnabled(True)
         self.worker.start()
 
-    def on_progress(self, done, total):
-        val = int(done * 100 / max(1, total))
-        self.progress.setValue(val)
-        self.statusBar().showMessage(f'Загружено {done}/{total}')
-
-    def on_message(self, msg):
-        # Append to log and status bar
-        self.logEdit.appendPlainText(msg)
-        self.statusBar().showMessage(msg, 5000)
+    def toggle_pause(self):
+        control = self.worker.control
+        if control.paused:
+            control.resume()
+            self.pauseBtn.setText('Пауза')
+            self.logEdit.appendPlainText('▶️ Загрузка продолжена')
+        else:
+            control.pause()
+            self.pauseBtn.setText('Продолжить')
+            self.logEdit.appendPlainText('⏸️ Пауза: текущие файлы догружаются, новые не начинаются')
+
+    def cancel_upload(self):
+        box = QtWidgets.QMessageBox(self)
+        box.setWindowTitle('Остановить загрузку')
+        box.setText('Остановить загрузку? Уже загруженные файлы попадут в результаты.')
+        abortBtn = box.addButton('Прервать сейчас', QtWidgets.QMessageBox.DestructiveRole)
+        finishBtn = box.addButton('Дождаться текущих файлов', QtWidgets.QMessageBox.AcceptRole)
+        box.addButton('Не останавливать', QtWidgets.QMessageBox.RejectRole)
+        box.exec_()
+        if box.clickedButton() not in (abortBtn, finishBtn):
+            return
+        self.worker.control.cancel(abort_transfers=box.clickedButton() is abortBtn)
+        for w in (self.pauseBtn, self.cancelBtn):
+            w.setEnabled(False)
+        self.statusBar().showMessage('Останавливаем загрузку…')
+
+    def _drain_progress(self):
+        """Забирает накопленные события загрузки одной пачкой"""
+        snap = self.worker.events.drain()
+        self.on_progress(snap)
+        if snap.messages:
+            self.on_message(snap.messages, snap.dropped)
+
+    def on_progress(self, snap):
+        self.progress.setValue(snap.percent)
+        text = f'Загружено {snap.done}/{snap.total} · {snap.mb_per_s:.2f} МБ/с · {snap.sku_per_min:.1f} SKU/мин'
+        if 0 < snap.done < snap.total:
+            text += f' · осталось ~{format_eta(snap.eta_s)}'
+        if snap.errors:
+            text += f' · ошибок: {snap.errors}'
+        self.statusBar().showMessage(text)
+
+    def on_message(self, messages, dropped=0):
+        # Один вызов на пачку; лог ограничен LOG_MAX_BLOCKS строками
+        if dropped:
+            messages = [f'… пропущено сообщений: {dropped}'] + list(messages)
+        self.logEdit.appendPlainText('\n'.join(messages))
 
     def on_finished(self, results):
+        self._progressTimer.stop()
+        self._drain_progress()
         self.upload_results = results
-        self.statusBar().showMessage('Загрузка завершена', 5000)
-        self.progress.setValue(100)
+        self.upload_metrics = list(self.worker.metrics)
+        self._record_history()
+        for w in (self.pauseBtn, self.cancelBtn):
+            w.setEnabled(False)
         for w in (self.scanBtn, self.startBtn, self.saveBtn, self.profileCombo):
             w.setEnabled(True)
-        QtWidgets.QMessageBox.information(self, 'Готово', 'Загрузка завершена')
+        if self.worker.control.cancelled:
+            QtWidgets.QMessageBox.information(
+                self, 'Остановлено',
+                f'Загрузка остановлена. Получены ссылки для {len(results)} SKU.')
+        else:
+            self.progress.setValue(100)
+            QtWidgets.QMessageBox.information(self, 'Готово', 'Загрузка завершена')
         # Persist settings
         self.settings.setValue('photos_dir', self.photosEdit.text().strip())
         self.settings.setValue('profile_name', self.profileCombo.currentText())
@@ -1246,101 +1447,63 @@ class MainWindow(QtWidgets.QMainWindow):
         self.settings.setValue('concurrency', int(self.concSlider.value()))
         self.settings.setValue('limit', int(self.limitSpin.value()))
 
+    def _record_history(self):
+        """Сохраняет итоги прогона в историю загрузок"""
+        if self.worker.outcome is None:
+            return
+        try:
+            attempted = self.worker.outcome.attempted_group(self.grouped)
+            stats = lazy_import('core.reports').collect_report(attempted, self.upload_results)
+            RunHistory().record_run(
+                stats, self.upload_metrics, self.worker.started_at, self.worker.finished_at,
+                root=self.worker.root, profile=self.profileCombo.currentText(),
+                concurrency=self.worker.concurrency, overwrite_mode=self.worker.overwrite_mode,
+            )
+        except Exception as e:
+            logger.warning("Не удалось сохранить историю загрузки: %s", e, exc_info=True)
+
+    def show_history(self):
+        """Показывает тренды по последним прогонам загрузки"""
+        try:
+            trend = RunHistory().trend(50)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, 'История загрузок', f'Не удалось прочитать историю:\n{e}')
+            return
+        if not trend:
+            QtWidgets.QMessageBox.information(self, 'История загрузок', 'История пуста — выполните загрузку.')
+            return
+
+        dlg = QtWidgets.QDialog(self)
+        dlg.setWindowTitle('История загрузок')
+        dlg.resize(900, 420)
+        layout = QtWidgets.QVBoxLayout(dlg)
+        table = QtWidgets.QTableWidget(0, len(TREND_HEADERS))
+        table.setHorizontalHeaderLabels(TREND_HEADERS)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        for values in reversed(trend_rows(trend)):
+            row = table.rowCount()
+            table.insertRow(row)
+            for col, value in enumerate(values):
+                table.setItem(row, col, QtWidgets.QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+        issues = detect_degradation(trend)
+        if issues:
+            lbl = QtWidgets.QLabel('\n'.join(f'⚠️ {issue}' for issue in issues))
+            lbl.setStyleSheet('color:#e8b04a;')
+            layout.addWidget(lbl)
+        dlg.exec_()
+
     def save_xlsx(self):
         if not self.grouped:
             QtWidgets.QMessageBox.warning(self, 'Ошибка', 'Нет данных для сохранения')
             return
-        sep = ';'
-        if self.profile:
-            sep = self.profile.get('photo_sep') or ';'
-        wb = create_wb_workbook()
-        ws = wb.active
-
-        for sku, files in self.grouped.by_sku.items():
-            links = self.upload_results.get(sku, [])
-            max_photos = 6
-            if self.profile:
-                try:
-                    max_photos = int(self.profile.get('max_photos') or 6)
-                except Exception:
-                    max_photos = 6
-            links = links[:max_photos]
-
-            # Get user-entered data for this SKU
-            sku_data = self.skuData.get(sku, {})
-            user_name = sku_data.get('name', '').strip()
-            user_price = sku_data.get('price', '').strip()
-            user_color = sku_data.get('color', '').strip()
-            user_volume = sku_data.get('volume', '').strip()
-            user_material = sku_data.get('material', '').strip()
-            user_gift = sku_data.get('gift', '').strip()
-            user_pattern = sku_data.get('pattern', '').strip()
-            user_complect = sku_data.get('complect', '').strip()
-
-            # Use user data if available, otherwise fall back to profile/template
-            title = user_name if user_name else sku
-            if not user_name and self.profile:
-                volume = (self.profile.get('defaults', {}) or {}).get('volume')
-                data = {'sku': sku, 'volume': volume or ''}
-                ttpl = self.profile.get('title_template')
-                if ttpl:
-                    try:
-                        title = str(ttpl).format(**data)
-                    except Exception:
-                        title = str(ttpl)
-
-            descr = ''
-            if self.profile:
-                volume = (self.profile.get('defaults', {}) or {}).get('volume')
-                data = {'sku': sku, 'volume': volume or ''}
-                dtpl = self.profile.get('description_template')
-                if dtpl:
-                    try:
-                        descr = str(dtpl).format(**data)
-                    except Exception:
-                        descr = str(dtpl)
-
-            # Determine final values (user input or profile default)
-            final_color = user_color if user_color else (self.profile.get('color') if self.profile else '')
-            final_price = user_price if user_price else str((self.profile.get('defaults', {}).get('price') if self.profile else '') or '')
-            final_volume = user_volume if user_volume else str((self.profile.get('defaults', {}).get('volume') if self.profile else '') or '')
-            final_material = user_material if user_material else (self.profile.get('composition') if self.profile else '')
-            final_gift = user_gift if user_gift else ''
-            final_pattern = user_pattern if user_pattern else ''
-            final_complect = user_complect if user_complect else ''
-
-            # Build row according to new WB template
-            row = {
-                'Группа': '',  # A - пустая, заполняется в WB
-                'Артикул продавца': sku,  # B
-                'Артикул WB': '',  # C - заполняется после создания
-                'Наименование': title,  # D
-                'Категория продавца': (self.profile.get('seller_category') if self.profile else 'Кружки'),  # E
-                'Бренд': (self.profile.get('brand') if self.profile else ''),  # F
-                'Описание': descr,  # G
-                'Фото': sep.join(links),  # H
-                'Вес с упаковкой (кг)': '',  # K - будет рассчитано из граммов
-                'Цвет': final_color,  # M
-                'Цена': final_price,  # O
-                'Ставка НДС': (self.profile.get('vat') if self.profile else '20%'),  # P
-                'Вес товара с упаковкой (г)': str((self.profile.get('package_weight_g') if self.profile else '') or ''),  # Q
-                'Высота предмета': str((self.profile.get('dims', {}).get('item_H_cm') if self.profile else '') or ''),  # R
-                'Высота упаковки': str((self.profile.get('dims', {}).get('H_cm') if self.profile else '') or ''),  # S
-                'Длина упаковки': str((self.profile.get('dims', {}).get('L_cm') if self.profile else '') or ''),  # T
-                'Ширина предмета': str((self.profile.get('dims', {}).get('item_W_cm') if self.profile else '') or ''),  # U
-                'Ширина упаковки': str((self.profile.get('dims', {}).get('W_cm') if self.profile else '') or ''),  # V
-                'Комплектация': final_complect,  # AD
-                'Материал посуды': final_material,  # AE
-                'Назначение подарка': final_gift,  # AG
-                'Объем (мл)': final_volume,  # AI
-                'Рисунок': final_pattern,  # AL
-            }
-            
-            # Auto-calculate weight in kg from grams
-            if self.profile and self.profile.get('calc_weight_kg_from_g') and self.profile.get('package_weight_g'):
-                row['Вес с упаковкой (кг)'] = str(round(self.profile.get('package_weight_g') / 1000, 3))
-            
-            append_row(ws, row)
+        export = lazy_import('core.export')
+        self._flush_sku_data()
+        with diagnostics.profile_operation('export_build'):
+            attributes = self.sku_store.load(self._sku_profile_key(), self.grouped.by_sku)
+            frame = export.build_wb_frame(self.grouped.by_sku.keys(), self.upload_results, attributes, self.profile)
 
         # Ask for save path
         now = datetime.now().strftime('%Y%m%d-%H%M%S')
@@ -1348,18 +1511,17 @@ class MainWindow(QtWidgets.QMainWindow):
         os.makedirs(os.path.dirname(default_path), exist_ok=True)
         path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Сохранить XLSX', default_path, 'Excel (*.xlsx)')
         save_path = path or default_path
-        wb.save(save_path)
+        with diagnostics.profile_operation('export_write'):
+            export.write_wb_frame(frame, save_path)
         QtWidgets.QMessageBox.information(self, 'Сохранено', save_path)
         # Persist settings
         self.settings.setValue('photos_dir', self.photosEdit.text().strip())
         self.settings.setValue('profile_name', self.profileCombo.currentText())
 
     def table_context_menu(self, pos):
-        idxs = self.table.selectionModel().selectedRows()
-        if not idxs:
+        sku = self._selected_sku()
+        if not sku:
             return
-        row = idxs[0].row()
-        sku = self.table.item(row, 0).text()
         m = QtWidgets.QMenu(self)
         actCopy = m.addAction('Копировать ссылки «Фото»')
         actOpen = m.addAction('Открыть папку SKU')
@@ -1389,6 +1551,17 @@ class MainWindow(QtWidgets.QMainWindow):
         if folder and os.path.isdir(folder):
             QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(folder))
 
+    def toggle_profiling(self, _checked: bool = False):
+        enabled = self.profilingAction.isChecked()
+        memory = self.profilingMemoryAction.isChecked()
+        self.settings.setValue('profiling_mode', enabled)
+        self.settings.setValue('profiling_memory', memory)
+        diagnostics.configure(enabled, memory=memory)
+        if enabled:
+            self.statusBar().showMessage(f'Профили операций сохраняются в {diagnostics.diagnostics_dir()}', 8000)
+        else:
+            self.statusBar().showMessage('Режим профилирования выключен', 3000)
+
     def check_for_updates(self):
         """Проверяет обновления вручную"""
         self.auto_updater.check_and_notify(silent=False)
@@ -1443,9 +1616,34 @@ class MainWindow(QtWidgets.QMainWindow):
         # Проверяем обновления при первом показе окна (автоматически, без уведомления если нет обновлений)
         if not hasattr(self, '_updates_checked'):
             self._updates_checked = True
+            QtCore.QTimer.singleShot(0, self._after_first_frame)
             QtCore.QTimer.singleShot(2000, lambda: self.auto_updater.check_and_notify(silent=True))
 
+    def _after_first_frame(self):
+        """Фиксирует время первого кадра и прогревает отложенные модули"""
+        startup_timer.mark('first_frame')
+        path = None
+        try:
+            path = startup_timer.write(os.path.join(get_data_dir('diagnostics'), 'startup_timing.txt'))
+            status = 'бюджет превышен' if startup_timer.over_budget() else 'в пределах бюджета'
+            logger.info("Первый кадр через %.2f с (%s), отчёт: %s", startup_timer.first_frame_s(), status, path)
+        except Exception as e:
+            logger.warning("Не удалось сохранить отчёт о запуске: %s", e)
+        preload_in_background(DEFERRED_MODULES, report_path=path)
+
     def closeEvent(self, event):
         """Обработчик закрытия окна"""
+        worker = getattr(self, 'worker', None)
+        if worker is not None and worker.isRunning():
+            answer = QtWidgets.QMessageBox.question(
+                self, 'Загрузка идёт',
+                'Загрузка ещё не завершена. Прервать её и закрыть приложение?')
+            if answer != QtWidgets.QMessageBox.Yes:
+                event.ignore()
+                return
+            worker.finished_ok.disconnect(self.on_finished)
+            worker.control.cancel(abort_transfers=True)
+            worker.wait(15000)
+        self._flush_sku_data()
         self._save_window_geometry()
         event.accept()
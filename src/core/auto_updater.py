@@ -6,25 +6,40 @@
 
 import requests
 import json
+import logging
 import os
 import sys
 import subprocess
 import tempfile
 import zipfile
 import shutil
+import time
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import unquote, urlsplit
 from PyQt5.QtWidgets import QMessageBox, QProgressDialog
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 
+from .delta import PatchError, apply_patch_file, find_patch_asset
+from .download import DownloadCancelled, RangedDownload, parse_sha256
+from .paths import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+# Не ходить в GitHub чаще, чем раз в столько секунд (для автоматической проверки)
+DEFAULT_CHECK_INTERVAL_S = 6 * 3600
+
+
 class UpdateChecker:
     """Проверка обновлений через GitHub API"""
     
-    def __init__(self, repo_owner="baltabekpro", repo_name="wb_auto"):
+    def __init__(self, repo_owner="baltabekpro", repo_name="wb_auto", check_interval_s=DEFAULT_CHECK_INTERVAL_S):
         self.repo_owner = repo_owner
         self.repo_name = repo_name
         self.api_base = "https://api.github.com"
         self.current_version = self.get_current_version()
+        self.check_interval_s = check_interval_s
+        self.cache_path = os.path.join(get_data_dir('updates'), 'latest_release.json')
         
     def get_current_version(self):
         """Получает текущую версию приложения"""
@@ -36,14 +51,60 @@ class UpdateChecker:
         except Exception:
             return "1.0.0"
     
-    def check_for_updates(self):
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_cache(self, cache):
+        try:
+            tmp = self.cache_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_path)
+        except Exception:
+            pass
+
+    def fetch_release(self, force=False):
+        """
+        Данные последнего релиза. В пределах check_interval_s берутся из кэша без сети
+        (если не force); иначе запрос условный — с ETag/Last-Modified прошлого ответа,
+        и 304 Not Modified возвращает сохранённый JSON.
+        """
+        cache = self._load_cache()
+        release = cache.get("release")
+        if release and not force and time.time() - cache.get("checked_at", 0) < self.check_interval_s:
+            return release
+
+        url = f"{self.api_base}/repos/{self.repo_owner}/{self.repo_name}/releases/latest"
+        headers = {"Accept": "application/vnd.github+json"}
+        if release:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
+        response = requests.get(url, headers=headers, timeout=10)
+        if response.status_code == 304 and release:
+            cache["checked_at"] = time.time()
+            self._save_cache(cache)
+            return release
+        response.raise_for_status()
+
+        release = response.json()
+        self._save_cache({
+            "release": release,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "checked_at": time.time(),
+        })
+        return release
+
+    def check_for_updates(self, force=False):
         """Проверяет наличие новых версий"""
         try:
-            url = f"{self.api_base}/repos/{self.repo_owner}/{self.repo_name}/releases/latest"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            release_data = response.json()
+            release_data = self.fetch_release(force=force)
             latest_version = release_data["tag_name"].lstrip("v")
             
             return {
@@ -51,12 +112,15 @@ class UpdateChecker:
                 "latest_version": latest_version,
                 "current_version": self.current_version,
                 "download_url": self.get_download_url(release_data),
+                "sha256": self.get_sha256(release_data),
+                "sha256_url": self.get_sha256_url(release_data),
+                "patch_url": self.get_patch_url(release_data, latest_version),
                 "release_notes": release_data.get("body", ""),
                 "published_at": release_data.get("published_at", "")
             }
             
         except Exception as e:
-            print(f"Ошибка проверки обновлений: {e}")
+            logger.warning("Ошибка проверки обновлений: %s", e)
             return None
     
     def compare_versions(self, current, latest):
@@ -86,6 +150,51 @@ class UpdateChecker:
         # Если нет .exe, возвращаем zipball
         return release_data.get("zipball_url")
 
+    def get_patch_url(self, release_data, latest_version):
+        """URL патча с текущей версии на latest_version, если он есть в релизе"""
+        asset = find_patch_asset(release_data.get("assets", []), self.current_version, latest_version)
+        return asset["browser_download_url"] if asset else None
+
+    def get_sha256(self, release_data):
+        """
+        Ожидаемый SHA-256 exe из поля digest ассета — без лишних запросов.
+        None — суммы в описании релиза нет, см. get_sha256_url.
+        """
+        exe = _find_exe_asset(release_data)
+        return parse_sha256(exe.get("digest") or "") if exe else None
+
+    def get_sha256_url(self, release_data):
+        """
+        URL файла с суммой («<имя>.sha256», SHA256SUMS) для exe без digest.
+        Сам файл скачивается только при старте обновления, а не при каждой проверке.
+        """
+        exe = _find_exe_asset(release_data)
+        if not exe or self.get_sha256(release_data):
+            return None
+        for asset in release_data.get("assets", []):
+            if asset["name"] in (exe["name"] + ".sha256", "SHA256SUMS", "sha256sums.txt"):
+                return asset["browser_download_url"]
+        return None
+
+
+def _find_exe_asset(release_data):
+    return next((a for a in release_data.get("assets", []) if a["name"].endswith(".exe")), None)
+
+
+def fetch_sha256(sums_url, exe_name):
+    """SHA-256 exe из файла сумм релиза; None — файл недоступен или строки нет"""
+    try:
+        response = requests.get(sums_url, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning("Не удалось получить контрольную сумму обновления: %s", e)
+        return None
+    for line in response.text.splitlines():
+        parts = line.split()
+        if parts and (len(parts) == 1 or parts[-1].lstrip("*") == exe_name):
+            return parse_sha256(parts[0])
+    return None
+
 
 class UpdateDownloader(QThread):
     """Поток для скачивания обновления"""
@@ -94,54 +203,123 @@ class UpdateDownloader(QThread):
     status = pyqtSignal(str)
     finished = pyqtSignal(bool, str)  # success, path_or_error
     
-    def __init__(self, download_url, filename):
+    def __init__(self, download_url, filename, sha256=None, patch_url=None, sha256_url=None):
         super().__init__()
         self.download_url = download_url
         self.filename = filename
-        self.temp_dir = tempfile.mkdtemp()
+        self.sha256 = sha256
+        self.sha256_url = sha256_url
+        self.patch_url = patch_url
+        # Постоянная папка, а не mkdtemp: недокачанные сегменты переживают перезапуск
+        self.download_dir = get_data_dir('updates')
+        self.download = None
+        self.cancelled = False
         
+    def cancel(self):
+        """Останавливает скачивание; полученные сегменты остаются для докачки"""
+        self.cancelled = True
+        if self.download is not None:
+            self.download.cancel()
+
+    def _on_progress(self, done, total):
+        if total > 0:
+            self.progress.emit(int(done * 100 / total))
+
+    def _try_patch(self, file_path):
+        """
+        Собирает новый exe из текущего и патча. Только для собранного exe
+        и только при известном SHA-256 — иначе результат нечем проверить.
+        """
+        if not (self.patch_url and self.sha256 and getattr(sys, "frozen", False)):
+            return False
+        patch_path = file_path + ".patch"
+        try:
+            self.status.emit("Скачивание патча обновления...")
+            self.download = RangedDownload(self.patch_url, patch_path, progress=self._on_progress)
+            self.download.run()
+            self.status.emit("Применение патча...")
+            apply_patch_file(sys.executable, patch_path, file_path, self.sha256)
+            return True
+        except DownloadCancelled:
+            raise
+        except (PatchError, OSError, requests.RequestException) as e:
+            logger.warning("Патч не применился, скачиваем полную версию: %s", e)
+            return False
+        finally:
+            if os.path.exists(patch_path):
+                os.remove(patch_path)
+
+    def _resolve_sha256(self):
+        """Дочитывает сумму из файла сумм релиза, если в описании её не было"""
+        if self.sha256 or not self.sha256_url:
+            return
+        self.status.emit("Получение контрольной суммы...")
+        exe_name = unquote(urlsplit(self.download_url).path.rsplit("/", 1)[-1])
+        self.sha256 = fetch_sha256(self.sha256_url, exe_name)
+
     def run(self):
         try:
+            file_path = os.path.join(self.download_dir, self.filename)
+            self._resolve_sha256()
+            if self._try_patch(file_path):
+                self.status.emit("Обновление установлено из патча!")
+                self.finished.emit(True, file_path)
+                return
+
+            if self.cancelled:
+                raise DownloadCancelled()
             self.status.emit("Скачивание обновления...")
-            
-            response = requests.get(self.download_url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            file_path = os.path.join(self.temp_dir, self.filename)
-            
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = int((downloaded / total_size) * 100)
-                            self.progress.emit(progress)
+            self.progress.emit(0)
+            self.download = RangedDownload(self.download_url, file_path, expected_sha256=self.sha256,
+                                           progress=self._on_progress)
+            self.download.run()
             
             self.status.emit("Обновление скачано успешно!")
             self.finished.emit(True, file_path)
             
+        except DownloadCancelled:
+            self.finished.emit(False, "Скачивание отменено")
         except Exception as e:
             self.status.emit(f"Ошибка скачивания: {e}")
             self.finished.emit(False, str(e))
 
 
+class UpdateCheckWorker(QThread):
+    """Проверка обновлений в фоне, чтобы запрос к GitHub не блокировал окно"""
+
+    done = pyqtSignal(object)  # dict с информацией об обновлении или None
+
+    def __init__(self, checker, force=False, parent=None):
+        super().__init__(parent)
+        self.checker = checker
+        self.force = force
+
+    def run(self):
+        self.done.emit(self.checker.check_for_updates(force=self.force))
+
+
 class AutoUpdater:
     """Главный класс автообновления"""
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, check_interval_s=DEFAULT_CHECK_INTERVAL_S):
         self.parent = parent
-        self.checker = UpdateChecker()
+        self.checker = UpdateChecker(check_interval_s=check_interval_s)
         self.downloader = None
+        self.check_worker = None
         
     def check_and_notify(self, silent=False):
-        """Проверяет обновления и уведомляет пользователя"""
-        update_info = self.checker.check_for_updates()
-        
+        """
+        Запускает проверку обновлений в фоне; результат показывается по готовности.
+        Ручная проверка (silent=False) не учитывает интервал, но остаётся условным запросом.
+        """
+        if self.check_worker is not None and self.check_worker.isRunning():
+            return
+        self.check_worker = UpdateCheckWorker(self.checker, force=not silent)
+        self.check_worker.done.connect(lambda info: self._notify(info, silent))
+        self.check_worker.start()
+
+    def _notify(self, update_info, silent):
+        """Уведомляет пользователя о результате проверки"""
         if not update_info:
             if not silent:
                 QMessageBox.warning(
@@ -218,7 +396,10 @@ class AutoUpdater:
         progress_dialog.setWindowTitle("Обновление WB Auto")
         
         # Создаем загрузчик
-        self.downloader = UpdateDownloader(update_info["download_url"], filename)
+        patch_url = update_info.get("patch_url") if filename.endswith(".exe") else None
+        self.downloader = UpdateDownloader(update_info["download_url"], filename,
+                                           sha256=update_info.get("sha256"), patch_url=patch_url,
+                                           sha256_url=update_info.get("sha256_url"))
         
         # Подключаем сигналы
         self.downloader.progress.connect(progress_dialog.setValue)
@@ -226,7 +407,7 @@ class AutoUpdater:
         self.downloader.finished.connect(
             lambda success, path: self.on_download_finished(success, path, progress_dialog)
         )
-        progress_dialog.canceled.connect(self.downloader.terminate)
+        progress_dialog.canceled.connect(self.downloader.cancel)
         
         # Запускаем загрузку
         progress_dialog.show()
@@ -236,6 +417,8 @@ class AutoUpdater:
         """Обработка завершения загрузки"""
         progress_dialog.close()
         
+        if not success and self.downloader is not None and self.downloader.cancelled:
+            return
         if not success:
             QMessageBox.critical(
                 self.parent,
@@ -348,7 +531,7 @@ def create_version_file(version="1.0.1"):
     """Создает файл версии"""
     version_file = Path(__file__).parent.parent.parent / "version.txt"
     version_file.write_text(version, encoding='utf-8')
-    print(f"Создан файл версии: {version}")
+    logger.info("Создан файл версии: %s", version)
 
 
 if __name__ == "__main__":
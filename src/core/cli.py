@@ -0,0 +1,289 @@
+"""
+Пакетный режим без интерфейса: сканирование → загрузка → XLSX для WB и отчёт.
+Несколько папок обрабатываются по очереди в одном процессе.
+
+    python cli.py --profile profiles/sample_profile.json --folder D:/photos/batch1 --folder D:/photos/batch2
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from .diagnostics import configure as configure_profiling, diagnostics_dir, profile_operation
+from .export import export_wb_xlsx
+from .history import RunHistory
+from .log import setup_logging
+from .metrics import enable_from_env as enable_metrics_from_env, start_http_server as start_metrics_server
+from .parser import group_photos_flat
+from .pipeline import run_uploads
+from .profiles import get_profile, list_profiles
+from .progress import ProgressBuffer, format_eta
+from .reports import collect_report, generate_upload_report
+from .run_control import RunControl
+from .sku_store import SkuStore
+from .throttle import UploadLimiter, limiter_from_profile
+from .tracing import enable_from_env as enable_tracing_from_env, start_tracing, stop_tracing
+from .xlsx_gen import profile_max_photos
+from . import yadisk_client
+
+# Коды завершения
+EXIT_OK = 0
+EXIT_PARTIAL = 1      # часть SKU не загрузилась или загрузилась не полностью
+EXIT_USAGE = 2        # неверные аргументы, профиль или папка
+EXIT_FATAL = 3        # нет токена, ошибка прогона
+EXIT_INTERRUPTED = 130
+
+OVERWRITE_MODES = ('never', 'changed', 'always')
+
+
+def _resolve_profile(value: Optional[str], profiles_dir: Optional[str]):
+    """Профиль по пути к JSON или по имени из папки профилей"""
+    if not value:
+        return None
+    if os.path.isfile(value):
+        return get_profile(value)
+    path = list_profiles(profiles_dir).get(value)
+    if not path:
+        raise ValueError(f"Профиль не найден: {value}")
+    return get_profile(path)
+
+
+def _resolve_token(value: Optional[str]):
+    """Токен из аргумента, переменной WB_AUTO_TOKEN или сохранённый в keyring"""
+    try:
+        import keyring
+    except Exception:
+        keyring = None
+    token = value or os.environ.get('WB_AUTO_TOKEN') or yadisk_client.get_saved_token(keyring)
+    return token, keyring
+
+
+def _report_progress(events: ProgressBuffer, stop: threading.Event, interval: float, quiet: bool):
+    """Печатает сообщения и сводку прогресса, пока идёт загрузка"""
+    while True:
+        finished = stop.wait(interval)
+        snap = events.drain()
+        if snap.dropped:
+            print(f"… пропущено сообщений: {snap.dropped}")
+        for msg in snap.messages:
+            print(msg)
+        if not quiet and snap.total:
+            line = (f"[{snap.done}/{snap.total}] {snap.mb_per_s:.2f} МБ/с · "
+                    f"{snap.sku_per_min:.1f} SKU/мин · ошибок: {snap.errors}")
+            if 0 < snap.done < snap.total:
+                line += f" · осталось ~{format_eta(snap.eta_s)}"
+            print(line, flush=True)
+        if finished:
+            return
+
+
+def process_folder(folder: str, args, profile, token: str, keyring, control: RunControl,
+                   limiter: Optional[UploadLimiter] = None) -> int:
+    """Полный прогон одной папки; возвращает код завершения для неё"""
+    name = os.path.basename(os.path.normpath(folder)) or 'photos'
+    print(f"📁 {folder}")
+    if not os.path.isdir(folder):
+        print(f"❌ Папка не найдена: {folder}")
+        return EXIT_USAGE
+
+    with profile_operation('scan'):
+        grouped = group_photos_flat(folder)
+    for w in grouped.warnings:
+        print(f"⚠️ {w}")
+    print(f"🔎 Найдено SKU: {len(grouped.by_sku)}")
+    if not grouped.by_sku:
+        return EXIT_OK
+
+    root = args.root or (profile.get('yadisk_root') if profile else None) or '/WB/Kruzhki'
+    events = ProgressBuffer()
+    stop = threading.Event()
+    reporter = threading.Thread(target=_report_progress, args=(events, stop, args.progress_interval, args.quiet),
+                                name='cli-progress', daemon=True)
+    reporter.start()
+    try:
+        with profile_operation('upload'):
+            outcome = run_uploads(
+                grouped, token, root, args.overwrite, profile_max_photos(profile),
+                concurrency=args.concurrency, limit=args.limit, keyring=keyring,
+                events=events, control=control, limiter=limiter,
+            )
+    finally:
+        stop.set()
+        reporter.join()
+
+    attempted = outcome.attempted_group(grouped)
+    stats = collect_report(attempted, outcome.results)
+
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    os.makedirs(args.out_dir, exist_ok=True)
+    xlsx_path = os.path.join(args.out_dir, f'wb_upload_{name}_{stamp}.xlsx')
+    with profile_operation('export'):
+        attributes = None
+        if not args.no_sku_data:
+            # Данные карточек, введённые или импортированные в окне для этого профиля
+            attributes = SkuStore(args.sku_db).load(profile.name if profile else '', grouped.by_sku)
+        export_wb_xlsx(xlsx_path, grouped, outcome.results, profile, attributes)
+        print(f"💾 Файл для WB: {xlsx_path}")
+        if not args.no_report:
+            report_path = os.path.join(args.out_dir, f'upload_report_{name}_{stamp}.xlsx')
+            csv_path = os.path.join(args.out_dir, f'upload_report_{name}_{stamp}.csv') if args.csv else None
+            generate_upload_report(attempted, outcome.results, grouped.warnings, report_path,
+                                   csv_path=csv_path, metrics=outcome.metrics)
+            print(f"📊 Отчёт: {report_path}")
+
+    if not args.no_history:
+        try:
+            RunHistory(args.history_db).record_run(
+                stats, outcome.metrics, outcome.started_at, outcome.finished_at,
+                root=root, profile=profile.name if profile else '',
+                concurrency=args.concurrency, overwrite_mode=args.overwrite,
+            )
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить историю загрузки: {e}")
+
+    print(f"✅ Успешно: {stats.success_sku}/{stats.total_sku} SKU, ссылок: {stats.total_links}")
+    if outcome.cancelled:
+        return EXIT_INTERRUPTED
+    return EXIT_OK if stats.success_sku == stats.total_sku else EXIT_PARTIAL
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='WB Auto: загрузка фото в Яндекс.Диск и подготовка XLSX без интерфейса',
+        epilog='Коды завершения: 0 — успех, 1 — часть SKU с ошибками, 2 — неверные параметры, '
+               '3 — критическая ошибка, 130 — прервано',
+    )
+    parser.add_argument('--folder', action='append', required=True,
+                        help='Папка с фото (можно указать несколько раз)')
+    parser.add_argument('--profile', help='Путь к JSON профиля или его имя')
+    parser.add_argument('--profiles-dir', help='Папка профилей для поиска по имени')
+    parser.add_argument('--root', help='Папка на Яндекс.Диске (по умолчанию из профиля)')
+    parser.add_argument('--token', help='OAuth-токен (иначе WB_AUTO_TOKEN или сохранённый)')
+    parser.add_argument('--concurrency', type=int, default=2, help='Одновременных загрузок SKU')
+    parser.add_argument('--overwrite', choices=OVERWRITE_MODES, default='never', help='Режим перезаписи')
+    parser.add_argument('--limit', type=int, default=0, help='Загрузить только первые N SKU каждой папки')
+    parser.add_argument('--limit-kbps', type=float, metavar='KBPS',
+                        help='Общий лимит скорости загрузки, КБ/с (по умолчанию из профиля; 0 — без ограничения)')
+    parser.add_argument('--limit-schedule', metavar='SPEC',
+                        help='Лимит по времени суток, например "09:00-19:00=1024,19:00-09:00=0" (КБ/с)')
+    parser.add_argument('--out-dir', default='exports', help='Куда сохранять XLSX и отчёты')
+    parser.add_argument('--csv', action='store_true', help='Дополнительно сохранить отчёт в CSV')
+    parser.add_argument('--no-report', action='store_true', help='Не формировать отчёт о загрузке')
+    parser.add_argument('--no-history', action='store_true', help='Не записывать прогон в историю')
+    parser.add_argument('--history-db', help='Путь к базе истории')
+    parser.add_argument('--sku-db', help='Путь к базе данных SKU')
+    parser.add_argument('--no-sku-data', action='store_true',
+                        help='Не подставлять сохранённые данные SKU (название, цена и т.д.)')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Период вывода прогресса, с')
+    parser.add_argument('--quiet', action='store_true', help='Печатать только сообщения и итоги')
+    parser.add_argument('--log-level', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'), type=str.upper,
+                        help='Подробность журнала (по умолчанию WB_AUTO_LOG_LEVEL или INFO); '
+                             'с этим ключом записи дублируются в stderr')
+    parser.add_argument('--trace', nargs='?', const='', metavar='PATH',
+                        help='Сохранить трассировку этапов (Chrome Trace JSON); без PATH — в папку данных')
+    parser.add_argument('--profiling', action='store_true',
+                        help='Профилировать сканирование, загрузку и экспорт (cProfile, .prof и сводка)')
+    parser.add_argument('--profiling-memory', action='store_true',
+                        help='Вместе с --profiling снимать память через tracemalloc')
+    parser.add_argument('--diagnostics-dir', help='Куда сохранять профили (по умолчанию папка данных)')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='Отдавать метрики Prometheus на http://127.0.0.1:PORT/metrics (0 — любой свободный порт)')
+    parser.add_argument('--continue-on-error', action='store_true',
+                        help='Продолжать со следующей папкой после критической ошибки')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.concurrency = max(1, args.concurrency)
+    log_path = setup_logging(args.log_level, console_level=args.log_level)
+    if not args.quiet:
+        print(f"📝 Журнал: {log_path}")
+    if args.profiling or args.profiling_memory:
+        configure_profiling(True, memory=args.profiling_memory, out_dir=args.diagnostics_dir)
+        if args.diagnostics_dir:
+            os.makedirs(args.diagnostics_dir, exist_ok=True)
+        print(f"🔬 Профили: {diagnostics_dir()}")
+    if args.trace is not None:
+        start_tracing(args.trace or None)
+    else:
+        enable_tracing_from_env()
+    metrics_url = None
+    if args.metrics_port is not None:
+        try:
+            metrics_url = start_metrics_server(args.metrics_port)
+        except OSError as e:
+            print(f"⚠️ Сервер метрик не запущен: {e}", file=sys.stderr)
+    else:
+        metrics_url = enable_metrics_from_env()
+    if metrics_url:
+        print(f"📈 Метрики: {metrics_url}")
+    try:
+        return _run(args)
+    finally:
+        trace_path = stop_tracing()
+        if trace_path:
+            print(f"🧭 Трассировка: {trace_path}")
+
+
+def _run(args) -> int:
+    """Проверка параметров и токена, затем обработка папок по очереди"""
+    try:
+        profile = _resolve_profile(args.profile, args.profiles_dir)
+        # Один лимит на все папки: скорость общая для процесса
+        limiter = limiter_from_profile(profile, args.limit_kbps, args.limit_schedule)
+    except Exception as e:
+        print(f"❌ {e}")
+        return EXIT_USAGE
+    if limiter and not args.quiet:
+        print(f"🚦 Ограничение скорости: {limiter.describe()}")
+
+    token, keyring = _resolve_token(args.token)
+    if not token:
+        print("❌ OAuth-токен Яндекс.Диска не задан (--token или WB_AUTO_TOKEN)")
+        return EXIT_FATAL
+
+    try:
+        valid = yadisk_client.make_client(token).check_token()
+    except Exception as e:
+        print(f"❌ Не удалось проверить токен: {e}")
+        return EXIT_FATAL
+    if not valid:
+        print("❌ Недействительный токен Яндекс.Диска")
+        return EXIT_FATAL
+
+    # Ctrl+C: первое нажатие — мягкая остановка после текущих файлов, второе — прервать передачи
+    control = RunControl()
+
+    def _on_sigint(signum, frame):
+        if control.cancelled:
+            control.cancel(abort_transfers=True)
+            print("⏹️ Прерываем текущие передачи…")
+        else:
+            control.cancel()
+            print("⏹️ Остановка после текущих файлов (Ctrl+C ещё раз — прервать сразу)")
+
+    signal.signal(signal.SIGINT, _on_sigint)
+
+    code = EXIT_OK
+    for folder in args.folder:
+        if control.cancelled:
+            break
+        try:
+            result = process_folder(folder, args, profile, token, keyring, control, limiter)
+        except Exception as e:
+            print(f"❌ Ошибка обработки {folder}: {e}")
+            result = EXIT_FATAL
+        code = max(code, result)
+        if result == EXIT_FATAL and not args.continue_on_error:
+            break
+    if control.cancelled:
+        return EXIT_INTERRUPTED
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Применение бинарных патчей формата BSDIFF40 (bsdiff/bspatch) без внешних утилит.
+Патч между соседними версиями в разы меньше полного exe; результат пишется
+во временный файл и принимается только при совпадении SHA-256.
+"""
+import bz2
+import hashlib
+import os
+import re
+from typing import Optional
+
+import numpy as np
+
+MAGIC = b'BSDIFF40'
+HEADER_SIZE = 32
+
+# Имя ассета патча в релизе: WB_Auto_<из версии>_to_<в версию>.patch
+PATCH_NAME_RE = re.compile(r'_(?P<source>\d+(?:\.\d+)*)_to_(?P<target>\d+(?:\.\d+)*)\.patch$', re.IGNORECASE)
+
+
+class PatchError(Exception):
+    """Патч повреждён, не подходит к исходному файлу или результат не прошёл проверку"""
+
+
+def _offtin(buf: bytes) -> int:
+    """Знаковое 64-битное число bsdiff: модуль little-endian, знак в старшем бите"""
+    value = int.from_bytes(buf[:8], 'little')
+    if value & (1 << 63):
+        return -(value & ~(1 << 63))
+    return value
+
+
+def find_patch_asset(assets, source: str, target: str):
+    """Ассет патча из версии source в target или None"""
+    for asset in assets or []:
+        m = PATCH_NAME_RE.search(asset.get('name', ''))
+        if m and m.group('source') == source and m.group('target') == target:
+            return asset
+    return None
+
+
+def bspatch(old: bytes, patch: bytes) -> bytes:
+    """
+    Восстанавливает новый файл по старому и патчу BSDIFF40
+
+    Raises:
+        PatchError: Неверный формат или патч не от этого файла
+    """
+    if len(patch) < HEADER_SIZE or patch[:8] != MAGIC:
+        raise PatchError('Файл не является патчем BSDIFF40')
+    ctrl_len = _offtin(patch[8:16])
+    diff_len = _offtin(patch[16:24])
+    new_size = _offtin(patch[24:32])
+    if ctrl_len < 0 or diff_len < 0 or new_size < 0 or HEADER_SIZE + ctrl_len + diff_len > len(patch):
+        raise PatchError('Повреждённый заголовок патча')
+
+    try:
+        ctrl = bz2.decompress(patch[HEADER_SIZE:HEADER_SIZE + ctrl_len])
+        diff = bz2.decompress(patch[HEADER_SIZE + ctrl_len:HEADER_SIZE + ctrl_len + diff_len])
+        extra = bz2.decompress(patch[HEADER_SIZE + ctrl_len + diff_len:])
+    except (OSError, ValueError, EOFError) as e:
+        raise PatchError(f'Не удалось распаковать патч: {e}')
+
+    old_arr = np.frombuffer(old, dtype=np.uint8)
+    diff_arr = np.frombuffer(diff, dtype=np.uint8)
+    new = np.empty(new_size, dtype=np.uint8)
+    old_size = len(old_arr)
+    old_pos = new_pos = diff_pos = extra_pos = ctrl_pos = 0
+
+    while new_pos < new_size:
+        if ctrl_pos + 24 > len(ctrl):
+            raise PatchError('Повреждённый блок управления патча')
+        add_len = _offtin(ctrl[ctrl_pos:ctrl_pos + 8])
+        copy_len = _offtin(ctrl[ctrl_pos + 8:ctrl_pos + 16])
+        seek = _offtin(ctrl[ctrl_pos + 16:ctrl_pos + 24])
+        ctrl_pos += 24
+        if add_len < 0 or copy_len < 0 or new_pos + add_len + copy_len > new_size \
+                or diff_pos + add_len > len(diff_arr) or extra_pos + copy_len > len(extra):
+            raise PatchError('Патч выходит за границы файла')
+
+        # Байты diff складываются со старыми по модулю 256 (переполнение uint8)
+        chunk = diff_arr[diff_pos:diff_pos + add_len].copy()
+        lo, hi = max(old_pos, 0), min(old_pos + add_len, old_size)
+        if lo < hi:
+            chunk[lo - old_pos:hi - old_pos] += old_arr[lo:hi]
+        new[new_pos:new_pos + add_len] = chunk
+        new_pos += add_len
+        old_pos += add_len
+        diff_pos += add_len
+
+        new[new_pos:new_pos + copy_len] = np.frombuffer(extra, dtype=np.uint8, count=copy_len, offset=extra_pos)
+        new_pos += copy_len
+        extra_pos += copy_len
+        old_pos += seek
+
+    return new.tobytes()
+
+
+def apply_patch_file(old_path: str, patch_path: str, dest: str, expected_sha256: Optional[str]) -> str:
+    """
+    Применяет патч к файлу old_path и сохраняет результат в dest
+
+    Raises:
+        PatchError: Патч не применился или SHA-256 результата не совпал
+    """
+    if not expected_sha256:
+        raise PatchError('Нет контрольной суммы новой версии — патч нечем проверить')
+    with open(old_path, 'rb') as f:
+        old = f.read()
+    with open(patch_path, 'rb') as f:
+        patch = f.read()
+    new = bspatch(old, patch)
+    digest = hashlib.sha256(new).hexdigest()
+    if digest != expected_sha256.lower():
+        raise PatchError(f'Контрольная сумма после патча не совпала: {digest}')
+    tmp = dest + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(new)
+    os.replace(tmp, dest)
+    return dest
@@ -0,0 +1,187 @@
+"""
+Режим профилирования: сканирование, загрузка и экспорт выполняются под cProfile
+(и при желании с tracemalloc), результаты складываются в папку диагностики:
+
+    <время>_<операция>.prof — для snakeviz / pstats / speedscope
+    <время>_<операция>.txt  — топ функций по cumulative и tottime, память
+
+cProfile видит только свой поток, поэтому рабочие потоки загрузки профилируются
+отдельно (profile_thread) и их статистика сливается с основной в один .prof.
+Пока режим выключен, profile_operation и profile_thread ничего не делают.
+"""
+import contextvars
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from .paths import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 30
+# Глубина стека tracemalloc: хватает, чтобы отличить вызовы из pandas от своих
+TRACEMALLOC_FRAMES = 10
+
+_config = {'enabled': False, 'memory': False, 'top_n': DEFAULT_TOP_N, 'out_dir': None}
+_current: contextvars.ContextVar = contextvars.ContextVar('wb_auto_profile_session', default=None)
+# Поток уже под cProfile: второй профилировщик в том же потоке подменил бы первый
+_local = threading.local()
+# Сообщение о том, что рабочие потоки не профилируются, пишется в лог один раз
+_thread_profiling_noted = False
+
+
+def configure(enabled: bool, memory: bool = False, top_n: int = DEFAULT_TOP_N, out_dir: Optional[str] = None):
+    """Включает или выключает режим профилирования для последующих операций"""
+    _config.update(enabled=bool(enabled), memory=bool(memory), top_n=int(top_n or DEFAULT_TOP_N), out_dir=out_dir)
+
+
+def is_enabled() -> bool:
+    return _config['enabled']
+
+
+def diagnostics_dir() -> str:
+    return _config['out_dir'] or get_data_dir('diagnostics')
+
+
+def _unique_base(out_dir: str, name: str) -> str:
+    """Путь без расширения: метка до миллисекунд, при совпадении — порядковый номер"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]
+    base = os.path.join(out_dir, f'{stamp}_{name}')
+    n = 1
+    while os.path.exists(base + '.prof') or os.path.exists(base + '.txt'):
+        n += 1
+        base = os.path.join(out_dir, f'{stamp}_{name}-{n}')
+    return base
+
+
+class ProfileSession:
+    """Профиль одной операции: основной поток плюс рабочие потоки"""
+
+    def __init__(self, name: str, memory: bool, top_n: int, out_dir: str):
+        self.name = name
+        self.memory = memory
+        self.top_n = top_n
+        self.out_dir = out_dir
+        self.prof_path = ''
+        self.summary_path = ''
+        self._profile = cProfile.Profile()
+        self._threads: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._mem_before = None
+        self._t0 = 0.0
+
+    def start(self):
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._mem_before = tracemalloc.take_snapshot()
+        self._t0 = time.perf_counter()
+        _local.active = True
+        self._profile.enable()
+
+    def add_thread(self, profile: cProfile.Profile):
+        with self._lock:
+            self._threads.append(profile)
+
+    def stop(self):
+        self._profile.disable()
+        _local.active = False
+        elapsed = time.perf_counter() - self._t0
+        mem_lines = self._memory_summary() if self.memory else []
+
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            threads = list(self._threads)
+        for profile in threads:
+            stats.add(profile)
+
+        base = _unique_base(self.out_dir, self.name)
+        self.prof_path = base + '.prof'
+        self.summary_path = base + '.txt'
+        stats.dump_stats(self.prof_path)
+
+        out = io.StringIO()
+        out.write(f'Операция: {self.name}\n')
+        out.write(f'Длительность: {elapsed:.3f} с, рабочих потоков: {len(threads)}\n\n')
+        stats.stream = out
+        for sort, title in (('cumulative', 'по cumulative'), ('tottime', 'по tottime')):
+            out.write(f'=== Топ {self.top_n} {title} ===\n')
+            stats.sort_stats(sort).print_stats(self.top_n)
+        if mem_lines:
+            out.write('\n'.join(mem_lines) + '\n')
+        with open(self.summary_path, 'w', encoding='utf-8') as f:
+            f.write(out.getvalue())
+        logger.info("Профиль %s сохранён: %s", self.name, self.prof_path)
+
+    def _memory_summary(self) -> List[str]:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        lines = ['=== Память (tracemalloc) ===',
+                 f'Сейчас: {current / 1024 / 1024:.1f} МБ, пик за операцию: {peak / 1024 / 1024:.1f} МБ',
+                 f'Топ {self.top_n} мест прироста:']
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(ignore).compare_to(self._mem_before.filter_traces(ignore), 'lineno')
+        lines += [str(stat) for stat in diff[:self.top_n]]
+        return lines
+
+
+@contextmanager
+def profile_operation(name: str):
+    """
+    Профилирует блок, если режим включён; отдаёт ProfileSession или None.
+    Вложенные вызовы в уже профилируемом потоке ничего не делают.
+    """
+    if not _config['enabled'] or getattr(_local, 'active', False):
+        yield None
+        return
+    session = ProfileSession(name, _config['memory'], _config['top_n'], diagnostics_dir())
+    token = _current.set(session)
+    session.start()
+    try:
+        yield session
+    finally:
+        try:
+            session.stop()
+        except Exception as e:
+            logger.warning("Не удалось сохранить профиль %s: %s", name, e)
+        _current.reset(token)
+
+
+@contextmanager
+def profile_thread():
+    """Профилирует работу рабочего потока в рамках текущей операции (контекст копируется в задачу пула)"""
+    session = _current.get()
+    if session is None or getattr(_local, 'active', False):
+        yield
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as e:
+        # Python 3.12+: профилировщик один на процесс (sys.monitoring) и уже занят основным потоком
+        global _thread_profiling_noted
+        if not _thread_profiling_noted:
+            _thread_profiling_noted = True
+            logger.debug("Рабочие потоки не профилируются, в профиле только основной поток: %s", e)
+        yield
+        return
+    _local.active = True
+    try:
+        yield
+    finally:
+        profile.disable()
+        _local.active = False
+        session.add_thread(profile)
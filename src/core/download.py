@@ -0,0 +1,209 @@
+"""
+Скачивание файла несколькими HTTP Range-сегментами параллельно с докачкой.
+Сегменты лежат в папке частей до сборки, поэтому обрыв связи не начинает
+загрузку заново.
+
+SHA-256 при скачивании одним запросом считается на лету. У сегментов так не
+выйдет: они приходят параллельно и не по порядку, а SHA-256 нельзя собрать из
+хэшей частей. Поэтому хэш считается в том же проходе, которым части склеиваются
+в итоговый файл: части читаются один раз, готовый файл повторно не читается.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import requests
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from .paths import get_data_dir
+
+CHUNK_SIZE = 256 * 1024
+DEFAULT_SEGMENTS = 4
+# Файлы меньше этого размера качаются одним запросом
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class DownloadCancelled(Exception):
+    """Скачивание отменено; уже полученные сегменты сохранены для докачки"""
+
+
+class ChecksumMismatch(Exception):
+    """SHA-256 скачанного файла не совпал с ожидаемым"""
+
+
+def parse_sha256(text: str) -> Optional[str]:
+    """Хэш из файла *.sha256 («<hex>  <имя>») или поля digest GitHub («sha256:<hex>»)"""
+    if not text:
+        return None
+    token = text.strip().split()[0] if text.strip() else ''
+    if token.lower().startswith('sha256:'):
+        token = token[7:]
+    token = token.lower()
+    if len(token) == 64 and all(c in '0123456789abcdef' for c in token):
+        return token
+    return None
+
+
+class RangedDownload:
+    """Параллельное скачивание с докачкой и проверкой SHA-256"""
+
+    def __init__(self, url: str, dest: str, expected_sha256: Optional[str] = None,
+                 segments: int = DEFAULT_SEGMENTS, progress: Optional[ProgressCallback] = None,
+                 parts_dir: Optional[str] = None, timeout: float = 30):
+        self.url = url
+        self.dest = dest
+        self.expected_sha256 = (expected_sha256 or '').lower() or None
+        self.segments = max(1, segments)
+        self.progress = progress
+        self.timeout = timeout
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        self.parts_dir = parts_dir or get_data_dir('updates', 'parts', key)
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._done = 0
+        self._total = 0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _advance(self, n: int):
+        with self._lock:
+            self._done += n
+            done, total = self._done, self._total
+        if self.progress:
+            self.progress(done, total)
+
+    def _probe(self) -> Tuple[str, int, bool, str]:
+        """Итоговый URL после редиректов, размер, поддержка Range и ETag"""
+        r = requests.head(self.url, allow_redirects=True, timeout=self.timeout)
+        r.raise_for_status()
+        size = int(r.headers.get('Content-Length') or 0)
+        ranges = r.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        return r.url, size, ranges and size > 0, r.headers.get('ETag', '')
+
+    def _plan(self, size: int) -> List[Tuple[int, int]]:
+        count = max(1, min(self.segments, size // MIN_SEGMENT_SIZE))
+        step = -(-size // count)
+        return [(start, min(size, start + step) - 1) for start in range(0, size, step)]
+
+    def _prepare_parts(self, url: str, size: int, etag: str) -> List[Tuple[int, int]]:
+        """Восстанавливает план сегментов прошлой попытки или начинает заново"""
+        meta_path = os.path.join(self.parts_dir, 'meta.json')
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception:
+            meta = {}
+        if meta.get('size') == size and meta.get('etag') == etag and meta.get('segments'):
+            return [tuple(s) for s in meta['segments']]
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        os.makedirs(self.parts_dir, exist_ok=True)
+        plan = self._plan(size)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'url': self.url, 'size': size, 'etag': etag, 'segments': plan}, f)
+        return plan
+
+    def _part_path(self, index: int) -> str:
+        return os.path.join(self.parts_dir, f'{index:03d}.part')
+
+    # Обрыв соединения: повтор продолжает сегмент с того места, где он оборвался
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10),
+           retry=retry_if_exception_type(requests.RequestException), reraise=True)
+    def _fetch_segment(self, url: str, index: int, start: int, end: int):
+        path = self._part_path(index)
+        have = os.path.getsize(path) if os.path.exists(path) else 0
+        if have >= end - start + 1:
+            return
+        headers = {'Range': f'bytes={start + have}-{end}'}
+        with requests.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise IOError('Сервер не поддерживает докачку (Range)')
+            with open(path, 'ab') as f:
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    if self._cancelled.is_set():
+                        raise DownloadCancelled()
+                    f.write(chunk)
+                    self._advance(len(chunk))
+
+    def _assemble(self, plan: List[Tuple[int, int]]) -> str:
+        """Склеивает сегменты в итоговый файл; SHA-256 считается в этом же проходе по частям"""
+        digest = hashlib.sha256()
+        tmp = self.dest + '.tmp'
+        with open(tmp, 'wb') as out:
+            for index in range(len(plan)):
+                with open(self._part_path(index), 'rb') as part:
+                    while True:
+                        buf = part.read(CHUNK_SIZE)
+                        if not buf:
+                            break
+                        digest.update(buf)
+                        out.write(buf)
+        self._verify(digest, tmp)
+        os.replace(tmp, self.dest)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        return self.dest
+
+    def _single_stream(self, url: str) -> str:
+        """Один запрос без Range: хэш считается прямо по ходу скачивания"""
+        digest = hashlib.sha256()
+        tmp = self.dest + '.tmp'
+        with requests.get(url, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            with self._lock:
+                self._total = int(r.headers.get('Content-Length') or 0)
+            with open(tmp, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    if self._cancelled.is_set():
+                        raise DownloadCancelled()
+                    digest.update(chunk)
+                    f.write(chunk)
+                    self._advance(len(chunk))
+        self._verify(digest, tmp)
+        os.replace(tmp, self.dest)
+        return self.dest
+
+    def _verify(self, digest, tmp: str):
+        if self.expected_sha256 and digest.hexdigest() != self.expected_sha256:
+            os.remove(tmp)
+            shutil.rmtree(self.parts_dir, ignore_errors=True)
+            raise ChecksumMismatch(
+                f'Контрольная сумма не совпала: {digest.hexdigest()} вместо {self.expected_sha256}')
+
+    def run(self) -> str:
+        """Скачивает файл в dest и возвращает путь"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.dest)), exist_ok=True)
+        url, size, ranges, etag = self._probe()
+        if not ranges or size < MIN_SEGMENT_SIZE:
+            return self._single_stream(url)
+
+        plan = self._prepare_parts(url, size, etag)
+        resumed = sum(
+            min(os.path.getsize(self._part_path(i)), end - start + 1)
+            for i, (start, end) in enumerate(plan) if os.path.exists(self._part_path(i))
+        )
+        with self._lock:
+            self._total = size
+        self._advance(resumed)
+
+        with ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix='download') as ex:
+            futures = [ex.submit(self._fetch_segment, url, i, start, end) for i, (start, end) in enumerate(plan)]
+            raised = []
+            for fut in futures:
+                try:
+                    fut.result()
+                except Exception as e:
+                    # Остальные сегменты тоже останавливаем — их части останутся для докачки
+                    self._cancelled.set()
+                    raised.append(e)
+            if raised:
+                # Первопричина — настоящая ошибка сегмента, а не отмена остальных из-за неё
+                errors = [e for e in raised if not isinstance(e, DownloadCancelled)]
+                raise errors[0] if errors else raised[0]
+        return self._assemble(plan)
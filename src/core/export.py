@@ -0,0 +1,186 @@
+"""
+Сборка таблицы WB по колонкам: данные SKU, введённые пользователем, профиль,
+шаблоны названия и описания и ссылки на фото объединяются операциями pandas
+над целыми столбцами, без словаря на каждый SKU.
+"""
+from string import Formatter
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+
+from .tracing import traced
+from .xlsx_gen import WB_HEADERS, profile_max_photos
+
+# Поля карточки SKU, которые пользователь может задать вручную или импортом
+ATTRIBUTE_FIELDS = ['name', 'price', 'color', 'volume', 'material', 'gift', 'pattern', 'complect']
+
+# Метка вместо артикула при подстановке в шаблон; после format по ней режем строку
+_SKU_SENTINEL = '\x00sku\x00'
+
+
+def attributes_frame(sku_data: Dict[str, Dict[str, str]]) -> pd.DataFrame:
+    """Таблица атрибутов (индекс — SKU, колонки ATTRIBUTE_FIELDS) из словаря sku -> поля"""
+    frame = pd.DataFrame.from_dict(sku_data or {}, orient='index', dtype=object)
+    return frame.reindex(columns=ATTRIBUTE_FIELDS)
+
+
+def _clean(attributes: Optional[pd.DataFrame], skus: pd.Index, field: str) -> pd.Series:
+    """Столбец пользовательских значений, выровненный по SKU: строки без пробелов по краям, '' если нет"""
+    if attributes is None or field not in attributes.columns:
+        return pd.Series('', index=skus, dtype=object)
+    col = attributes[field].reindex(skus)
+    return col.where(col.notna(), '').astype(str).str.strip()
+
+
+def _or_default(user: pd.Series, default) -> pd.Series:
+    """Значение пользователя, а если оно пустое — значение профиля"""
+    return user.where(user != '', '' if default is None else default)
+
+
+def _sku_fields_are_bare(template: str) -> bool:
+    """
+    True, если артикул подставляется только как {sku}: формат ({sku:>12}),
+    преобразование ({sku!r}) или обращение ({sku[0]}) применились бы к метке
+    """
+    try:
+        for _, name, spec, conversion in Formatter().parse(template):
+            if name is None:
+                continue
+            if '{' in (spec or ''):
+                return False
+            if name != 'sku' and name.startswith('sku'):
+                return False
+            if name == 'sku' and (spec or conversion):
+                return False
+    except ValueError:
+        return False
+    return True
+
+
+def _format_one(template: str, sku: str, volume) -> str:
+    try:
+        return template.format(sku=sku, volume=volume or '')
+    except Exception:
+        return template
+
+
+def _render_template(template, skus: pd.Index, volume) -> pd.Series:
+    """
+    Подставляет {sku} и {volume} в шаблон для всех SKU сразу: шаблон форматируется
+    один раз с меткой вместо артикула, а затем склеивается со столбцом артикулов.
+    Шаблоны с форматом у {sku} форматируются по строкам.
+    """
+    template = str(template)
+    if not _sku_fields_are_bare(template):
+        return pd.Series([_format_one(template, sku, volume) for sku in skus], index=skus, dtype=object)
+    try:
+        rendered = template.format(sku=_SKU_SENTINEL, volume=volume or '')
+    except Exception:
+        return pd.Series(template, index=skus, dtype=object)
+    parts = rendered.split(_SKU_SENTINEL)
+    sku_col = pd.Series(skus, index=skus, dtype=object)
+    result = pd.Series(parts[0], index=skus, dtype=object)
+    for part in parts[1:]:
+        result = result + sku_col + part
+    return result
+
+
+def _photo_column(skus: pd.Index, upload_results: Dict[str, List[str]], sep: str, max_photos: int) -> pd.Series:
+    links = pd.Series(skus, index=skus, dtype=object).map(upload_results or {})
+    return links.map(lambda urls: sep.join(urls[:max_photos]) if isinstance(urls, list) else '')
+
+
+@traced('xlsx.build')
+def build_wb_frame(
+    skus: Iterable[str],
+    upload_results: Dict[str, List[str]],
+    attributes: Optional[pd.DataFrame] = None,
+    profile=None,
+) -> pd.DataFrame:
+    """
+    Таблица для загрузки в WB
+
+    Args:
+        skus: Артикулы в порядке строк (например, grouped.by_sku)
+        upload_results: Словарь sku -> список ссылок
+        attributes: Данные SKU (индекс — SKU, колонки ATTRIBUTE_FIELDS); приоритетнее профиля
+        profile: Профиль с умолчаниями и шаблонами
+
+    Returns:
+        pd.DataFrame: Колонки WB_HEADERS (пустые колонки шаблона повторяются под именем "")
+    """
+    skus = pd.Index(list(skus), dtype=object)
+    n = len(skus)
+    defaults = (profile.get('defaults') or {}) if profile else {}
+    dims = (profile.get('dims') or {}) if profile else {}
+
+    def const(value) -> pd.Series:
+        return pd.Series([value] * n, index=skus, dtype=object)
+
+    def text(value) -> str:
+        return str(value or '')
+
+    user = {field: _clean(attributes, skus, field) for field in ATTRIBUTE_FIELDS}
+
+    title = pd.Series(skus, index=skus, dtype=object)
+    description = const('')
+    if profile:
+        if profile.get('title_template'):
+            title = _render_template(profile.get('title_template'), skus, defaults.get('volume'))
+        if profile.get('description_template'):
+            description = _render_template(profile.get('description_template'), skus, defaults.get('volume'))
+
+    weight_kg = ''
+    if profile and profile.get('calc_weight_kg_from_g') and profile.get('package_weight_g'):
+        weight_kg = str(round(profile.get('package_weight_g') / 1000, 3))
+
+    columns = {
+        'Группа': const(''),
+        'Артикул продавца': pd.Series(skus, index=skus, dtype=object),
+        'Артикул WB': const(''),
+        'Наименование': _or_default(user['name'], title),
+        'Категория продавца': const(profile.get('seller_category') if profile else 'Кружки'),
+        'Бренд': const(profile.get('brand') if profile else ''),
+        'Описание': description,
+        'Фото': _photo_column(skus, upload_results, (profile.get('photo_sep') if profile else None) or ';',
+                              profile_max_photos(profile)),
+        'Вес с упаковкой (кг)': const(weight_kg),
+        'Цвет': _or_default(user['color'], profile.get('color') if profile else ''),
+        'Цена': _or_default(user['price'], text(defaults.get('price'))),
+        'Ставка НДС': const(profile.get('vat') if profile else '20%'),
+        'Вес товара с упаковкой (г)': const(text(profile.get('package_weight_g') if profile else '')),
+        'Высота предмета': const(text(dims.get('item_H_cm'))),
+        'Высота упаковки': const(text(dims.get('H_cm'))),
+        'Длина упаковки': const(text(dims.get('L_cm'))),
+        'Ширина предмета': const(text(dims.get('item_W_cm'))),
+        'Ширина упаковки': const(text(dims.get('W_cm'))),
+        'Комплектация': user['complect'],
+        'Материал посуды': _or_default(user['material'], profile.get('composition') if profile else ''),
+        'Назначение подарка': user['gift'],
+        'Объем (мл)': _or_default(user['volume'], text(defaults.get('volume'))),
+        'Рисунок': user['pattern'],
+    }
+    empty = const('')
+    frame = pd.concat([columns.get(h, empty) if h else empty for h in WB_HEADERS], axis=1, ignore_index=True)
+    frame.columns = WB_HEADERS
+    return frame.reset_index(drop=True)
+
+
+@traced('xlsx.write')
+def write_wb_frame(frame: pd.DataFrame, path: str) -> str:
+    """Сохраняет таблицу WB в XLSX потоково (write-only), без копии листа в памяти"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("WB Upload")
+    ws.append(list(frame.columns))
+    # Пустые ячейки не пишем вовсе: в write-only режиме None пропускается, а '' сериализуется
+    for row in frame.replace('', None).itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def export_wb_xlsx(path: str, grouped, upload_results: Dict[str, List[str]], profile=None,
+                   attributes: Optional[pd.DataFrame] = None) -> str:
+    """Собирает и сохраняет файл WB для всех SKU группировки"""
+    return write_wb_frame(build_wb_frame(grouped.by_sku.keys(), upload_results, attributes, profile), path)
@@ -0,0 +1,215 @@
+"""
+История прогонов загрузки в локальной SQLite базе и анализ трендов
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .paths import get_data_dir
+from .perf import percentile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    root TEXT,
+    profile TEXT,
+    concurrency INTEGER,
+    overwrite_mode TEXT,
+    total_sku INTEGER,
+    success_sku INTEGER,
+    partial_sku INTEGER,
+    failed_sku INTEGER,
+    total_files INTEGER,
+    total_links INTEGER,
+    uploaded_files INTEGER,
+    uploaded_bytes INTEGER,
+    retries INTEGER
+);
+CREATE TABLE IF NOT EXISTS run_files (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    sku TEXT,
+    name TEXT,
+    size INTEGER,
+    action TEXT,
+    upload_s REAL,
+    publish_s REAL,
+    link_s REAL,
+    retries INTEGER,
+    link_strategy TEXT,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_run_files_run ON run_files(run_id);
+"""
+
+TREND_HEADERS = ['Прогон', 'Дата', 'SKU', 'Файлов', 'Длит., с', 'МБ', 'МБ/с',
+                 'Файлов/мин', 'p95 файла, с', 'Ошибки, %', 'Фото/SKU']
+
+
+def default_history_path() -> str:
+    return os.path.join(get_data_dir(), 'history.sqlite3')
+
+
+class RunHistory:
+    """Хранилище итогов прогонов и метрик по файлам"""
+
+    def __init__(self, path: str = None):
+        self.path = path or default_history_path()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_run(self, stats, metrics, started_at: float, finished_at: float,
+                   root: str = '', profile: str = '', concurrency: int = 1,
+                   overwrite_mode: str = '') -> int:
+        """
+        Добавляет прогон в историю
+
+        Args:
+            stats: ReportStats по SKU, которые участвовали в прогоне
+            metrics: Список FileMetrics загрузки
+            started_at, finished_at: Время начала и конца прогона (epoch)
+
+        Returns:
+            int: id записи прогона
+        """
+        metrics = list(metrics or [])
+        with self._connect() as conn:
+            cur = conn.execute(
+                """INSERT INTO runs (started_at, finished_at, root, profile, concurrency, overwrite_mode,
+                                     total_sku, success_sku, partial_sku, failed_sku, total_files, total_links,
+                                     uploaded_files, uploaded_bytes, retries)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    started_at, finished_at, root, profile, concurrency, overwrite_mode,
+                    stats.total_sku, stats.success_sku,
+                    stats.status_counts.get('partial', 0), stats.status_counts.get('error', 0),
+                    stats.total_files, stats.total_links,
+                    sum(1 for m in metrics if m.action == 'upload'),
+                    sum(m.uploaded_bytes for m in metrics),
+                    sum(m.retries for m in metrics),
+                ),
+            )
+            run_id = cur.lastrowid
+            conn.executemany(
+                """INSERT INTO run_files (run_id, sku, name, size, action, upload_s, publish_s, link_s,
+                                          retries, link_strategy, started_at, finished_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (run_id, m.sku, m.name, m.size, m.action, m.upload_s, m.publish_s, m.link_s,
+                     m.retries, m.link_strategy, m.started_at, m.finished_at)
+                    for m in metrics
+                ],
+            )
+        return run_id
+
+    def trend(self, limit: int = 20) -> List[Dict]:
+        """Показатели последних прогонов, от старых к новым"""
+        with self._connect() as conn:
+            runs = conn.execute('SELECT * FROM runs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+            result = []
+            for r in reversed(runs):
+                totals = sorted(
+                    row[0] for row in conn.execute(
+                        'SELECT upload_s + publish_s + link_s FROM run_files WHERE run_id = ?', (r['id'],)
+                    )
+                )
+                duration = max(0.001, r['finished_at'] - r['started_at'])
+                mb = (r['uploaded_bytes'] or 0) / 1048576
+                result.append({
+                    'id': r['id'],
+                    'date': datetime.fromtimestamp(r['started_at']).strftime('%Y-%m-%d %H:%M'),
+                    'total_sku': r['total_sku'],
+                    'total_files': r['total_files'],
+                    'duration_s': round(duration, 1),
+                    'mb': round(mb, 2),
+                    'mb_per_s': round(mb / duration, 3),
+                    'files_per_min': round(len(totals) / duration * 60, 1),
+                    'p95_file_s': round(percentile(totals, 95), 3),
+                    'error_rate': round((r['total_sku'] - r['success_sku']) / max(1, r['total_sku']) * 100, 1),
+                    'avg_photos': round(r['total_files'] / max(1, r['total_sku']), 2),
+                })
+        return result
+
+
+def trend_rows(trend: List[Dict]) -> List[list]:
+    """Строки для таблицы TREND_HEADERS"""
+    return [
+        [t['id'], t['date'], t['total_sku'], t['total_files'], t['duration_s'], t['mb'], t['mb_per_s'],
+         t['files_per_min'], t['p95_file_s'], t['error_rate'], t['avg_photos']]
+        for t in trend
+    ]
+
+
+def detect_degradation(trend: List[Dict], window: int = 5) -> List[str]:
+    """
+    Сравнивает последний прогон с медианой предыдущих и возвращает предупреждения
+    о падении скорости, росте ошибок и росте размера папок.
+    """
+    if len(trend) < 2:
+        return []
+    last = trend[-1]
+    prev = trend[-1 - window:-1]
+    issues: List[str] = []
+
+    mb_s = statistics.median(t['mb_per_s'] for t in prev)
+    if mb_s > 0 and last['mb_per_s'] < mb_s * 0.7:
+        issues.append(f"Скорость упала: {last['mb_per_s']} МБ/с против медианы {mb_s} МБ/с")
+
+    p95 = statistics.median(t['p95_file_s'] for t in prev)
+    if p95 > 0 and last['p95_file_s'] > p95 * 1.5:
+        issues.append(f"Задержка p95 выросла: {last['p95_file_s']} с против медианы {p95} с")
+
+    err = statistics.median(t['error_rate'] for t in prev)
+    if last['error_rate'] > err + 10:
+        issues.append(f"Доля ошибок выросла: {last['error_rate']}% против медианы {err}%")
+
+    photos = statistics.median(t['avg_photos'] for t in prev)
+    if photos > 0 and last['avg_photos'] > photos * 1.3:
+        issues.append(f"Фото на SKU стало больше: {last['avg_photos']} против медианы {photos}")
+
+    return issues
+
+
+def format_trend(trend: List[Dict]) -> str:
+    """Текстовая таблица трендов для консоли"""
+    rows = [TREND_HEADERS] + [[str(v) for v in row] for row in trend_rows(trend)]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(TREND_HEADERS))]
+    lines = ['  '.join(v.ljust(w) for v, w in zip(row, widths)) for row in rows]
+    for issue in detect_degradation(trend):
+        lines.append(f"⚠️ {issue}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='История загрузок WB Auto')
+    parser.add_argument('--db', help='Путь к базе истории')
+    parser.add_argument('--limit', type=int, default=20, help='Сколько последних прогонов показать')
+    args = parser.parse_args(argv)
+
+    trend = RunHistory(args.db).trend(args.limit)
+    if not trend:
+        print('История пуста')
+        return 0
+    print(format_trend(trend))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
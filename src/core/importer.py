@@ -0,0 +1,209 @@
+"""
+Импорт данных SKU из CSV/Excel: сопоставление колонок определяется один раз
+по заголовку, значения нормализуются целыми столбцами, а результат
+сливается с уже введёнными данными по ключу SKU.
+
+Файл читается потоково, кусками по chunksize строк и только нужными колонками;
+строки с SKU, которых нет в текущем сканировании, отбрасываются сразу.
+"""
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+import pandas as pd
+
+from .export import ATTRIBUTE_FIELDS
+
+# Возможные названия колонок (в нижнем регистре); порядок — приоритет,
+# если в строке заполнено несколько синонимов
+SKU_SYNONYMS = ['sku', 'артикул', 'article', 'артикул продавца']
+FIELD_SYNONYMS: Dict[str, List[str]] = {
+    'name': ['name', 'название', 'наименование', 'title'],
+    'price': ['price', 'цена', 'cost'],
+    'color': ['color', 'цвет', 'colour'],
+    'volume': ['volume', 'объем', 'объём', 'мл'],
+    'material': ['material', 'материал', 'состав'],
+    'gift': ['gift', 'подарок', 'назначение', 'для кого'],
+    'pattern': ['pattern', 'рисунок', 'узор'],
+    'complect': ['complect', 'комплектация', 'комплект'],
+}
+
+ProgressCallback = Callable[[int, int], None]
+
+# Строк в одном куске при потоковом чтении
+DEFAULT_CHUNKSIZE = 50000
+
+
+class ImportFormatError(ValueError):
+    """В файле нет нужных колонок"""
+
+
+@dataclass
+class ColumnMapping:
+    sku: str
+    fields: Dict[str, List[str]]  # поле -> колонки файла в порядке приоритета
+
+
+@dataclass
+class ImportResult:
+    attributes: pd.DataFrame  # индекс — SKU, колонки ATTRIBUTE_FIELDS, NaN — поле не задано
+    rows: int                 # сколько строк файла с непустым SKU попало в импорт
+    skipped: int = 0          # строки с SKU, которых нет в сканировании
+
+
+def resolve_columns(columns) -> ColumnMapping:
+    """Сопоставляет колонки файла полям SKU (без учёта регистра)"""
+    lower = {str(col).lower(): col for col in columns}
+    sku_col = next((lower[s] for s in SKU_SYNONYMS if s in lower), None)
+    if sku_col is None:
+        raise ImportFormatError('Не найден столбец SKU/Артикул в файле')
+    fields = {
+        field: [lower[s] for s in synonyms if s in lower]
+        for field, synonyms in FIELD_SYNONYMS.items()
+    }
+    return ColumnMapping(sku=sku_col, fields={f: cols for f, cols in fields.items() if cols})
+
+
+def _used_columns(mapping: ColumnMapping) -> List:
+    used = [mapping.sku]
+    for cols in mapping.fields.values():
+        used.extend(c for c in cols if c not in used)
+    return used
+
+
+def _iter_csv(path: str, chunksize: int, progress: Optional[ProgressCallback]) -> Iterator:
+    mapping = resolve_columns(pd.read_csv(path, encoding='utf-8', nrows=0).columns)
+    total = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        # dtype=str: артикулы не превращаются в числа с «.0», цена разбирается в format_price
+        reader = pd.read_csv(f, encoding='utf-8', usecols=_used_columns(mapping), dtype=str, chunksize=chunksize)
+        for chunk in reader:
+            yield mapping, chunk
+            if progress:
+                progress(f.tell(), total)
+
+
+def _iter_xlsx(path: str, chunksize: int, progress: Optional[ProgressCallback]) -> Iterator:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ImportFormatError('Файл пуст')
+        mapping = resolve_columns(c for c in header if c is not None)
+        positions = {name: i for i, name in enumerate(header) if name is not None}
+        used = _used_columns(mapping)
+        idx = [positions[c] for c in used]
+        total = ws.max_row or 0
+        done = 1
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in idx])
+            if len(batch) >= chunksize:
+                done += len(batch)
+                yield mapping, pd.DataFrame(batch, columns=used, dtype=object)
+                batch = []
+                if progress:
+                    progress(done, total)
+        if batch:
+            yield mapping, pd.DataFrame(batch, columns=used, dtype=object)
+    finally:
+        wb.close()
+
+
+def iter_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                progress: Optional[ProgressCallback] = None) -> Iterator:
+    """Куски файла (mapping, DataFrame) только с колонками, нужными для импорта"""
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        yield from _iter_csv(path, chunksize, progress)
+    elif lower.endswith('.xlsx') or lower.endswith('.xlsm'):
+        yield from _iter_xlsx(path, chunksize, progress)
+    else:
+        # Старый .xls openpyxl не читает — целиком через pandas
+        df = pd.read_excel(path)
+        yield resolve_columns(df.columns), df
+
+
+def _coalesce(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """Первое непустое (не NaN) значение среди колонок-синонимов в каждой строке"""
+    result = df[columns[0]]
+    for col in columns[1:]:
+        result = result.where(result.notna(), df[col])
+    return result
+
+
+def _as_text(col: pd.Series) -> pd.Series:
+    return col.where(col.isna(), col.astype(str).str.strip())
+
+
+def format_price(col: pd.Series) -> pd.Series:
+    """Числа без лишнего «.0» (499.0 -> '499', 499.5 -> '499.5'), остальное — как текст"""
+    num = pd.to_numeric(col, errors='coerce')
+    result = _as_text(col).astype(object)
+    integer = num.notna() & (num % 1 == 0)
+    fractional = num.notna() & ~integer
+    result[integer] = num[integer].astype('int64').astype(str)
+    result[fractional] = num[fractional].astype(str)
+    return result
+
+
+def normalize(df: pd.DataFrame, mapping: ColumnMapping, skus: Optional[Set[str]] = None) -> ImportResult:
+    """
+    Нормализует таблицу поставщика в атрибуты SKU, по одному проходу на колонку.
+    Если задан skus, строки с другими артикулами отбрасываются до нормализации.
+    """
+    sku = df[mapping.sku].astype(str).str.strip()
+    keep = (sku != '') & ~sku.str.lower().isin(['nan', 'none'])
+    skipped = 0
+    if skus is not None:
+        known = sku.isin(skus)
+        skipped = int((keep & ~known).sum())
+        keep &= known
+    df = df[keep]
+    sku = sku[keep]
+
+    out = pd.DataFrame(index=df.index, columns=ATTRIBUTE_FIELDS, dtype=object)
+    for field in ATTRIBUTE_FIELDS:
+        cols = mapping.fields.get(field)
+        if cols:
+            raw = _coalesce(df, cols)
+            out[field] = format_price(raw) if field == 'price' else _as_text(raw)
+    out.index = pd.Index(sku, name='sku')
+    # Повторы SKU: для каждого поля берётся последнее заданное значение
+    attributes = out.groupby(level=0, sort=False).last()
+    return ImportResult(attributes=attributes.reindex(columns=ATTRIBUTE_FIELDS), rows=int(keep.sum()),
+                        skipped=skipped)
+
+
+def import_attributes(path: str, skus: Optional[Iterable[str]] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                      progress: Optional[ProgressCallback] = None) -> ImportResult:
+    """
+    Читает файл кусками и возвращает атрибуты SKU
+
+    Args:
+        path: CSV, XLSX или XLS
+        skus: Артикулы текущего сканирования; None — импортировать все
+        chunksize: Строк в одном куске
+        progress: Обратный вызов (сделано, всего)
+    """
+    skus = set(skus) if skus is not None else None
+    parts: List[pd.DataFrame] = []
+    rows = skipped = 0
+    for mapping, chunk in iter_chunks(path, chunksize, progress):
+        part = normalize(chunk, mapping, skus)
+        rows += part.rows
+        skipped += part.skipped
+        if not part.attributes.empty:
+            parts.append(part.attributes)
+    if not parts:
+        attributes = pd.DataFrame(columns=ATTRIBUTE_FIELDS, dtype=object)
+    elif len(parts) == 1:
+        attributes = parts[0]
+    else:
+        attributes = pd.concat(parts).groupby(level=0, sort=False).last()
+    return ImportResult(attributes=attributes, rows=rows, skipped=skipped)
+
@@ -0,0 +1,151 @@
+"""
+Журнал приложения: стандартный logging с неблокирующей записью.
+
+Потоки только кладут записи в очередь (QueueHandler); форматирование и запись
+в файл и консоль выполняет отдельный поток QueueListener. Файл — JSON по строке
+на запись с ротацией в data_dir/logs. Поля контекста (run_id прогона, sku)
+хранятся в contextvars и попадают в каждую запись своего потока.
+
+Модули пишут через logging.getLogger(__name__) с ленивыми аргументами
+(logger.debug("… %s", x)): отключённый уровень стоит одной проверки.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from .paths import get_data_dir
+
+LOG_FILE = 'wb_auto.log'
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+# Уровень по умолчанию; переопределяется переменной окружения WB_AUTO_LOG_LEVEL
+DEFAULT_LEVEL = 'INFO'
+
+_context: contextvars.ContextVar = contextvars.ContextVar('wb_auto_log_context', default={})
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def current_context() -> dict:
+    return _context.get()
+
+
+@contextmanager
+def log_context(**fields):
+    """Добавляет поля (run_id, sku, …) ко всем записям внутри блока в этом потоке"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class _ContextFilter(logging.Filter):
+    """Снимок контекста в потоке-источнике, до передачи записи в очередь"""
+
+    def filter(self, record):
+        record.context = _context.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        data.update(getattr(record, 'context', None) or {})
+        # После очереди трассировка уже лежит текстом в exc_text (см. _PreformattedQueueHandler)
+        if record.exc_text or record.exc_info:
+            data['exc'] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        ctx = getattr(record, 'context', None)
+        if ctx:
+            text += ' [' + ' '.join(f'{k}={v}' for k, v in ctx.items()) + ']'
+        return text
+
+
+class _PreformattedQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Стандартный prepare форматирует сообщение в вызывающем потоке;
+        # здесь только фиксируем текст и исключение, остальное — в потоке слушателя
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: Optional[str] = None, log_dir: Optional[str] = None,
+                  console_level: Optional[str] = None) -> str:
+    """
+    Настраивает журнал один раз на процесс
+
+    Args:
+        level: Уровень записей (DEBUG/INFO/WARNING…); по умолчанию WB_AUTO_LOG_LEVEL или INFO
+        log_dir: Папка файлов журнала (по умолчанию data_dir/logs)
+        console_level: Уровень вывода в stderr; None — WARNING. В exe без консоли вывода нет
+
+    Returns:
+        str: Путь к файлу журнала
+    """
+    global _listener
+    log_dir = log_dir or get_data_dir('logs')
+    path = os.path.join(log_dir, LOG_FILE)
+    if _listener is not None:
+        return path
+
+    level = (level or os.environ.get('WB_AUTO_LOG_LEVEL') or DEFAULT_LEVEL).upper()
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                                        encoding='utf-8', delay=True)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if sys.stderr is not None:
+        console = logging.StreamHandler(sys.stderr)
+        console.setLevel((console_level or 'WARNING').upper())
+        console.setFormatter(_ConsoleFormatter('%(levelname)s %(name)s: %(message)s'))
+        handlers.append(console)
+
+    q = queue.SimpleQueue()
+    queue_handler = _PreformattedQueueHandler(q)
+    queue_handler.addFilter(_ContextFilter())
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    # Подробности HTTP-библиотек нужны редко и забивают журнал при DEBUG
+    for noisy in ('urllib3', 'PIL'):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return path
+
+
+def shutdown_logging():
+    """Дописывает очередь и останавливает поток журнала"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,273 @@
+"""
+Живые метрики прогона: счётчики, показатели и гистограммы в памяти процесса.
+
+Модули обновляют метрики напрямую (FILES.inc(action='upload')), а по желанию
+поднимается HTTP-сервер на localhost, отдающий их в текстовом формате
+Prometheus — многочасовой прогон видно на имеющихся дашбордах.
+
+Включение сервера: переменная окружения WB_AUTO_METRICS_PORT или ключ
+--metrics-port в cli.py. Без сервера обновление метрик — словарь под замком.
+"""
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_HOST = '127.0.0.1'
+# Границы по умолчанию, секунды: от быстрых запросов API до загрузки больших файлов
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name}: ожидаются метки {self.labelnames}, получены {tuple(labels)}')
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        return lines + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Монотонно растущее значение (файлы, байты, запросы)"""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError('Счётчик не может уменьшаться')
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}' for k, v in items]
+
+
+class Gauge(Counter):
+    """Значение, которое растёт и уменьшается (задачи в работе)"""
+    kind = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+_LE_INF = 'le="+Inf"'
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам (длительности запросов и файлов)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # метки → (счётчики по корзинам, сумма, количество)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, _LE_INF)} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса; render() — текст для Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f'Метрика {metric.name} уже объявлена с другим типом или метками')
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Метрики загрузки; имена и метки — часть интерфейса для дашбордов
+FILES = REGISTRY.counter('wb_auto_files_total', 'Обработанные файлы по действию', ['action'])
+UPLOADED_BYTES = REGISTRY.counter('wb_auto_uploaded_bytes_total', 'Загруженные байты')
+FILE_SECONDS = REGISTRY.histogram('wb_auto_file_seconds', 'Время обработки файла, с', ['action'])
+SKUS = REGISTRY.counter('wb_auto_skus_total', 'Завершённые SKU по итогу', ['result'])
+API_REQUESTS = REGISTRY.counter('wb_auto_api_requests_total', 'HTTP-запросы к Яндекс.Диску',
+                                ['method', 'endpoint', 'status'])
+API_SECONDS = REGISTRY.histogram('wb_auto_api_request_seconds', 'Длительность HTTP-запросов, с', ['endpoint'])
+THROTTLED = REGISTRY.counter('wb_auto_throttled_total', 'Ответы 429 Too Many Requests', ['endpoint'])
+RETRIES = REGISTRY.counter('wb_auto_retries_total', 'Повторные попытки по фазам', ['phase'])
+IN_FLIGHT = REGISTRY.gauge('wb_auto_tasks_in_flight', 'SKU, которые сейчас загружаются')
+RUNS_ACTIVE = REGISTRY.gauge('wb_auto_runs_active', 'Идущие прогоны загрузки')
+
+
+def api_endpoint(path: str) -> str:
+    """
+    Короткое имя конечной точки по пути запроса, без идентификаторов:
+    /v1/disk/resources/upload → resources/upload, /v1/disk/operations/<id> → operations.
+    Запросы вне /v1/disk (передача файла по выданной ссылке) — transfer.
+    """
+    path = path.split('?', 1)[0]
+    if not path.startswith('/v1/disk'):
+        return 'transfer'
+    rest = path[len('/v1/disk'):].strip('/')
+    if rest.startswith('operations'):
+        return 'operations'
+    return rest or 'disk'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics %s", format % args)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_http_server(port: int, host: str = DEFAULT_HOST) -> str:
+    """
+    Поднимает /metrics в фоновом потоке; повторный вызов возвращает адрес уже
+    запущенного сервера. По умолчанию слушает только localhost.
+
+    Returns:
+        str: Адрес страницы метрик
+    """
+    global _server
+    if _server is None:
+        server = ThreadingHTTPServer((host, int(port)), _Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        _server = server
+        logger.info("Метрики доступны на http://%s:%d/metrics", *server.server_address[:2])
+    host, port = _server.server_address[:2]
+    return f'http://{host}:{port}/metrics'
+
+
+def stop_http_server():
+    global _server
+    server, _server = _server, None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+def enable_from_env() -> Optional[str]:
+    value = os.environ.get('WB_AUTO_METRICS_PORT', '').strip()
+    if not value or value == '0':
+        return None
+    try:
+        return start_http_server(int(value))
+    except (OSError, ValueError) as e:
+        logger.warning("Не удалось запустить сервер метрик на порту %s: %s", value, e)
+        return None
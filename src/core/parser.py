@@ -3,6 +3,8 @@ import re
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
+from .tracing import span
+
 DEFAULT_PATTERN = r"^(?P<sku>.+)\.(?P<n>\d+)\.(?P<ext>jpe?g|png)$"
 
 @dataclass
@@ -25,19 +27,22 @@ def group_photos_flat(folder: str, pattern: str = DEFAULT_PATTERN) -> GroupResul
     warnings: List[str] = []
     errors: List[str] = []
 
-    for entry in os.listdir(folder):
-        full = os.path.join(folder, entry)
-        if not os.path.isfile(full):
-            continue
-        m = rx.match(entry)
-        if not m:
-            warnings.append(f"Skip not matching file: {entry}")
-            continue
-        sku = m.group('sku')
-        n = int(m.group('n'))
-        ext = m.group('ext').lower()
-        pf = PhotoFile(path=full, sku=sku, n=n, ext=ext)
-        by_sku.setdefault(sku, []).append(pf)
+    with span('scan', folder=folder) as s:
+        entries = os.listdir(folder)
+        for entry in entries:
+            full = os.path.join(folder, entry)
+            if not os.path.isfile(full):
+                continue
+            m = rx.match(entry)
+            if not m:
+                warnings.append(f"Skip not matching file: {entry}")
+                continue
+            sku = m.group('sku')
+            n = int(m.group('n'))
+            ext = m.group('ext').lower()
+            pf = PhotoFile(path=full, sku=sku, n=n, ext=ext)
+            by_sku.setdefault(sku, []).append(pf)
+        s.set(entries=len(entries), skus=len(by_sku))
 
     # sort and detect duplicates/missing numbers
     for sku, files in by_sku.items():
@@ -0,0 +1,19 @@
+import os
+import sys
+
+
+def get_data_dir(*parts) -> str:
+    """
+    Каталог пользовательских данных приложения (история, кэши, логи).
+    В exe рядом с _MEIPASS писать нельзя, поэтому используем профиль пользователя.
+    Переопределяется переменной окружения WB_AUTO_DATA_DIR.
+    """
+    base = os.environ.get('WB_AUTO_DATA_DIR')
+    if not base:
+        if sys.platform == 'win32':
+            base = os.path.join(os.environ.get('APPDATA') or os.path.expanduser('~'), 'WBAuto')
+        else:
+            base = os.path.join(os.path.expanduser('~'), '.wb_auto')
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
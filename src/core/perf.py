@@ -0,0 +1,106 @@
+"""
+Метрики производительности загрузки по отдельным файлам
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# (атрибут FileMetrics, подпись в отчёте)
+PHASES = [
+    ('upload_s', 'Загрузка'),
+    ('publish_s', 'Публикация'),
+    ('link_s', 'Получение ссылки'),
+    ('total_s', 'Итого на файл'),
+]
+
+
+@dataclass
+class FileMetrics:
+    """Тайминги и параметры загрузки одного файла"""
+    sku: str
+    name: str
+    size: int = 0
+    action: str = 'upload'  # 'upload' | 'reuse'
+    upload_s: float = 0.0
+    publish_s: float = 0.0
+    link_s: float = 0.0
+    link_strategy: str = ''
+    attempts: Dict[str, int] = field(default_factory=dict)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def total_s(self) -> float:
+        return self.upload_s + self.publish_s + self.link_s
+
+    @property
+    def retries(self) -> int:
+        return sum(max(0, n - 1) for n in self.attempts.values())
+
+    @property
+    def uploaded_bytes(self) -> int:
+        return self.size if self.action == 'upload' else 0
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Перцентиль с линейной интерполяцией; values должны быть отсортированы"""
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * pct / 100.0
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    if lo == hi:
+        return values[lo]
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def phase_percentiles(metrics: Iterable[FileMetrics], pcts=(50, 90, 95, 99)) -> List[list]:
+    """Строки [фаза, p50, ..., max, среднее] в секундах"""
+    metrics = list(metrics)
+    rows = []
+    for attr, label in PHASES:
+        values = sorted(getattr(m, attr) for m in metrics)
+        avg = sum(values) / len(values) if values else 0.0
+        rows.append([label] + [round(percentile(values, p), 3) for p in pcts]
+                    + [round(values[-1] if values else 0.0, 3), round(avg, 3)])
+    return rows
+
+
+def throughput_timeline(metrics: Iterable[FileMetrics], buckets: int = 60) -> List[Tuple[float, float, float, int]]:
+    """
+    Разбивает прогон на интервалы по времени завершения файлов.
+
+    Returns:
+        Список (секунда от начала, МБ, МБ/с, файлов) по интервалам
+    """
+    metrics = [m for m in metrics if m.finished_at]
+    if not metrics:
+        return []
+    start = min(m.started_at for m in metrics)
+    duration = max(m.finished_at for m in metrics) - start
+    width = max(1.0, math.ceil(duration / buckets))
+    mb: Dict[int, float] = {}
+    files: Dict[int, int] = {}
+    for m in metrics:
+        idx = int((m.finished_at - start) // width)
+        mb[idx] = mb.get(idx, 0.0) + m.uploaded_bytes / 1048576
+        files[idx] = files.get(idx, 0) + 1
+    last = max(files)
+    return [
+        (i * width, round(mb.get(i, 0.0), 3), round(mb.get(i, 0.0) / width, 3), files.get(i, 0))
+        for i in range(last + 1)
+    ]
+
+
+def slowest_skus(metrics: Iterable[FileMetrics], top: int = 10) -> List[list]:
+    """Строки [SKU, файлов, МБ, сумма сек, максимум на файл, повторов] по убыванию времени"""
+    per_sku: Dict[str, list] = {}
+    for m in metrics:
+        agg = per_sku.setdefault(m.sku, [m.sku, 0, 0.0, 0.0, 0.0, 0])
+        agg[1] += 1
+        agg[2] += m.size / 1048576
+        agg[3] += m.total_s
+        agg[4] = max(agg[4], m.total_s)
+        agg[5] += m.retries
+    rows = sorted(per_sku.values(), key=lambda r: r[3], reverse=True)[:top]
+    return [[r[0], r[1], round(r[2], 2), round(r[3], 3), round(r[4], 3), r[5]] for r in rows]
@@ -0,0 +1,166 @@
+"""
+Прогон загрузки без интерфейса: общий код для окна (Worker) и командной строки.
+PyQt5 здесь не импортируется.
+"""
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from . import metrics
+from .diagnostics import profile_thread
+from .log import log_context, new_run_id
+from .parser import GroupResult
+from .progress import ProgressBuffer
+from .run_control import RunControl, UploadCancelled
+from .throttle import UploadLimiter
+from .tracing import span
+from . import yadisk_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UploadOutcome:
+    """Итог прогона: ссылки по SKU, метрики файлов и какие SKU успели начаться"""
+    results: Dict[str, List[str]] = field(default_factory=dict)
+    metrics: List = field(default_factory=list)
+    attempted: List[str] = field(default_factory=list)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    cancelled: bool = False
+    run_id: str = ''  # идентификатор прогона в журнале
+
+    def attempted_group(self, grouped: GroupResult) -> GroupResult:
+        """Группировка только по SKU, которые участвовали в прогоне (для отчёта и истории)"""
+        return GroupResult(
+            by_sku={sku: grouped.by_sku[sku] for sku in self.attempted if sku in grouped.by_sku},
+            warnings=[], errors=[],
+        )
+
+
+def run_uploads(
+    grouped: GroupResult,
+    token: str,
+    root: str,
+    overwrite_mode: str = 'never',
+    max_photos: int = 6,
+    concurrency: int = 1,
+    limit: int = 0,
+    keyring=None,
+    events: Optional[ProgressBuffer] = None,
+    control: Optional[RunControl] = None,
+    outcome: Optional[UploadOutcome] = None,
+    limiter: Optional[UploadLimiter] = None,
+) -> UploadOutcome:
+    """
+    Загружает фото всех SKU группировки в Яндекс.Диск
+
+    Args:
+        grouped: Результат group_photos_flat
+        keyring: Модуль keyring для сохранения токена (None — не сохранять)
+        events: Буфер прогресса и сообщений
+        control: Пауза и отмена прогона
+        outcome: Куда складывать результаты (окну нужен доступ к ним во время прогона)
+        limiter: Общий лимит скорости загрузки для всех потоков (None — без ограничения)
+
+    Returns:
+        UploadOutcome: Ссылки по SKU, в том числе частичные при отмене
+    """
+    events = events if events is not None else ProgressBuffer()
+    control = control if control is not None else RunControl()
+    out = outcome if outcome is not None else UploadOutcome()
+    max_photos = int(max_photos or 6)
+    concurrency = max(1, int(concurrency or 1))
+    out.started_at = time.time()
+
+    def upload_one(sku, files):
+        files_to_upload = [f.path for f in files][:max_photos]
+        cancelled = False
+        metrics.IN_FLIGHT.inc()
+        try:
+            with log_context(sku=sku), profile_thread(), span('sku', files=len(files_to_upload)) as s:
+                try:
+                    urls = yadisk_client.upload_sku_photos(keyring, token, root, sku, files_to_upload,
+                                                           overwrite_mode, control=control, limiter=limiter)
+                except UploadCancelled as e:
+                    # Уже загруженные файлы SKU попадают в результаты как частичные
+                    urls, cancelled = e.uploaded, True
+                    s.set(cancelled=True)
+        except Exception:
+            metrics.SKUS.inc(result='failed')
+            events.sku_done()
+            raise
+        finally:
+            metrics.IN_FLIGHT.dec()
+        metrics.SKUS.inc(result='cancelled' if cancelled else 'done')
+        file_metrics = [u.metrics for u in urls if u.metrics]
+        out.metrics.extend(file_metrics)
+        events.sku_done(files=len(urls), nbytes=sum(m.uploaded_bytes for m in file_metrics))
+        if not (cancelled and not urls):
+            out.results[sku] = [u.direct_url for u in urls][:max_photos]
+
+    items = list(grouped.by_sku.items())
+    if limit and limit > 0:
+        items = items[:limit]
+    out.run_id = new_run_id()
+    with log_context(run_id=out.run_id):
+        logger.info("Прогон начат: %d SKU, папка %s, параллельно %d, перезапись %s, скорость %s",
+                    len(items), root, concurrency, overwrite_mode,
+                    limiter.describe() if limiter else 'без ограничения')
+        metrics.RUNS_ACTIVE.inc()
+        try:
+            with span('run', skus=len(items), concurrency=concurrency, overwrite=overwrite_mode):
+                _run(items, upload_one, concurrency, events, control, out)
+        finally:
+            metrics.RUNS_ACTIVE.dec()
+        logger.info("Прогон завершён: %d из %d SKU за %.1f с%s", len(out.results), len(items),
+                    time.time() - out.started_at, " (остановлен)" if out.cancelled else "")
+    out.finished_at = time.time()
+    return out
+
+
+def _run(items, upload_one, concurrency: int, events: ProgressBuffer, control: RunControl, out: UploadOutcome):
+    events.start(len(items))
+    if concurrency <= 1:
+        for sku, files in items:
+            if not control.wait_if_paused():
+                break
+            out.attempted.append(sku)
+            try:
+                upload_one(sku, files)
+            except Exception as e:
+                events.message(f"Ошибка для {sku}: {e}", error=True)
+    else:
+        # В пуле не больше двух задач на поток: пауза и отмена
+        # не ждут, пока разберётся очередь из всех SKU
+        pending = {}
+        queue = iter(items)
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            while True:
+                while len(pending) < concurrency * 2:
+                    # На паузе дожидаемся текущих задач и только потом встаём
+                    if control.paused and pending:
+                        break
+                    if not control.wait_if_paused():
+                        break
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    out.attempted.append(item[0])
+                    # Каждой задаче — копия контекста журнала (run_id) этого потока
+                    pending[ex.submit(contextvars.copy_context().run, upload_one, *item)] = item[0]
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    sku_key = pending.pop(fut)
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        events.message(f"Ошибка для {sku_key}: {e}", error=True)
+    out.cancelled = control.cancelled
+    if out.cancelled:
+        events.message(f"Загрузка остановлена: обработано {len(out.attempted)} из {len(items)} SKU")
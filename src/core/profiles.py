@@ -1,8 +1,12 @@
 import json
+import logging
 import os
 import sys
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
 
 def get_resource_path(relative_path):
     """Получает путь к ресурсу, работает как в разработке, так и в exe"""
@@ -33,45 +37,117 @@ def load_profile(path: str) -> Profile:
     return Profile(data=data)
 
 
-def list_profiles(folder: str = None, category: str = None) -> Dict[str, str]:
-    """Загружает список профилей. Автоматически определяет папку профилей."""
-    result: Dict[str, str] = {}
-    
+class ProfileRegistry:
+    """
+    Кэш профилей папки: каждый файл разбирается один раз, повторно
+    перечитываются только файлы с изменившимся mtime.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Profile]] = {}  # path -> (mtime, профиль)
+        self._failed: Dict[str, float] = {}  # path -> mtime файла, который не удалось разобрать
+        self._by_category: Dict[str, Dict[str, str]] = {}  # категория -> {имя: путь}
+        self._by_name: Dict[str, str] = {}
+
+    def refresh(self) -> bool:
+        """Синхронизирует кэш с папкой. Возвращает True, если что-то изменилось"""
+        with self._lock:
+            if not os.path.isdir(self.folder):
+                changed = bool(self._entries)
+                self._entries.clear()
+                self._failed.clear()
+                self._reindex()
+                return changed
+
+            changed = False
+            seen = set()
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith('.json') or not entry.is_file():
+                        continue
+                    path = entry.path
+                    seen.add(path)
+                    mtime = entry.stat().st_mtime
+                    cached = self._entries.get(path)
+                    if cached and cached[0] == mtime:
+                        continue
+                    if self._failed.get(path) == mtime:
+                        continue
+                    try:
+                        self._entries[path] = (mtime, load_profile(path))
+                        self._failed.pop(path, None)
+                    except Exception as e:
+                        logger.error("Ошибка загрузки профиля %s: %s", entry.name, e)
+                        self._entries.pop(path, None)
+                        self._failed[path] = mtime
+                    changed = True
+
+            for path in [p for p in self._entries if p not in seen]:
+                del self._entries[path]
+                changed = True
+            for path in [p for p in self._failed if p not in seen]:
+                del self._failed[path]
+
+            if changed:
+                self._reindex()
+            return changed
+
+    def _reindex(self):
+        by_category: Dict[str, Dict[str, str]] = {}
+        by_name: Dict[str, str] = {}
+        for path in sorted(self._entries):
+            prof = self._entries[path][1]
+            category = prof.get('category', 'kruzhki')  # По умолчанию кружки
+            by_category.setdefault(category, {})[prof.name] = path
+            by_name[prof.name] = path
+        self._by_category = by_category
+        self._by_name = by_name
+
+    def list(self, category: str = None) -> Dict[str, str]:
+        """Профили (имя -> путь), при необходимости только указанной категории"""
+        self.refresh()
+        if category:
+            return dict(self._by_category.get(category, {}))
+        return dict(self._by_name)
+
+    def get(self, path: str) -> Profile:
+        """Профиль по пути к файлу; перечитывается только при изменении файла"""
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        prof = load_profile(path)
+        with self._lock:
+            self._entries[path] = (mtime, prof)
+            self._reindex()
+        return prof
+
+
+_registries: Dict[str, ProfileRegistry] = {}
+
+
+def get_registry(folder: str = None) -> ProfileRegistry:
+    """Общий реестр профилей для папки (по умолчанию — папка profiles приложения)"""
     if folder is None:
-        # Автоматически определяем папку профилей
         folder = get_resource_path("profiles")
-    
-    print(f"🔍 Ищем профили в: {folder}")
-    if category:
-        print(f"📂 Фильтр по категории: {category}")
-    
-    if not os.path.isdir(folder):
-        print(f"❌ Папка профилей не найдена: {folder}")
-        return result
-    
-    files = os.listdir(folder)
-    print(f"📁 Найдено файлов в папке: {len(files)}")
-    
-    for fn in files:
-        if not fn.lower().endswith('.json'):
-            continue
-        full = os.path.join(folder, fn)
-        print(f"📄 Обрабатываем файл: {fn}")
-        try:
-            prof = load_profile(full)
-            
-            # Фильтрация по категории
-            if category:
-                prof_category = prof.get('category', 'kruzhki')  # По умолчанию кружки
-                if prof_category != category:
-                    print(f"⏭️ Профиль {prof.name} пропущен (категория: {prof_category})")
-                    continue
-            
-            result[prof.name] = full
-            print(f"✅ Загружен профиль: {prof.name}")
-        except Exception as e:
-            print(f"❌ Ошибка загрузки {fn}: {e}")
-            continue
-    
-    print(f"📋 Итого загружено профилей: {len(result)}")
-    return result
+    folder = os.path.abspath(folder)
+    reg = _registries.get(folder)
+    if reg is None:
+        reg = _registries.setdefault(folder, ProfileRegistry(folder))
+    return reg
+
+
+def get_profile(path: str) -> Profile:
+    """Загружает профиль через кэш реестра его папки"""
+    return get_registry(os.path.dirname(path)).get(os.path.abspath(path))
+
+
+def list_profiles(folder: str = None, category: str = None) -> Dict[str, str]:
+    """Загружает список профилей. Автоматически определяет папку профилей."""
+    registry = get_registry(folder)
+    if not os.path.isdir(registry.folder):
+        logger.warning("Папка профилей не найдена: %s", registry.folder)
+    return registry.list(category)
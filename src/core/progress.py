@@ -0,0 +1,96 @@
+"""
+Буфер событий загрузки: потоки загрузки только пишут в него,
+а интерфейс (или CLI) забирает накопленное пачкой по таймеру.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class ProgressSnapshot:
+    """Состояние прогона на момент опроса плюс новые сообщения"""
+    total: int
+    done: int
+    errors: int
+    files: int
+    bytes: int
+    elapsed: float
+    messages: List[str] = field(default_factory=list)
+    dropped: int = 0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / 1048576 / max(self.elapsed, 0.001)
+
+    @property
+    def sku_per_min(self) -> float:
+        return self.done / max(self.elapsed, 0.001) * 60
+
+    @property
+    def eta_s(self) -> float:
+        if not self.done or self.done >= self.total:
+            return 0.0
+        return self.elapsed / self.done * (self.total - self.done)
+
+    @property
+    def percent(self) -> int:
+        return int(self.done * 100 / max(1, self.total))
+
+
+class ProgressBuffer:
+    """Потокобезопасный кольцевой буфер сообщений и счётчики прогресса"""
+
+    def __init__(self, max_messages: int = 1000):
+        self._lock = threading.Lock()
+        self._messages = deque(maxlen=max_messages)
+        self._dropped = 0
+        self._total = 0
+        self._done = 0
+        self._errors = 0
+        self._files = 0
+        self._bytes = 0
+        self._started = time.monotonic()
+
+    def start(self, total: int):
+        with self._lock:
+            self._total = total
+            self._started = time.monotonic()
+
+    def message(self, text: str, error: bool = False):
+        with self._lock:
+            if len(self._messages) == self._messages.maxlen:
+                self._dropped += 1
+            self._messages.append(text)
+            if error:
+                self._errors += 1
+
+    def sku_done(self, files: int = 0, nbytes: int = 0):
+        with self._lock:
+            self._done += 1
+            self._files += files
+            self._bytes += nbytes
+
+    def drain(self) -> ProgressSnapshot:
+        """Снимок счётчиков и все сообщения с прошлого опроса"""
+        with self._lock:
+            messages = list(self._messages)
+            self._messages.clear()
+            dropped, self._dropped = self._dropped, 0
+            return ProgressSnapshot(
+                total=self._total, done=self._done, errors=self._errors,
+                files=self._files, bytes=self._bytes,
+                elapsed=time.monotonic() - self._started,
+                messages=messages, dropped=dropped,
+            )
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600} ч {seconds % 3600 // 60:02d} мин"
+    if seconds >= 60:
+        return f"{seconds // 60} мин {seconds % 60:02d} с"
+    return f"{seconds} с"
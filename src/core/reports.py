@@ -3,87 +3,219 @@
 """
 import os
 import csv
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List
 from openpyxl import Workbook
 
+from .perf import phase_percentiles, slowest_skus, throughput_timeline
+from .tracing import traced
 
-def generate_upload_report(grouped, upload_results: Dict[str, List[str]], warnings: List[str] = None, export_path: str = None):
+
+SUMMARY_HEADERS = [
+    'SKU', 'Найдено файлов', 'Загружено ссылок', 'Статус',
+    'Локальные файлы', 'Публичные ссылки'
+]
+CSV_HEADERS = ['SKU', 'Файлов', 'Ссылок', 'Статус', 'Ссылки']
+
+STATUS_LABELS = {
+    'ok': "✅ Успешно",
+    'partial': "⚠️ Частично",
+    'error': "❌ Ошибка",
+}
+
+
+@dataclass
+class SkuReportRow:
+    """Строка отчёта по одному SKU"""
+    sku: str
+    files: List[str]
+    links: List[str]
+
+    @property
+    def status(self) -> str:
+        if len(self.links) < len(self.files):
+            return 'partial'
+        return 'ok' if self.links else 'error'
+
+    def summary_values(self) -> list:
+        return [
+            self.sku,
+            len(self.files),
+            len(self.links),
+            STATUS_LABELS[self.status],
+            '; '.join(os.path.basename(p) for p in self.files),
+            '; '.join(self.links),
+        ]
+
+    def csv_values(self) -> list:
+        return [
+            self.sku,
+            len(self.files),
+            len(self.links),
+            "OK" if self.links else "ERROR",
+            '; '.join(self.links),
+        ]
+
+
+@dataclass
+class ReportStats:
+    """Агрегированная статистика, накапливаемая за один проход по SKU"""
+    total_sku: int = 0
+    total_files: int = 0
+    total_links: int = 0
+    success_sku: int = 0
+    status_counts: Dict[str, int] = field(default_factory=lambda: {k: 0 for k in STATUS_LABELS})
+
+    def add(self, row: SkuReportRow):
+        self.total_sku += 1
+        self.total_files += len(row.files)
+        self.total_links += len(row.links)
+        if row.links:
+            self.success_sku += 1
+        self.status_counts[row.status] += 1
+
+    @property
+    def success_rate(self) -> float:
+        return self.success_sku / max(1, self.total_sku) * 100
+
+    @property
+    def avg_photos(self) -> float:
+        return self.total_files / max(1, self.total_sku)
+
+    def rows(self) -> List[list]:
+        return [
+            ['Параметр', 'Значение'],
+            ['Время генерации', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+            ['Всего SKU', self.total_sku],
+            ['Всего файлов', self.total_files],
+            ['Успешно загружено ссылок', self.total_links],
+            ['Успешных SKU', self.success_sku],
+            ['Процент успеха', f'{self.success_rate:.1f}%'],
+            ['Среднее фото на SKU', f'{self.avg_photos:.1f}'],
+        ]
+
+
+def iter_report_rows(grouped, upload_results: Dict[str, List[str]]) -> Iterable[SkuReportRow]:
+    """Отдаёт строки отчёта по SKU без промежуточных списков"""
+    for sku, files in (grouped.by_sku.items() if grouped else ()):
+        yield SkuReportRow(sku=sku, files=[f.path for f in files], links=upload_results.get(sku, []))
+
+
+def collect_report(grouped, upload_results: Dict[str, List[str]],
+                   sinks: Iterable[Callable[[SkuReportRow], None]] = ()) -> ReportStats:
+    """
+    Единственный проход по SKU: каждая строка передаётся во все приёмники
+    (листы XLSX, CSV), а статистика считается попутно.
+    """
+    sinks = list(sinks)
+    stats = ReportStats()
+    for row in iter_report_rows(grouped, upload_results):
+        stats.add(row)
+        for sink in sinks:
+            sink(row)
+    return stats
+
+
+def _default_path(ext: str) -> str:
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return f'wb_upload_report_{timestamp}.{ext}'
+
+
+def _write_performance_sheet(wb: Workbook, metrics):
+    """Лист с перцентилями фаз, графиком МБ/с и самыми медленными SKU"""
+    ws = wb.create_sheet("Производительность")
+    total_mb = sum(m.uploaded_bytes for m in metrics) / 1048576
+    duration = max(m.finished_at for m in metrics) - min(m.started_at for m in metrics)
+    strategies: Dict[str, int] = {}
+    for m in metrics:
+        key = m.link_strategy or '—'
+        strategies[key] = strategies.get(key, 0) + 1
+
+    ws.append(['Параметр', 'Значение'])
+    ws.append(['Файлов', len(metrics)])
+    ws.append(['Загружено новых файлов', sum(1 for m in metrics if m.action == 'upload')])
+    ws.append(['Загружено МБ', round(total_mb, 2)])
+    ws.append(['Длительность, с', round(duration, 1)])
+    ws.append(['Средняя скорость, МБ/с', round(total_mb / max(duration, 0.001), 3)])
+    ws.append(['Повторных попыток', sum(m.retries for m in metrics)])
+    for name, count in sorted(strategies.items()):
+        ws.append([f'Способ получения ссылки: {name}', count])
+
+    ws.append([])
+    ws.append(['Фаза (сек)', 'p50', 'p90', 'p95', 'p99', 'max', 'Среднее'])
+    for row in phase_percentiles(metrics):
+        ws.append(row)
+
+    ws.append([])
+    ws.append(['Секунда от начала', 'МБ', 'МБ/с', 'Файлов'])
+    for row in throughput_timeline(metrics):
+        ws.append(list(row))
+
+    ws.append([])
+    ws.append(['Самые медленные SKU', 'Файлов', 'МБ', 'Время, с', 'Макс. на файл, с', 'Повторов'])
+    for row in slowest_skus(metrics):
+        ws.append(row)
+
+
+@traced('report')
+def generate_upload_report(grouped, upload_results: Dict[str, List[str]], warnings: List[str] = None,
+                           export_path: str = None, csv_path: str = None, metrics=None):
     """
     Генерирует подробный отчет о процессе загрузки
-    
+
     Args:
         grouped: Результат парсинга фото (объект с by_sku)
         upload_results: Словарь sku -> список ссылок
         warnings: Список предупреждений
         export_path: Путь для сохранения отчета
-    
+        csv_path: Если указан, CSV-отчёт пишется в том же проходе
+        metrics: Список FileMetrics загрузки для листа «Производительность»
+
     Returns:
         str: Путь к созданному отчету
     """
     if not export_path:
-        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        export_path = f'wb_upload_report_{timestamp}.xlsx'
-    
-    wb = Workbook()
-    
+        export_path = _default_path('xlsx')
+
+    # write_only: строки сразу уходят во временные файлы листов, а не в память
+    wb = Workbook(write_only=True)
+
     # Лист 1: Сводка по SKU
-    ws_summary = wb.active
-    ws_summary.title = "Сводка по SKU"
-    
-    headers = [
-        'SKU', 'Найдено файлов', 'Загружено ссылок', 'Статус', 
-        'Локальные файлы', 'Публичные ссылки'
-    ]
-    ws_summary.append(headers)
-    
-    for sku, files in (grouped.by_sku.items() if grouped else {}):
-        local_files = [os.path.basename(f.path) for f in files]
-        uploaded_links = upload_results.get(sku, [])
-        
-        status = "✅ Успешно" if uploaded_links else "❌ Ошибка"
-        if len(uploaded_links) < len(files):
-            status = "⚠️ Частично"
-            
-        row = [
-            sku,
-            len(files),
-            len(uploaded_links),
-            status,
-            '; '.join(local_files),
-            '; '.join(uploaded_links)
-        ]
-        ws_summary.append(row)
-    
+    ws_summary = wb.create_sheet("Сводка по SKU")
+    ws_summary.append(SUMMARY_HEADERS)
+    sinks = [lambda row: ws_summary.append(row.summary_values())]
+
+    csv_file = None
+    try:
+        if csv_path:
+            csv_file = open(csv_path, 'w', newline='', encoding='utf-8')
+            writer = csv.writer(csv_file)
+            writer.writerow(CSV_HEADERS)
+            sinks.append(lambda row: writer.writerow(row.csv_values()))
+
+        stats = collect_report(grouped, upload_results, sinks)
+    finally:
+        if csv_file:
+            csv_file.close()
+
     # Лист 2: Предупреждения
     if warnings:
         ws_warnings = wb.create_sheet("Предупреждения")
         ws_warnings.append(['Тип', 'Сообщение'])
-        
+
         for warning in warnings:
             ws_warnings.append(['Предупреждение', warning])
-    
+
     # Лист 3: Статистика
     ws_stats = wb.create_sheet("Статистика")
-    total_sku = len(grouped.by_sku) if grouped else 0
-    total_files = sum(len(files) for files in (grouped.by_sku.values() if grouped else []))
-    total_links = sum(len(links) for links in upload_results.values())
-    success_sku = len([sku for sku, links in upload_results.items() if links])
-    
-    stats = [
-        ['Параметр', 'Значение'],
-        ['Время генерации', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-        ['Всего SKU', total_sku],
-        ['Всего файлов', total_files],
-        ['Успешно загружено ссылок', total_links],
-        ['Успешных SKU', success_sku],
-        ['Процент успеха', f'{(success_sku/max(1, total_sku)*100):.1f}%'],
-        ['Среднее фото на SKU', f'{(total_files/max(1, total_sku)):.1f}'],
-    ]
-    
-    for row in stats:
+    for row in stats.rows():
         ws_stats.append(row)
-    
+
+    # Лист 4: Производительность
+    if metrics:
+        _write_performance_sheet(wb, metrics)
+
     # Сохранение
     wb.save(export_path)
     return export_path
@@ -94,23 +226,11 @@ def export_csv_report(grouped, upload_results: Dict[str, List[str]], export_path
     Экспортирует упрощенный отчет в CSV формате
     """
     if not export_path:
-        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        export_path = f'wb_upload_report_{timestamp}.csv'
-    
+        export_path = _default_path('csv')
+
     with open(export_path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
-        writer.writerow(['SKU', 'Файлов', 'Ссылок', 'Статус', 'Ссылки'])
-        
-        for sku, files in (grouped.by_sku.items() if grouped else {}):
-            uploaded_links = upload_results.get(sku, [])
-            status = "OK" if uploaded_links else "ERROR"
-            
-            writer.writerow([
-                sku,
-                len(files),
-                len(uploaded_links),
-                status,
-                '; '.join(uploaded_links)
-            ])
-    
+        writer.writerow(CSV_HEADERS)
+        collect_report(grouped, upload_results, [lambda row: writer.writerow(row.csv_values())])
+
     return export_path
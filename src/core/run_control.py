@@ -0,0 +1,104 @@
+"""
+Управление идущим прогоном загрузки: пауза, продолжение и отмена.
+Потоки загрузки сами проверяют состояние между файлами (checkpoint),
+а при отмене с прерыванием — ещё и на каждом чтении загружаемого файла.
+"""
+import threading
+from typing import List, Optional
+
+
+class UploadCancelled(Exception):
+    """Прогон отменён; uploaded — файлы SKU, которые успели загрузиться"""
+
+    def __init__(self, uploaded: List = None):
+        super().__init__('Загрузка отменена')
+        self.uploaded = list(uploaded or [])
+
+
+class TransferAborted(Exception):
+    """Текущая передача файла прервана по запросу пользователя"""
+
+
+class RunControl:
+    """Общие для всех потоков прогона флаги паузы и отмены"""
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        self.abort_transfers = False
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self, abort_transfers: bool = False):
+        """
+        Останавливает прогон. Без abort_transfers текущие файлы догружаются,
+        новые не начинаются; с ним прерываются и идущие передачи.
+        """
+        self.abort_transfers = abort_transfers
+        self._cancelled.set()
+        # Разбудить потоки, стоящие на паузе, чтобы они увидели отмену
+        self._running.set()
+
+    def wait_if_paused(self) -> bool:
+        """Ждёт снятия паузы; возвращает False, если прогон отменён"""
+        while not self._running.wait(0.2):
+            pass
+        return not self.cancelled
+
+    def checkpoint(self, uploaded: List = None):
+        """Точка между файлами: ждёт на паузе и бросает UploadCancelled при отмене"""
+        if not self.wait_if_paused():
+            raise UploadCancelled(uploaded)
+
+    def transfer_aborted(self) -> bool:
+        return self.abort_transfers and self.cancelled
+
+
+class ControlledReader:
+    """
+    Обёртка файла для загрузки: на каждом read() проверяет, не прервана ли передача,
+    и придерживает чтение по лимиту скорости (core.throttle.UploadLimiter).
+    Пауза идущую передачу не останавливает — сервер закрыл бы соединение по таймауту.
+    """
+
+    def __init__(self, f, control: Optional[RunControl] = None, limiter=None):
+        self._f = f
+        self._control = control
+        self._limiter = limiter
+
+    def read(self, size: int = -1) -> bytes:
+        if self._control is not None and self._control.transfer_aborted():
+            raise TransferAborted('Передача прервана')
+        chunk = self._f.read(size)
+        if self._limiter is not None and chunk:
+            self._limiter.throttle(len(chunk), self._control.transfer_aborted if self._control else None)
+        return chunk
+
+    def seekable(self) -> bool:
+        return self._f.seekable()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._f.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(64 * 1024)
+            if not chunk:
+                return
+            yield chunk
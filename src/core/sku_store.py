@@ -0,0 +1,122 @@
+"""
+Постоянное хранилище данных SKU (название, цена, цвет и т.д.) в локальной SQLite базе.
+Данные привязаны к паре (профиль, SKU) и переживают пересканирование и перезапуск.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from .export import ATTRIBUTE_FIELDS
+from .paths import get_data_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sku_attributes (
+    profile TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    name TEXT,
+    price TEXT,
+    color TEXT,
+    volume TEXT,
+    material TEXT,
+    gift TEXT,
+    pattern TEXT,
+    complect TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (profile, sku)
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = ', '.join(ATTRIBUTE_FIELDS)
+# Незаданное (NULL) поле при upsert не затирает сохранённое значение
+_UPSERT = (
+    f"INSERT INTO sku_attributes (profile, sku, {_COLUMNS}, updated_at) "
+    f"VALUES (?, ?, {', '.join('?' for _ in ATTRIBUTE_FIELDS)}, ?) "
+    f"ON CONFLICT (profile, sku) DO UPDATE SET "
+    + ', '.join(f"{f} = COALESCE(excluded.{f}, {f})" for f in ATTRIBUTE_FIELDS)
+    + ", updated_at = excluded.updated_at"
+)
+
+
+def default_store_path() -> str:
+    return os.path.join(get_data_dir(), 'sku_data.sqlite3')
+
+
+class SkuStore:
+    """Данные SKU по профилям"""
+
+    def __init__(self, path: str = None):
+        self.path = path or default_store_path()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert_many(self, profile: str, records: Dict[str, Dict[str, str]]) -> int:
+        """
+        Сохраняет данные нескольких SKU одной транзакцией
+
+        Args:
+            profile: Имя профиля
+            records: sku -> {поле: значение}; отсутствующие поля не меняются
+
+        Returns:
+            int: Сколько SKU записано
+        """
+        now = time.time()
+        rows = [
+            (profile, sku, *(fields.get(f) for f in ATTRIBUTE_FIELDS), now)
+            for sku, fields in records.items()
+        ]
+        with self._connect() as conn:
+            conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def upsert_frame(self, profile: str, attributes: pd.DataFrame) -> int:
+        """Сохраняет таблицу атрибутов (индекс — SKU, NaN — поле не задано)"""
+        frame = attributes.reindex(columns=ATTRIBUTE_FIELDS).astype(object)
+        frame = frame.where(frame.notna(), None)
+        now = time.time()
+        rows = [(profile, str(sku), *values, now) for sku, *values in frame.itertuples(name=None)]
+        with self._connect() as conn:
+            conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def get(self, profile: str, sku: str) -> Dict[str, str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM sku_attributes WHERE profile = ? AND sku = ?", (profile, sku)
+            ).fetchone()
+        if row is None:
+            return {}
+        return {f: row[f] for f in ATTRIBUTE_FIELDS if row[f] is not None}
+
+    def load(self, profile: str, skus: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Все данные профиля одним запросом: индекс — SKU, колонки ATTRIBUTE_FIELDS.
+        Если задан skus, остаются только эти SKU.
+        """
+        with self._connect() as conn:
+            frame = pd.read_sql_query(
+                f"SELECT sku, {_COLUMNS} FROM sku_attributes WHERE profile = ?",
+                conn, params=(profile,), index_col='sku', dtype=object,
+            )
+        if skus is not None:
+            frame = frame[frame.index.isin(set(skus))]
+        return frame.reindex(columns=ATTRIBUTE_FIELDS)
+
+    def count(self, profile: str) -> int:
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM sku_attributes WHERE profile = ?', (profile,)).fetchone()[0]
@@ -0,0 +1,116 @@
+"""
+Замер холодного старта и отложенная загрузка тяжёлых модулей
+"""
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Бюджет времени до первого кадра окна, секунды
+DEFAULT_BUDGET_S = 2.0
+
+
+class StartupTimer:
+    """Отметки этапов запуска и время импорта модулей (аналог -X importtime)"""
+
+    def __init__(self, budget_s: float = DEFAULT_BUDGET_S):
+        self.t0 = time.perf_counter()
+        self.budget_s = budget_s
+        self.marks: List[Tuple[str, float]] = []
+        self.imports: Dict[str, Tuple[float, str]] = {}  # модуль -> (секунды, поток)
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def mark(self, stage: str):
+        with self._lock:
+            self.marks.append((stage, self.elapsed()))
+
+    def record_import(self, name: str, seconds: float):
+        with self._lock:
+            self.imports[name] = (seconds, threading.current_thread().name)
+
+    def first_frame_s(self) -> float:
+        for stage, t in self.marks:
+            if stage == 'first_frame':
+                return t
+        return 0.0
+
+    def over_budget(self) -> bool:
+        return self.first_frame_s() > self.budget_s
+
+    def report(self) -> str:
+        with self._lock:
+            marks = list(self.marks)
+            imports = sorted(self.imports.items(), key=lambda kv: kv[1][0], reverse=True)
+        lines = [f"Бюджет до первого кадра: {self.budget_s:.2f} с", "", "Этапы (с от старта):"]
+        prev = 0.0
+        for stage, t in marks:
+            lines.append(f"  {t:8.3f}  +{t - prev:7.3f}  {stage}")
+            prev = t
+        lines.append("")
+        lines.append("Импорт модулей (с, накопительно, поток):")
+        for name, (seconds, thread) in imports:
+            lines.append(f"  {seconds:8.3f}  {name}  [{thread}]")
+        if self.over_budget():
+            lines.append("")
+            lines.append(f"⚠️ Первый кадр через {self.first_frame_s():.2f} с — бюджет превышен")
+        return '\n'.join(lines)
+
+    def write(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.report())
+        return path
+
+
+def _budget_from_env() -> float:
+    try:
+        return float(os.environ.get('WB_AUTO_STARTUP_BUDGET', DEFAULT_BUDGET_S))
+    except ValueError:
+        return DEFAULT_BUDGET_S
+
+
+startup_timer = StartupTimer(_budget_from_env())
+
+
+def lazy_import(name: str):
+    """Импортирует модуль при первом обращении и записывает время импорта"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    t = time.perf_counter()
+    module = importlib.import_module(name)
+    startup_timer.record_import(name, time.perf_counter() - t)
+    return module
+
+
+def preload_in_background(names: Iterable[str], report_path: str = None) -> threading.Thread:
+    """
+    Прогревает модули в фоновом потоке, чтобы первое действие пользователя не ждало импорта.
+    Если указан report_path, по окончании отчёт о запуске перезаписывается с временами импорта.
+    """
+    names = list(names)
+
+    def _run():
+        for name in names:
+            try:
+                lazy_import(name)
+            except Exception as e:
+                logger.warning("Не удалось предзагрузить %s: %s", name, e)
+        startup_timer.mark('preload_done')
+        if report_path:
+            try:
+                startup_timer.write(report_path)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=_run, name='preload', daemon=True)
+    thread.start()
+    return thread
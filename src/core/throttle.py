@@ -0,0 +1,193 @@
+"""
+Ограничение скорости отдачи при загрузке: одно «ведро токенов» на все потоки
+прогона, поэтому общий поток в сеть не превышает лимита при любой параллельности.
+
+Лимит задаётся в КБ/с ключами профиля:
+
+    "upload_limit_kbps": 2048,
+    "upload_schedule": [
+        {"from": "09:00", "to": "19:00", "kbps": 1024},
+        {"from": "19:00", "to": "09:00", "kbps": 0}
+    ]
+
+Окна расписания проверяются по порядку, переход через полночь допустим;
+вне окон действует upload_limit_kbps. 0 — без ограничения. В cli.py те же
+значения задают --limit-kbps и --limit-schedule "09:00-19:00=1024,19:00-09:00=0".
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Union
+
+# Сколько секунд полной скорости можно «накопить» в простое
+BURST_S = 0.5
+MIN_BURST_BYTES = 64 * 1024
+# Спать кусками, чтобы прерывание передачи не ждало конца паузы
+SLEEP_SLICE_S = 0.25
+# Как часто сверяться с расписанием
+SCHEDULE_CHECK_S = 30.0
+
+
+class TokenBucket:
+    """Ведро токенов в байтах; потоки уходят в долг и досыпают его"""
+
+    def __init__(self, rate: float = 0, monotonic: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self._monotonic = monotonic
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._stamp = monotonic()
+        self.rate = 0.0
+        self.capacity = 0.0
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float):
+        """Байт в секунду; 0 — без ограничения"""
+        with self._lock:
+            self._refill(self._monotonic())
+            self.rate = max(0.0, float(rate or 0))
+            self.capacity = max(self.rate * BURST_S, MIN_BURST_BYTES)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self, now: float):
+        if self.rate:
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def consume(self, nbytes: int, abort: Optional[Callable[[], bool]] = None) -> float:
+        """Списывает nbytes и ждёт, пока долг не погасится; возвращает время ожидания"""
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            self._refill(self._monotonic())
+            self._tokens -= nbytes
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        waited, deadline = wait, self._monotonic() + wait
+        while wait > 0:
+            if abort is not None and abort():
+                break
+            self._sleep(min(wait, SLEEP_SLICE_S))
+            wait = deadline - self._monotonic()
+        return waited
+
+
+@dataclass
+class ScheduleWindow:
+    start: int  # минуты от полуночи
+    end: int
+    kbps: float
+
+    def contains(self, minute: int) -> bool:
+        if self.start <= self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end  # через полночь
+
+
+def _parse_time(value: str) -> int:
+    hours, _, minutes = str(value).strip().partition(':')
+    h, m = int(hours), int(minutes or 0)
+    if not (0 <= h <= 24 and 0 <= m < 60) or h * 60 + m > 24 * 60:
+        raise ValueError(f'Неверное время: {value}')
+    return h * 60 + m
+
+
+def parse_schedule(spec: Union[str, list, None]) -> List[ScheduleWindow]:
+    """
+    Расписание из профиля (список {"from", "to", "kbps"}) или из строки
+    "09:00-19:00=1024,19:00-09:00=0"
+
+    Raises:
+        ValueError: Если окно записано неверно
+    """
+    if not spec:
+        return []
+    windows = []
+    if isinstance(spec, str):
+        for part in spec.replace(';', ',').split(','):
+            if not part.strip():
+                continue
+            span, sep, kbps = part.partition('=')
+            start, dash, end = span.partition('-')
+            if not sep or not dash:
+                raise ValueError(f'Окно расписания записывается как ЧЧ:ММ-ЧЧ:ММ=КБс: {part.strip()}')
+            windows.append(ScheduleWindow(_parse_time(start), _parse_time(end), float(kbps)))
+    else:
+        for item in spec:
+            windows.append(ScheduleWindow(_parse_time(item['from']), _parse_time(item['to']),
+                                          float(item.get('kbps') or 0)))
+    for w in windows:
+        if w.kbps < 0:
+            raise ValueError('Скорость в расписании не может быть отрицательной')
+    return windows
+
+
+class UploadLimiter:
+    """Общий для потоков прогона лимит скорости с учётом расписания"""
+
+    def __init__(self, limit_kbps: float = 0, schedule: Optional[List[ScheduleWindow]] = None,
+                 clock: Callable[[], datetime] = datetime.now, monotonic: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.limit_kbps = max(0.0, float(limit_kbps or 0))
+        self.schedule = list(schedule or [])
+        self._clock = clock
+        self._monotonic = monotonic
+        self._bucket = TokenBucket(monotonic=monotonic, sleep=sleep)
+        self._lock = threading.Lock()
+        self._checked = None
+        self._refresh(force=True)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.limit_kbps or any(w.kbps for w in self.schedule))
+
+    def current_kbps(self, now: Optional[datetime] = None) -> float:
+        """Лимит на момент now: первое подходящее окно расписания или общий"""
+        now = now or self._clock()
+        minute = now.hour * 60 + now.minute
+        for w in self.schedule:
+            if w.contains(minute):
+                return w.kbps
+        return self.limit_kbps
+
+    def _refresh(self, force: bool = False):
+        # Проверка и смена скорости — одним шагом, иначе потоки на границе окна
+        # могут выставить ведру старую скорость после новой
+        with self._lock:
+            now = self._monotonic()
+            if not force and self._checked is not None and now - self._checked < SCHEDULE_CHECK_S:
+                return
+            self._checked = now
+            rate = self.current_kbps() * 1024
+            if rate != self._bucket.rate:
+                self._bucket.set_rate(rate)
+
+    def throttle(self, nbytes: int, abort: Optional[Callable[[], bool]] = None) -> float:
+        """Вызывается после чтения nbytes загружаемого файла"""
+        if self.schedule:
+            self._refresh()
+        return self._bucket.consume(nbytes, abort)
+
+    def describe(self) -> str:
+        parts = []
+        if self.limit_kbps:
+            parts.append(f'{self.limit_kbps:g} КБ/с')
+        for w in self.schedule:
+            limit = f'{w.kbps:g} КБ/с' if w.kbps else 'без ограничения'
+            parts.append(f'{w.start // 60:02d}:{w.start % 60:02d}-{w.end // 60:02d}:{w.end % 60:02d} {limit}')
+        return ', '.join(parts) or 'без ограничения'
+
+
+def limiter_from_profile(profile, limit_kbps: Optional[float] = None,
+                         schedule: Union[str, list, None] = None) -> Optional[UploadLimiter]:
+    """
+    Лимит для прогона: явные значения (ключи cli.py) важнее ключей профиля.
+    Возвращает None, если скорость не ограничена.
+    """
+    if limit_kbps is None:
+        limit_kbps = profile.get('upload_limit_kbps') if profile else 0
+    if schedule is None:
+        schedule = profile.get('upload_schedule') if profile else None
+    limiter = UploadLimiter(float(limit_kbps or 0), parse_schedule(schedule))
+    return limiter if limiter.active else None
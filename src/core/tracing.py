@@ -0,0 +1,168 @@
+"""
+Трассировка этапов прогона: сканирование, SKU, файлы (загрузка, публикация,
+ссылка), сборка XLSX и отчёта.
+
+Каждый span — событие «X» формата Chrome Trace Event: файл открывается
+в chrome://tracing, https://ui.perfetto.dev и speedscope. Вложенность
+восстанавливается по времени внутри потока.
+
+Пока трассировка не включена, span() возвращает общий пустой объект —
+цена вызова одна проверка глобальной переменной.
+
+Включение: переменная окружения WB_AUTO_TRACE (1 — файл в data_dir/traces,
+иначе путь к файлу) или ключ --trace в cli.py.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from .log import current_context
+from .paths import get_data_dir
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = f'{exc_type.__name__}: {exc}'
+        self.tracer.add(self.name, self.cat, self.start, end, self.args)
+        return False
+
+    def set(self, **attrs):
+        """Добавляет атрибуты (байты, повторы, …), известные только к концу блока"""
+        self.args.update(attrs)
+
+
+class Tracer:
+    """Собирает события в памяти и сохраняет их одним файлом"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, cat: str, start_ns: int, end_ns: int, args: dict):
+        thread = threading.current_thread()
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid, 'tid': thread.ident,
+            'ts': (start_ns - self.origin) / 1000, 'dur': (end_ns - start_ns) / 1000,
+            'args': args,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def save(self) -> str:
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': 'WB Auto'}}]
+        meta += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in threads.items()]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': meta + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False, default=str)
+        os.replace(tmp, self.path)
+        return self.path
+
+
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, cat: str = 'wb', **attrs):
+    """
+    Замер блока кода:
+
+        with span('publish', sku=sku) as s:
+            ...
+            s.set(retries=2)
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP
+    context = current_context()
+    return _Span(tracer, name, cat, {**context, **attrs} if context else attrs)
+
+
+def traced(name: str, cat: str = 'wb'):
+    """Декоратор: весь вызов функции — один span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with span(name, cat):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def default_trace_path() -> str:
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(get_data_dir('traces'), f'trace_{stamp}.json')
+
+
+def start_tracing(path: Optional[str] = None) -> str:
+    """Включает трассировку; события сохраняются при stop_tracing() или выходе"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path or default_trace_path())
+        atexit.register(stop_tracing)
+    return _tracer.path
+
+
+def stop_tracing() -> Optional[str]:
+    """Выключает трассировку и сохраняет файл; возвращает его путь"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    return tracer.save()
+
+
+def enable_from_env() -> Optional[str]:
+    value = os.environ.get('WB_AUTO_TRACE', '').strip()
+    if not value or value == '0':
+        return None
+    return start_tracing(None if value == '1' else value)
@@ -58,3 +58,14 @@ def append_row(ws: Worksheet, row: Dict[str, str]):
     for h in WB_HEADERS:
         vals.append(row.get(h, ""))
     ws.append(vals)
+
+
+def profile_max_photos(profile, default: int = 6) -> int:
+    """Сколько фото на SKU разрешает профиль"""
+    if not profile:
+        return default
+    try:
+        return int(profile.get('max_photos') or default)
+    except Exception:
+        return default
+
@@ -1,13 +1,94 @@
 import io
 import json
+import logging
 import os
+import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 import requests
 import yadisk
-from tenacity import retry, stop_after_attempt, wait_exponential
+from requests.adapters import HTTPAdapter
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+from . import metrics
+from .perf import FileMetrics
+from .run_control import ControlledReader, RunControl, TransferAborted, UploadCancelled
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Адрес REST API Яндекс.Диска. WB_AUTO_YADISK_API направляет все запросы
+# на другой сервер, например на локальный эмулятор tools/yadisk_stub_server.py
+DEFAULT_API_BASE = "https://cloud-api.yandex.net"
+API_BASE = os.environ.get('WB_AUTO_YADISK_API', DEFAULT_API_BASE).rstrip('/')
+DOWNLOADER_PREFIX = "https://downloader.disk.yandex.ru"
+
+
+class _MeteredAdapter(HTTPAdapter):
+    """Считает запросы, ответы 429 и их длительность по конечным точкам (core.metrics)"""
+
+    def send(self, request, *args, **kwargs):
+        endpoint = metrics.api_endpoint(requests.utils.urlparse(request.url).path)
+        t0 = time.perf_counter()
+        status = 'error'
+        try:
+            response = super().send(request, *args, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            metrics.API_REQUESTS.inc(method=request.method, endpoint=endpoint, status=status)
+            metrics.API_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint)
+            if status == '429':
+                metrics.THROTTLED.inc(endpoint=endpoint)
+
+
+class _ApiBaseAdapter(_MeteredAdapter):
+    """Подменяет адрес API в запросах библиотеки yadisk, где он зашит в код"""
+
+    def send(self, request, *args, **kwargs):
+        if request.url.startswith(DEFAULT_API_BASE):
+            request.url = API_BASE + request.url[len(DEFAULT_API_BASE):]
+        return super().send(request, *args, **kwargs)
+
+
+class _Client(yadisk.YaDisk):
+    def make_session(self, token=None):
+        session = super().make_session(token)
+        # Ссылки на загрузку ведут на другие хосты — их запросы тоже попадают в метрики
+        session.mount('https://', _MeteredAdapter())
+        session.mount('http://', _MeteredAdapter())
+        if API_BASE != DEFAULT_API_BASE:
+            session.mount(DEFAULT_API_BASE, _ApiBaseAdapter())
+        return session
+
+
+def make_client(token: str) -> yadisk.YaDisk:
+    """Клиент Яндекс.Диска с учётом WB_AUTO_YADISK_API и метриками запросов"""
+    return _Client(token=token)
+
+
+# Таймаут запросов к публичному API за ссылками, с
+PUBLIC_TIMEOUT = 10
+_public = threading.local()
+
+
+def _public_session() -> requests.Session:
+    """Сессия потока для публичного API (без токена), запросы которой попадают в метрики"""
+    session = getattr(_public, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.mount('https://', _MeteredAdapter())
+        session.mount('http://', _MeteredAdapter())
+        _public.session = session
+    return session
+
+
+def _is_direct_link(url: str) -> bool:
+    return url.startswith(DOWNLOADER_PREFIX) or (API_BASE != DEFAULT_API_BASE and url.startswith(API_BASE))
+
 
 def get_direct_download_link(public_url: str) -> Optional[str]:
     """
@@ -23,20 +104,20 @@ def get_direct_download_link(public_url: str) -> Optional[str]:
             return None
         
         # Делаем запрос к API для получения прямой ссылки
-        api_url = "https://cloud-api.yandex.net/v1/disk/public/resources/download"
+        api_url = f"{API_BASE}/v1/disk/public/resources/download"
         params = {'public_key': public_url}
         
-        response = requests.get(api_url, params=params)
+        response = _public_session().get(api_url, params=params, timeout=PUBLIC_TIMEOUT)
         
         if response.status_code == 200:
             data = response.json()
             return data.get('href')
         else:
-            print(f"⚠️ Ошибка получения прямой ссылки: {response.status_code}")
+            logger.warning("Ошибка получения прямой ссылки: HTTP %s", response.status_code)
             return None
             
     except Exception as e:
-        print(f"⚠️ Исключение при получении прямой ссылки: {e}")
+        logger.warning("Исключение при получении прямой ссылки: %s", e)
         return None
 
 TOKEN_SERVICE = "wb_auto_yadisk"
@@ -48,6 +129,62 @@ class UploadedFile:
     public_url: str
     direct_url: str
     size: int
+    metrics: Optional[FileMetrics] = None
+
+
+# Метрики файла, который сейчас обрабатывается в этом потоке
+_local = threading.local()
+
+
+@contextmanager
+def _track_file(sku: str, name: str, size: int):
+    m = FileMetrics(sku=sku, name=name, size=size, started_at=time.time())
+    _local.metrics = m
+    with span('file', file=name) as s:
+        try:
+            yield m
+        finally:
+            m.finished_at = time.time()
+            _local.metrics = None
+            metrics.FILES.inc(action=m.action)
+            metrics.FILE_SECONDS.observe(m.finished_at - m.started_at, action=m.action)
+            if m.uploaded_bytes:
+                metrics.UPLOADED_BYTES.inc(m.uploaded_bytes)
+            s.set(action=m.action, bytes=m.uploaded_bytes, size=m.size, retries=m.retries,
+                  link_strategy=m.link_strategy)
+
+
+# Имена span в трассировке для фаз FileMetrics
+_PHASE_SPANS = {'upload_s': 'upload', 'publish_s': 'publish', 'link_s': 'link'}
+
+
+@contextmanager
+def _phase(attr: str):
+    """Добавляет длительность блока к полю attr текущих метрик файла"""
+    m = getattr(_local, 'metrics', None)
+    with span(_PHASE_SPANS.get(attr, attr)):
+        if m is None:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(m, attr, getattr(m, attr) + time.perf_counter() - t0)
+
+
+def _note_attempt(phase: str):
+    m = getattr(_local, 'metrics', None)
+    if m is not None:
+        m.attempts[phase] = m.attempts.get(phase, 0) + 1
+        if m.attempts[phase] > 1:
+            metrics.RETRIES.inc(phase=phase)
+
+
+def _note_strategy(strategy: str):
+    m = getattr(_local, 'metrics', None)
+    if m is not None:
+        m.link_strategy = strategy
 
 
 def get_saved_token(keyring):
@@ -69,6 +206,14 @@ def _publish_and_get_direct(y: yadisk.YaDisk, path: str) -> str:
     """
     Публикует файл и получает прямую ссылку на скачивание
     """
+    _note_attempt('publish')
+    with _phase('publish_s'):
+        meta = _publish(y, path)
+    with _phase('link_s'):
+        return _resolve_direct_link(y, path, meta)
+
+
+def _publish(y: yadisk.YaDisk, path: str):
     try:
         # Пробуем опубликовать файл
         y.publish(path)
@@ -93,40 +238,48 @@ def _publish_and_get_direct(y: yadisk.YaDisk, path: str) -> str:
     
     try:
         meta = y.get_meta(path)
-        if not meta.public_url:
-            raise RuntimeError(f"Не удалось получить публичную ссылку для {path}")
-        
-        print(f"📎 Публичная ссылка: {meta.public_url}")
+    except Exception as e:
+        raise RuntimeError(f"Не удалось получить ссылку для {path}: {str(e)}")
+    if not meta.public_url:
+        raise RuntimeError(f"Не удалось получить публичную ссылку для {path}")
+    return meta
+
+
+def _resolve_direct_link(y: yadisk.YaDisk, path: str, meta) -> str:
+    try:
+        logger.debug("Публичная ссылка %s: %s", path, meta.public_url)
         
         # Пытаемся получить прямую ссылку через новую функцию
         try:
             direct_url = get_direct_download_link(meta.public_url)
-            if direct_url and direct_url.startswith('https://downloader.disk.yandex.ru'):
-                print(f"🔗 Прямая ссылка получена: {direct_url[:60]}...")
+            if direct_url and _is_direct_link(direct_url):
+                logger.debug("Прямая ссылка получена: %s", direct_url)
+                _note_strategy('direct')
                 return direct_url
         except Exception as e:
-            print(f"⚠️ Не удалось получить прямую ссылку: {e}")
+            logger.warning("Не удалось получить прямую ссылку для %s: %s", path, e)
         
         # Если прямая ссылка не получена, попробуем еще раз через API
-        print("🔄 Пробуем получить прямую ссылку через альтернативный способ...")
+        logger.debug("Пробуем получить прямую ссылку через публичные ресурсы: %s", path)
         
         # Новый способ через публичное API
         try:
-            public_info_url = "https://cloud-api.yandex.net/v1/disk/public/resources"
-            response = requests.get(
+            public_info_url = f"{API_BASE}/v1/disk/public/resources"
+            response = _public_session().get(
                 public_info_url,
                 params={"public_key": meta.public_url},
-                timeout=10
+                timeout=PUBLIC_TIMEOUT
             )
             
             if response.status_code == 200:
                 data = response.json()
                 if 'file' in data and data['file']:
                     download_url = data['file']
-                    print(f"✅ Альтернативная прямая ссылка получена")
+                    logger.debug("Альтернативная прямая ссылка получена: %s", path)
+                    _note_strategy('public_api')
                     return download_url
         except Exception as e:
-            print(f"⚠️ Альтернативный способ тоже не сработал: {e}")
+            logger.warning("Альтернативный способ получения ссылки не сработал для %s: %s", path, e)
         
         # Если ничего не помогло, используем старый способ
         pr = y.get_public_resources(public_key=meta.public_url)
@@ -140,20 +293,18 @@ def _publish_and_get_direct(y: yadisk.YaDisk, path: str) -> str:
                     break
         
         # Если прямой ссылки нет, используем публичную с параметром download
-        if not href:
+        if href:
+            _note_strategy('public_resources')
+        else:
             href = meta.public_url + "&download=1"
+            _note_strategy('public_url')
             
         return href
         
-    except Exception as e:
+    except Exception:
         # В крайнем случае возвращаем базовую публичную ссылку
-        try:
-            meta = y.get_meta(path)
-            if meta.public_url:
-                return meta.public_url + "&download=1"
-        except Exception:
-            pass
-        raise RuntimeError(f"Не удалось получить ссылку для {path}: {str(e)}")
+        _note_strategy('public_url')
+        return meta.public_url + "&download=1"
 
 
 def ensure_folder(y: yadisk.YaDisk, folder: str):
@@ -163,39 +314,38 @@ def ensure_folder(y: yadisk.YaDisk, folder: str):
     try:
         # Сначала проверяем существует ли папка
         if y.exists(folder):
-            print(f"📁 Папка уже существует: {folder}")
+            logger.debug("Папка уже существует: %s", folder)
             return
         
         # Если не существует, создаем
         y.mkdir(folder)
-        print(f"✅ Папка создана: {folder}")
+        logger.info("Папка создана: %s", folder)
         
     except yadisk.exceptions.PathExistsError:
         # Папка уже существует - это нормально
-        print(f"📁 Папка уже существует: {folder}")
-        pass
+        logger.debug("Папка уже существует: %s", folder)
     except yadisk.exceptions.ForbiddenError as e:
-        print(f"🚫 Недостаточно прав для создания папки {folder}: {e}")
+        logger.error("Недостаточно прав для создания папки %s: %s", folder, e)
         # Проверяем, может папка уже существует
         try:
             if y.exists(folder):
-                print(f"📁 Папка всё же существует: {folder}")
+                logger.debug("Папка всё же существует: %s", folder)
                 return
         except Exception:
             pass
         raise e
     except Exception as e:
-        print(f"❌ Ошибка создания папки {folder}: {e}")
+        logger.warning("Ошибка создания папки %s: %s", folder, e)
         # Проверяем существует ли папка другим способом
         try:
             if y.exists(folder):
-                print(f"📁 Папка существует (проверка после ошибки): {folder}")
+                logger.debug("Папка существует (проверка после ошибки): %s", folder)
                 return
             else:
                 # Папка не существует и создать не удалось - это проблема
                 raise e
         except Exception as check_error:
-            print(f"❌ Не удалось проверить существование папки {folder}: {check_error}")
+            logger.error("Не удалось проверить существование папки %s: %s", folder, check_error)
             raise e
         except Exception:
             # Если и проверка не работает, пробуем ещё раз создать
@@ -210,10 +360,14 @@ def file_signature(fp: str) -> int:
     return os.path.getsize(fp)
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-def upload_file(y: yadisk.YaDisk, local_path: str, remote_path: str, overwrite: bool = False):
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10),
+       retry=retry_if_not_exception_type(TransferAborted))
+def upload_file(y: yadisk.YaDisk, local_path: str, remote_path: str, overwrite: bool = False,
+                control: Optional[RunControl] = None, limiter=None):
+    _note_attempt('upload')
     with open(local_path, 'rb') as f:
-        y.upload(f, remote_path, overwrite=overwrite)
+        reader = ControlledReader(f, control, limiter) if control or limiter else f
+        y.upload(reader, remote_path, overwrite=overwrite)
 
 
 def upload_sku_photos(
@@ -223,16 +377,21 @@ def upload_sku_photos(
     sku: str,
     files: List[str],
     overwrite_mode: str = 'never',  # 'never' | 'changed' | 'always'
+    control: Optional[RunControl] = None,
+    limiter=None,
 ) -> List[UploadedFile]:
     """
-    Загружает фотографии товара в Яндекс.Диск с fallback к прямому API
+    Загружает фотографии товара в Яндекс.Диск с fallback к прямому API.
+    При отмене через control бросает UploadCancelled с уже загруженными файлами;
+    limiter (core.throttle.UploadLimiter) ограничивает скорость отдачи.
     """
     # Сначала пробуем стандартный способ через библиотеку yadisk
     try:
-        return _upload_sku_photos_standard(keyring, token, root, sku, files, overwrite_mode)
+        return _upload_sku_photos_standard(keyring, token, root, sku, files, overwrite_mode, control, limiter)
+    except UploadCancelled:
+        raise
     except Exception as e:
-        print(f"❌ Загрузка не удалась: {e}")
-        print("� Проверьте токен и права доступа к Яндекс.Диску")
+        logger.error("Загрузка SKU %s не удалась (проверьте токен и права доступа к Яндекс.Диску): %s", sku, e)
         raise e  # Перебрасываем ошибку
         
         return uploaded
@@ -244,6 +403,8 @@ def _upload_sku_photos_standard(
     sku: str,
     files: List[str],
     overwrite_mode: str = 'never',  # 'never' | 'changed' | 'always'
+    control: Optional[RunControl] = None,
+    limiter=None,
 ) -> List[UploadedFile]:
     if token:
         save_token(keyring, token)
@@ -252,7 +413,7 @@ def _upload_sku_photos_standard(
     if not token:
         raise RuntimeError("OAuth-токен Яндекс.Диска не задан")
 
-    y = yadisk.YaDisk(token=token)
+    y = make_client(token)
     if not y.check_token():
         raise RuntimeError("Недействительный токен Яндекс.Диска")
 
@@ -266,43 +427,61 @@ def _upload_sku_photos_standard(
     existing: Dict[str, int] = {}
     try:
         for item in y.listdir(sku_root):
-            if not item.is_dir:
+            if item.type != 'dir':
                 existing[item.name] = item.size or 0
     except Exception:
         pass
 
     for lp in files:
+        if control is not None:
+            control.checkpoint(uploaded)
         name = os.path.basename(lp)
         rp = f"{sku_root}/{name}"
         sig = file_signature(lp)
-        # If identical exists, just ensure public link and reuse
-        if name in existing and existing[name] == sig:
-            try:
-                direct = _publish_and_get_direct(y, rp)
-                uploaded.append(UploadedFile(sku=sku, name=name, public_url=y.get_meta(rp).public_url, direct_url=direct, size=sig))
-                continue
-            except Exception:
-                pass
+        with _track_file(sku, name, sig) as m:
+            # If identical exists, just ensure public link and reuse
+            if name in existing and existing[name] == sig:
+                try:
+                    m.action = 'reuse'
+                    direct = _publish_and_get_direct(y, rp)
+                    with _phase('publish_s'):
+                        public_url = y.get_meta(rp).public_url
+                    uploaded.append(UploadedFile(sku=sku, name=name, public_url=public_url, direct_url=direct, size=sig, metrics=m))
+                    continue
+                except Exception:
+                    pass
 
-        if overwrite_mode == 'never' and name in existing:
-            # Do not overwrite, reuse existing even if size changed
-            try:
-                direct = _publish_and_get_direct(y, rp)
-                uploaded.append(UploadedFile(sku=sku, name=name, public_url=y.get_meta(rp).public_url, direct_url=direct, size=existing[name]))
-                continue
-            except Exception:
-                # fallback: skip
-                continue
-
-        if overwrite_mode == 'always':
-            ow = True
-        elif overwrite_mode == 'changed':
-            ow = (name in existing and existing[name] != sig)
-        else:
-            ow = False
+            if overwrite_mode == 'never' and name in existing:
+                # Do not overwrite, reuse existing even if size changed
+                try:
+                    m.action = 'reuse'
+                    m.size = existing[name]
+                    direct = _publish_and_get_direct(y, rp)
+                    with _phase('publish_s'):
+                        public_url = y.get_meta(rp).public_url
+                    uploaded.append(UploadedFile(sku=sku, name=name, public_url=public_url, direct_url=direct, size=existing[name], metrics=m))
+                    continue
+                except Exception:
+                    # fallback: skip
+                    continue
 
-        upload_file(y, lp, rp, overwrite=ow)
-        direct = _publish_and_get_direct(y, rp)
-        uploaded.append(UploadedFile(sku=sku, name=name, public_url=y.get_meta(rp).public_url, direct_url=direct, size=sig))
+            if overwrite_mode == 'always':
+                ow = True
+            elif overwrite_mode == 'changed':
+                ow = (name in existing and existing[name] != sig)
+            else:
+                ow = False
+
+            m.action = 'upload'
+            m.size = sig
+            try:
+                with _phase('upload_s'):
+                    upload_file(y, lp, rp, overwrite=ow, control=control, limiter=limiter)
+            except TransferAborted:
+                raise UploadCancelled(uploaded)
+            direct = _publish_and_get_direct(y, rp)
+            with _phase('publish_s'):
+                public_url = y.get_meta(rp).public_url
+            uploaded.append(UploadedFile(sku=sku, name=name, public_url=public_url, direct_url=direct, size=sig, metrics=m))
 
     return uploaded
@@ -0,0 +1 @@
+# Пакет UI компонентов
@@ -0,0 +1,175 @@
+"""
+Модель/представление таблицы SKU: данные берутся из GroupResult по запросу,
+отрисовываются только видимые строки, фильтрация идёт по индексу триграмм.
+"""
+import os
+from typing import Dict, List, Optional, Set
+
+from PyQt5 import QtCore
+
+# Роль с «сырым» значением для сортировки (число файлов сортируется как число)
+SORT_ROLE = QtCore.Qt.UserRole + 1
+
+HEADERS = ['SKU', 'Файлов', 'Список файлов']
+
+
+class SkuTableModel(QtCore.QAbstractTableModel):
+    """Табличная модель поверх GroupResult.by_sku"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._skus: List[str] = []
+        self._files: Dict[str, list] = {}
+        self._names: Dict[str, str] = {}  # кэш строки «Список файлов» для уже показанных SKU
+
+    def set_grouped(self, grouped):
+        self.beginResetModel()
+        self._files = dict(grouped.by_sku) if grouped else {}
+        self._skus = sorted(self._files)
+        self._names = {}
+        self.endResetModel()
+
+    def skus(self) -> List[str]:
+        return self._skus
+
+    def sku_at(self, row: int) -> str:
+        return self._skus[row]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._skus)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def _file_names(self, sku: str) -> str:
+        names = self._names.get(sku)
+        if names is None:
+            names = ', '.join(os.path.basename(f.path) for f in self._files[sku])
+            self._names[sku] = names
+        return names
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        sku = self._skus[index.row()]
+        col = index.column()
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            if col == 0:
+                return sku
+            if col == 1:
+                return str(len(self._files[sku]))
+            return self._file_names(sku)
+        if role == SORT_ROLE:
+            if col == 1:
+                return len(self._files[sku])
+            return sku if col == 0 else self._file_names(sku)
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        """Сортировка списка ключей целиком в Python вместо сравнений через прокси"""
+        if column == 1:
+            key = lambda sku: (len(self._files[sku]), sku)
+        elif column == 2:
+            key = self._file_names
+        else:
+            key = None
+        self.layoutAboutToBeChanged.emit()
+        # Выделение и текущая строка представления должны остаться на своих SKU
+        persistent = self.persistentIndexList()
+        anchors = [(self._skus[i.row()], i.column()) for i in persistent]
+        self._skus.sort(key=key, reverse=order == QtCore.Qt.DescendingOrder)
+        if persistent:
+            rows = {sku: row for row, sku in enumerate(self._skus)}
+            self.changePersistentIndexList(persistent, [self.index(rows[sku], col) for sku, col in anchors])
+        self.layoutChanged.emit()
+
+
+class SkuFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """
+    Фильтр подстроки по SKU. Кандидаты берутся из пересечения множеств
+    по триграммам запроса, поэтому проверяются только подходящие SKU,
+    а уточнение запроса ищет внутри предыдущего результата.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._index: Optional[Dict[str, Set[str]]] = None
+        self._lower: Dict[str, str] = {}
+        self._text = ''
+        self._accepted: Optional[Set[str]] = None
+        self._skus: List[str] = []
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        self._skus = model.skus()
+        model.modelAboutToBeReset.connect(self._forget_rows)
+        model.modelReset.connect(self._drop_index)
+
+    def _forget_rows(self):
+        # Прокси перестраивает отображение раньше, чем дойдёт до _drop_index:
+        # к этому моменту старый список и множество отобранных SKU уже не годятся
+        self._skus = []
+        self._accepted = None
+
+    def _drop_index(self):
+        self._skus = self.sourceModel().skus()
+        self._index = None
+        self._lower = {}
+        text, self._text = self._text, ''
+        self._accepted = None
+        if text:
+            self.set_filter_text(text)
+
+    def _build_index(self):
+        index: Dict[str, Set[str]] = {}
+        for sku, low in self._lower.items():
+            for i in range(len(low) - 2):
+                index.setdefault(low[i:i + 3], set()).add(sku)
+        self._index = index
+
+    def _candidates(self, text: str) -> Set[str]:
+        if self._accepted is not None and self._text and self._text in text:
+            return self._accepted
+        if len(text) >= 3:
+            grams = sorted((self._index.get(text[i:i + 3], set()) for i in range(len(text) - 2)), key=len)
+            return set.intersection(*grams) if grams else set()
+        return set(self._lower)
+
+    def set_filter_text(self, text: str):
+        text = (text or '').strip().lower()
+        if text == self._text:
+            return
+        if not text:
+            accepted = None
+        else:
+            if not self._lower:
+                self._lower = {sku: sku.lower() for sku in self._skus}
+            if self._index is None and len(text) >= 3:
+                self._build_index()
+            lower = self._lower
+            accepted = {sku for sku in self._candidates(text) if text in lower[sku]}
+        self._text = text
+        if accepted == self._accepted:
+            return
+        self._accepted = accepted
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        # Вызывается Qt для каждой строки: только индекс списка и поиск в множестве
+        accepted = self._accepted
+        if accepted is None:
+            return True
+        skus = self._skus
+        return source_row < len(skus) and skus[source_row] in accepted
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        # Сортирует исходная модель, прокси только фильтрует
+        self.sourceModel().sort(column, order)
+
+    def sku_for(self, proxy_index) -> str:
+        return self.sourceModel().sku_at(self.mapToSource(proxy_index).row())
@@ -0,0 +1,214 @@
+"""
+Асинхронные миниатюры превью: декодирование в QThreadPool сразу в нужном
+размере, LRU-кэш в памяти и кэш PNG на диске по ключу (путь, mtime, размер).
+Соседние SKU можно подгружать заранее с низким приоритетом (prefetch).
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from PyQt5 import QtCore, QtGui
+
+from core.paths import get_data_dir
+
+THUMB_SIZE = 150
+MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+# Доля памяти, которую могут занимать ещё не показанные (предзагруженные) миниатюры
+PREFETCH_BUDGET_BYTES = 16 * 1024 * 1024
+
+PRIORITY_VISIBLE = 10
+PRIORITY_PREFETCH = 0
+
+
+def _file_key(path: str) -> Optional[Tuple[str, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return path, st.st_mtime_ns, st.st_size
+
+
+class _TaskSignals(QtCore.QObject):
+    # задача, картинка (QImage можно создавать вне GUI-потока, QPixmap — нельзя)
+    done = QtCore.pyqtSignal(object, object)
+    skipped = QtCore.pyqtSignal(object)
+
+
+class _DecodeTask(QtCore.QRunnable):
+    def __init__(self, path: str, cache_key: str, cache_path: str, size: int, signals: _TaskSignals,
+                 prefetch: bool = False):
+        super().__init__()
+        self.path = path
+        self.cache_key = cache_key
+        self.cache_path = cache_path
+        self.size = size
+        self.signals = signals
+        self.prefetch = prefetch
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            self.signals.skipped.emit(self)
+            return
+        image = QtGui.QImage()
+        if os.path.exists(self.cache_path):
+            image = QtGui.QImage(self.cache_path)
+        if image.isNull():
+            image = self._decode()
+            if not image.isNull():
+                self._store(image)
+        self.signals.done.emit(self, image)
+
+    def _decode(self) -> QtGui.QImage:
+        reader = QtGui.QImageReader(self.path)
+        reader.setAutoTransform(True)
+        src = reader.size()
+        if src.isValid():
+            # JPEG декодируется сразу в уменьшенном виде, без полного кадра в памяти
+            target = src.scaled(self.size, self.size, QtCore.Qt.KeepAspectRatio)
+            reader.setScaledSize(target)
+        image = reader.read()
+        if not image.isNull() and (image.width() > self.size or image.height() > self.size):
+            image = image.scaled(self.size, self.size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        return image
+
+    def _store(self, image: QtGui.QImage):
+        tmp = f"{self.cache_path}.{id(self)}.tmp"
+        try:
+            if image.save(tmp, 'PNG'):
+                os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+
+class ThumbnailService(QtCore.QObject):
+    """Выдаёт миниатюры из кэша или ставит их декодирование в фоне"""
+
+    ready = QtCore.pyqtSignal(str, QtGui.QPixmap)  # путь к файлу, миниатюра (null — не удалось)
+
+    def __init__(self, parent=None, size: int = THUMB_SIZE, memory_budget: int = MEMORY_BUDGET_BYTES,
+                 cache_dir: str = None, prefetch_budget: int = PREFETCH_BUDGET_BYTES):
+        super().__init__(parent)
+        self.size = size
+        self.memory_budget = memory_budget
+        self.prefetch_budget = prefetch_budget
+        self.cache_dir = cache_dir or get_data_dir('thumbs')
+        self._memory: "OrderedDict[str, Tuple[QtGui.QPixmap, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._prefetched: "OrderedDict[str, int]" = OrderedDict()  # ключ -> байты, ещё не показывались
+        self._prefetched_bytes = 0
+        self._pending: Dict[str, _DecodeTask] = {}  # ключ кэша -> задача в очереди
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max(2, QtCore.QThread.idealThreadCount() - 1))
+        self._signals = _TaskSignals()
+        self._signals.done.connect(self._on_done)
+        self._signals.skipped.connect(self._on_skipped)
+
+    def _cache_key(self, path: str) -> Optional[str]:
+        key = _file_key(path)
+        if key is None:
+            return None
+        raw = f"{key[0]}|{key[1]}|{key[2]}|{self.size}".encode('utf-8', 'surrogatepass')
+        return hashlib.sha1(raw).hexdigest()
+
+    def request(self, path: str) -> Optional[QtGui.QPixmap]:
+        """
+        Возвращает миниатюру, если она уже в памяти; иначе запускает
+        декодирование и вернёт результат сигналом ready.
+        """
+        cache_key = self._cache_key(path)
+        if cache_key is None:
+            return QtGui.QPixmap()
+        hit = self._memory.get(cache_key)
+        if hit is not None:
+            self._memory.move_to_end(cache_key)
+            self._forget_prefetched(cache_key)
+            return hit[0]
+        task = self._pending.get(cache_key)
+        if task is not None and task.prefetch:
+            # Уже ждёт в очереди предзагрузки — перезапускаем с высоким приоритетом
+            task.cancelled = True
+            task = None
+        if task is None:
+            self._start(path, cache_key, prefetch=False)
+        return None
+
+    def prefetch(self, paths: Iterable[str]):
+        """
+        Заранее декодирует миниатюры с низким приоритетом. Предзагрузки из
+        прошлого вызова, которых нет в новом списке, отменяются.
+        """
+        wanted = []
+        for path in paths:
+            cache_key = self._cache_key(path)
+            if cache_key is not None:
+                wanted.append((path, cache_key))
+        wanted_keys = {k for _, k in wanted}
+
+        for cache_key, task in list(self._pending.items()):
+            if task.prefetch and cache_key not in wanted_keys:
+                task.cancelled = True
+                del self._pending[cache_key]
+
+        estimate = self.size * self.size * 4
+        queued = sum(1 for t in self._pending.values() if t.prefetch)
+        room = (self.prefetch_budget - self._prefetched_bytes) // estimate - queued
+        for path, cache_key in wanted:
+            if room <= 0:
+                break
+            if cache_key in self._memory or cache_key in self._pending:
+                continue
+            self._start(path, cache_key, prefetch=True)
+            room -= 1
+
+    def cancel_prefetch(self):
+        self.prefetch(())
+
+    def _start(self, path: str, cache_key: str, prefetch: bool):
+        cache_path = os.path.join(self.cache_dir, cache_key + '.png')
+        task = _DecodeTask(path, cache_key, cache_path, self.size, self._signals, prefetch=prefetch)
+        self._pending[cache_key] = task
+        self._pool.start(task, PRIORITY_PREFETCH if prefetch else PRIORITY_VISIBLE)
+
+    def _on_skipped(self, task: _DecodeTask):
+        if self._pending.get(task.cache_key) is task:
+            del self._pending[task.cache_key]
+
+    def _on_done(self, task: _DecodeTask, image: QtGui.QImage):
+        if self._pending.get(task.cache_key) is task:
+            del self._pending[task.cache_key]
+        pixmap = QtGui.QPixmap.fromImage(image) if not image.isNull() else QtGui.QPixmap()
+        self._remember(task.cache_key, pixmap, task.prefetch)
+        if not task.prefetch:
+            self.ready.emit(task.path, pixmap)
+
+    def _remember(self, cache_key: str, pixmap: QtGui.QPixmap, prefetch: bool = False):
+        cost = max(1, pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8))
+        self._drop(cache_key)
+        self._memory[cache_key] = (pixmap, cost)
+        self._memory_bytes += cost
+        if prefetch:
+            self._prefetched[cache_key] = cost
+            self._prefetched_bytes += cost
+            while self._prefetched_bytes > self.prefetch_budget and len(self._prefetched) > 1:
+                self._drop(next(iter(self._prefetched)))
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            self._drop(next(iter(self._memory)))
+
+    def _drop(self, cache_key: str):
+        old = self._memory.pop(cache_key, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+        self._forget_prefetched(cache_key)
+
+    def _forget_prefetched(self, cache_key: str):
+        cost = self._prefetched.pop(cache_key, None)
+        if cost is not None:
+            self._prefetched_bytes -= cost
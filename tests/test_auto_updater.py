@@ -0,0 +1,58 @@
+import pytest
+
+from core import auto_updater
+
+SUMS_URL = 'https://example.invalid/download/v1.2.0/SHA256SUMS'
+DIGEST = 'ab' * 32
+RELEASE = {
+    'tag_name': 'v1.2.0',
+    'assets': [
+        {'name': 'WB_Auto.exe', 'browser_download_url': 'https://example.invalid/download/v1.2.0/WB_Auto.exe'},
+        {'name': 'SHA256SUMS', 'browser_download_url': SUMS_URL},
+    ],
+}
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def fetched(monkeypatch, tmp_path):
+    monkeypatch.setenv('WB_AUTO_DATA_DIR', str(tmp_path))
+    urls = []
+
+    def fake_get(url, **kwargs):
+        urls.append(url)
+        return _Response(f'{"cd" * 32}  other.exe\n{DIGEST} *WB_Auto.exe\n')
+
+    monkeypatch.setattr(auto_updater.requests, 'get', fake_get)
+    return urls
+
+
+def test_check_does_not_download_sums(fetched, monkeypatch):
+    checker = auto_updater.UpdateChecker()
+    monkeypatch.setattr(checker, 'fetch_release', lambda force=False: RELEASE)
+    info = checker.check_for_updates()
+    assert info['sha256'] is None
+    assert info['sha256_url'] == SUMS_URL
+    assert fetched == []
+
+
+def test_digest_field_needs_no_sums(fetched):
+    release = {'assets': [dict(RELEASE['assets'][0], digest='sha256:' + DIGEST), RELEASE['assets'][1]]}
+    checker = auto_updater.UpdateChecker()
+    assert checker.get_sha256(release) == DIGEST
+    assert checker.get_sha256_url(release) is None
+
+
+def test_downloader_resolves_sum_on_start(fetched):
+    downloader = auto_updater.UpdateDownloader(RELEASE['assets'][0]['browser_download_url'],
+                                               'WB_Auto_new.exe', sha256_url=SUMS_URL)
+    downloader._resolve_sha256()
+    assert downloader.sha256 == DIGEST
+    assert fetched == [SUMS_URL]
@@ -0,0 +1,57 @@
+import csv
+import os
+import signal
+import sys
+
+import pytest
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import yadisk_stub_server as stub  # noqa: E402
+from core import cli, yadisk_client  # noqa: E402
+
+
+@pytest.fixture
+def disk(monkeypatch, tmp_path):
+    server = stub.make_server(storage_dir=str(tmp_path / 'disk')).start_background()
+    # Адрес API читается адаптером сессии при каждом запросе
+    monkeypatch.setattr(yadisk_client, 'API_BASE', server.base_url)
+    monkeypatch.setenv('WB_AUTO_DATA_DIR', str(tmp_path / 'data'))
+    handler = signal.getsignal(signal.SIGINT)
+    yield server
+    signal.signal(signal.SIGINT, handler)
+    server.stop()
+
+
+def _catalog(folder, skus: int, photos: int = 2):
+    os.makedirs(folder)
+    for i in range(1, skus + 1):
+        for n in range(1, photos + 1):
+            with open(os.path.join(folder, f'SKU{i:02d}.{n}.jpg'), 'wb') as f:
+                f.write(os.urandom(256))
+    return folder
+
+
+def _run(argv):
+    args = cli.build_parser().parse_args(argv)
+    args.concurrency = max(1, args.concurrency)
+    return cli._run(args)
+
+
+def test_limit_reports_only_attempted_skus(disk, tmp_path):
+    folder = _catalog(str(tmp_path / 'photos'), skus=5)
+    out = tmp_path / 'out'
+    code = _run(['--token', 'stub', '--folder', folder, '--root', '/WB-test', '--out-dir', str(out),
+                 '--limit', '2', '--csv', '--quiet', '--no-history', '--no-sku-data'])
+    assert code == cli.EXIT_OK
+
+    report = next(p for p in out.iterdir() if p.name.startswith('upload_report_') and p.suffix == '.xlsx')
+    rows = list(load_workbook(report, read_only=True)['Сводка по SKU'].iter_rows(min_row=2, values_only=True))
+    # --limit берёт первые SKU в порядке сканирования: в отчёте ровно они, без «ошибок» по остальным
+    assert len(rows) == 2
+    assert len({r[0] for r in rows}) == 2
+
+    csv_report = next(p for p in out.iterdir() if p.suffix == '.csv')
+    with open(csv_report, encoding='utf-8') as f:
+        assert len(list(csv.reader(f))) == 1 + 2
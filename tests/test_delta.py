@@ -0,0 +1,124 @@
+import bz2
+import hashlib
+
+import pytest
+
+from core.delta import PatchError, apply_patch_file, bspatch, find_patch_asset
+
+
+def _offtout(value: int) -> bytes:
+    """Знаковое число в кодировке bsdiff: модуль little-endian, знак в старшем бите"""
+    raw = abs(value)
+    if value < 0:
+        raw |= 1 << 63
+    return raw.to_bytes(8, 'little')
+
+
+def make_patch(old: bytes, new: bytes, ops) -> bytes:
+    """
+    Патч BSDIFF40 по списку (add_len, copy_len, seek): первые add_len байт
+    берутся из old с текущей позиции как разность, следующие copy_len — из new
+    как есть, затем позиция в old сдвигается на seek
+    """
+    ctrl, diff, extra = b'', bytearray(), bytearray()
+    old_pos = new_pos = 0
+    for add_len, copy_len, seek in ops:
+        for i in range(add_len):
+            o = old[old_pos + i] if 0 <= old_pos + i < len(old) else 0
+            diff.append((new[new_pos + i] - o) % 256)
+        extra += new[new_pos + add_len:new_pos + add_len + copy_len]
+        ctrl += _offtout(add_len) + _offtout(copy_len) + _offtout(seek)
+        new_pos += add_len + copy_len
+        old_pos += add_len + seek
+    assert new_pos == len(new)
+    c, d, e = bz2.compress(ctrl), bz2.compress(bytes(diff)), bz2.compress(bytes(extra))
+    return b'BSDIFF40' + _offtout(len(c)) + _offtout(len(d)) + _offtout(len(new)) + c + d + e
+
+
+@pytest.fixture
+def versions():
+    old = bytes(range(256)) * 4 + b'HEADER-v1' + bytes([250, 251, 252, 253]) * 16
+    # Середина сдвинута, байты около 255 переполняются при сложении, хвост новый
+    new = old[:300] + b'inserted' + old[300:1024] + b'HEADER-v2' + bytes([4, 5, 6, 7]) * 16 + b'tail'
+    return old, new
+
+
+def test_round_trip(versions):
+    old, new = versions
+    patch = make_patch(old, new, [(300, 8, 0), (724, 0, 0), (9 + 64, 4, 0)])
+    assert bspatch(old, patch) == new
+
+
+def test_negative_seek_reuses_earlier_old_bytes():
+    old = b'abcdefghij' * 10
+    new = old[:50] + old[10:30] + b'!'
+    # После первых 50 байт вернуться в old на 40 назад (к позиции 10)
+    patch = make_patch(old, new, [(50, 0, -40), (20, 1, 0)])
+    assert bspatch(old, patch) == new
+
+
+def test_uint8_wraparound():
+    old = bytes([250, 255, 0, 128])
+    new = bytes([4, 0, 255, 127])
+    assert bspatch(old, make_patch(old, new, [(4, 0, 0)])) == new
+
+
+def test_add_beyond_old_end_uses_zero_bytes():
+    old = b'xyz'
+    new = b'xyz12345'
+    assert bspatch(old, make_patch(old, new, [(8, 0, 0)])) == new
+
+
+@pytest.mark.parametrize('cut', [8, 31, 40, -10])
+def test_truncated_patch(versions, cut):
+    old, new = versions
+    patch = make_patch(old, new, [(300, 8, 0), (724, 0, 0), (9 + 64, 4, 0)])
+    with pytest.raises(PatchError):
+        bspatch(old, patch[:cut])
+
+
+@pytest.mark.parametrize('header', [b'BSDIFF41', b'\x00' * 8, b'PK\x03\x04abcd'])
+def test_bad_magic(versions, header):
+    old, new = versions
+    patch = make_patch(old, new, [(len(new), 0, 0)])
+    with pytest.raises(PatchError):
+        bspatch(old, header + patch[8:])
+
+
+def test_negative_lengths_in_header(versions):
+    old, new = versions
+    patch = make_patch(old, new, [(len(new), 0, 0)])
+    with pytest.raises(PatchError):
+        bspatch(old, patch[:8] + _offtout(-1) + patch[16:])
+
+
+def test_control_block_out_of_bounds():
+    old, new = b'a' * 10, b'b' * 10
+    good = make_patch(old, new, [(10, 0, 0)])
+    # Заголовок обещает 20 байт результата, а управление описывает только 10
+    lying = good[:24] + _offtout(20) + good[32:]
+    with pytest.raises(PatchError):
+        bspatch(old, lying)
+
+
+def test_apply_patch_file_checks_hash(tmp_path, versions):
+    old, new = versions
+    old_path, patch_path, dest = tmp_path / 'old.exe', tmp_path / 'p.patch', tmp_path / 'new.exe'
+    old_path.write_bytes(old)
+    patch_path.write_bytes(make_patch(old, new, [(300, 8, 0), (724, 0, 0), (9 + 64, 4, 0)]))
+
+    with pytest.raises(PatchError):
+        apply_patch_file(str(old_path), str(patch_path), str(dest), '0' * 64)
+    assert not dest.exists()
+    with pytest.raises(PatchError):
+        apply_patch_file(str(old_path), str(patch_path), str(dest), None)
+
+    apply_patch_file(str(old_path), str(patch_path), str(dest), hashlib.sha256(new).hexdigest().upper())
+    assert dest.read_bytes() == new
+
+
+def test_find_patch_asset():
+    assets = [{'name': 'WB_Auto.exe'}, {'name': 'WB_Auto_1.2.0_to_1.3.0.patch'},
+              {'name': 'WB_Auto_1.1.0_to_1.3.0.patch'}]
+    assert find_patch_asset(assets, '1.1.0', '1.3.0') is assets[2]
+    assert find_patch_asset(assets, '1.0.0', '1.3.0') is None
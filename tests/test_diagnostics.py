@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from core import diagnostics
+
+
+@pytest.fixture
+def profiling(tmp_path):
+    diagnostics.configure(True, out_dir=str(tmp_path))
+    yield tmp_path
+    diagnostics.configure(False)
+
+
+def test_same_name_operations_keep_separate_profiles(profiling):
+    paths = []
+    for _ in range(3):
+        with diagnostics.profile_operation('scan') as session:
+            sum(range(1000))
+        paths.append(session.prof_path)
+    assert len(set(paths)) == 3
+    assert all(os.path.exists(p) for p in paths)
+    assert len(list(profiling.glob('*_scan*.txt'))) == 3
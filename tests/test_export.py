@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from core.export import _render_template
+
+
+SKUS = pd.Index(['A-1', 'LONG-SKU-22'], dtype=object)
+
+
+def _per_row(template, volume=330):
+    out = []
+    for sku in SKUS:
+        try:
+            out.append(template.format(sku=sku, volume=volume))
+        except Exception:
+            out.append(template)
+    return out
+
+
+@pytest.mark.parametrize('template', [
+    'Кружка {sku} {volume} мл',
+    '{sku}',
+    '{sku}-{sku} {{sku}}',
+    'без артикула {volume}',
+    'Кружка {sku:>12}',
+    'Кружка {sku!r}',
+    '{sku[0]}/{sku}',
+    '{volume:{sku}}',
+    'битый {sku',
+    '{unknown} {sku}',
+])
+def test_render_matches_per_row_format(template):
+    assert list(_render_template(template, SKUS, 330)) == _per_row(template)
+
+
+def test_render_empty_volume():
+    assert list(_render_template('{sku} {volume}мл', SKUS, None)) == ['A-1 мл', 'LONG-SKU-22 мл']
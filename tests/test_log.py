@@ -0,0 +1,39 @@
+import json
+import logging
+import sys
+
+from core import log
+
+
+def test_exception_traceback_reaches_json_file(tmp_path):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    path = log.setup_logging('INFO', log_dir=str(tmp_path), console_level='CRITICAL')
+    try:
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            logging.getLogger('test').exception('boom %d', 1)
+    finally:
+        log.shutdown_logging()
+        for h in root.handlers[:]:
+            if h not in handlers:
+                root.removeHandler(h)
+        root.setLevel(level)
+
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    record = next(r for r in records if r['msg'] == 'boom 1')
+    assert record['level'] == 'ERROR'
+    assert 'Traceback' in record['exc']
+    assert "ValueError: boom" in record['exc']
+
+
+def test_formatter_uses_exc_info_without_queue():
+    try:
+        raise KeyError('x')
+    except KeyError:
+        record = logging.getLogger('test').makeRecord('test', logging.ERROR, __file__, 1, 'm', None,
+                                                      sys.exc_info())
+    data = json.loads(log.JsonFormatter().format(record))
+    assert 'KeyError' in data['exc']
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtCore = pytest.importorskip('PyQt5.QtCore')
+from PyQt5 import QtWidgets  # noqa: E402
+
+from core.parser import GroupResult, PhotoFile  # noqa: E402
+from ui.sku_table import SkuFilterProxyModel, SkuTableModel  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _grouped(counts):
+    return GroupResult(by_sku={sku: [PhotoFile(f'{sku}.{n}.jpg', sku, n, '.jpg') for n in range(1, k + 1)]
+                               for sku, k in counts.items()}, warnings=[], errors=[])
+
+
+def _view(app, counts):
+    model = SkuTableModel()
+    proxy = SkuFilterProxyModel()
+    proxy.setSourceModel(model)
+    model.set_grouped(_grouped(counts))
+    view = QtWidgets.QTableView()
+    view.setModel(proxy)
+    view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+    view.setSortingEnabled(True)
+    view.sortByColumn(0, QtCore.Qt.AscendingOrder)
+    return model, proxy, view
+
+
+def test_sort_keeps_selection_on_same_sku(app):
+    model, proxy, view = _view(app, {'A': 1, 'B': 2, 'C': 3})
+    view.selectRow(0)
+    assert proxy.sku_for(view.currentIndex()) == 'A'
+    pinned = QtCore.QPersistentModelIndex(model.index(0, 0))
+
+    view.sortByColumn(0, QtCore.Qt.DescendingOrder)
+
+    assert model.skus() == ['C', 'B', 'A']
+    assert proxy.sku_for(view.currentIndex()) == 'A'
+    assert [proxy.sku_for(i) for i in view.selectionModel().selectedRows()] == ['A']
+    assert model.sku_at(pinned.row()) == 'A'
+
+
+def test_sort_by_file_count_moves_persistent_indexes(app):
+    model, proxy, view = _view(app, {'A': 3, 'B': 1, 'C': 2})
+    view.selectRow(1)  # B
+    view.sortByColumn(1, QtCore.Qt.AscendingOrder)
+    assert model.skus() == ['B', 'C', 'A']
+    assert proxy.sku_for(view.currentIndex()) == 'B'
+    assert view.currentIndex().row() == 0
+
+
+def test_reset_to_larger_model_with_active_filter(app):
+    model, proxy, view = _view(app, {f's{i}': 1 for i in range(10)})
+    proxy.set_filter_text('s1')
+    assert proxy.rowCount() == 1
+
+    model.set_grouped(_grouped({f's{i}': 1 for i in range(20)}))
+
+    shown = sorted(proxy.sku_for(proxy.index(r, 0)) for r in range(proxy.rowCount()))
+    assert shown == sorted(['s1'] + [f's{i}' for i in range(10, 20)])
+    # Уточнение запроса после сброса ищет уже в новом списке
+    proxy.set_filter_text('s19')
+    assert [proxy.sku_for(proxy.index(r, 0)) for r in range(proxy.rowCount())] == ['s19']
+
+
+def test_reset_to_smaller_model_with_active_filter(app):
+    model, proxy, view = _view(app, {f's{i}': 1 for i in range(20)})
+    proxy.set_filter_text('s1')
+    model.set_grouped(_grouped({'s1': 1, 'x': 1}))
+    assert [proxy.sku_for(proxy.index(r, 0)) for r in range(proxy.rowCount())] == ['s1']
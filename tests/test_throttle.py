@@ -0,0 +1,144 @@
+from datetime import datetime
+
+import pytest
+
+from core import throttle
+from core.throttle import (ScheduleWindow, TokenBucket, UploadLimiter, limiter_from_profile,
+                           parse_schedule)
+
+
+class FakeClock:
+    """monotonic и sleep без реального ожидания: sleep только сдвигает время"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _bucket(kbps, clock):
+    return TokenBucket(kbps * 1024, monotonic=clock.monotonic, sleep=clock.sleep)
+
+
+def test_burst_after_idle_is_capped():
+    clock = FakeClock()
+    bucket = _bucket(100, clock)
+    clock.now += 60  # долгий простой копит не больше capacity
+    assert bucket.capacity == max(100 * 1024 * throttle.BURST_S, throttle.MIN_BURST_BYTES)
+    assert bucket.consume(int(bucket.capacity)) == 0
+    assert clock.sleeps == []
+    assert bucket.consume(100 * 1024) == pytest.approx(1.0)
+
+
+def test_debt_accumulates_between_consumers():
+    clock = FakeClock()
+    bucket = _bucket(100, clock)
+    # Два потока читают одновременно: первый ещё не доспал (abort прерывает ожидание
+    # сразу), второй досыпает и свой долг, и долг первого
+    assert bucket.consume(50 * 1024, abort=lambda: True) == pytest.approx(0.5)
+    assert bucket.consume(50 * 1024) == pytest.approx(1.0)
+    assert sum(clock.sleeps) == pytest.approx(1.0)
+
+
+def test_sleep_is_sliced():
+    clock = FakeClock()
+    bucket = _bucket(100, clock)
+    bucket.consume(100 * 1024)
+    assert max(clock.sleeps) <= throttle.SLEEP_SLICE_S
+    assert sum(clock.sleeps) == pytest.approx(1.0)
+    assert len(clock.sleeps) == 4
+
+
+def test_abort_stops_waiting_after_a_slice():
+    clock = FakeClock()
+    bucket = _bucket(10, clock)
+    calls = []
+
+    def abort():
+        calls.append(1)
+        return len(calls) > 1
+
+    assert bucket.consume(10 * 1024 * 5, abort) == pytest.approx(5.0)
+    assert clock.sleeps == [throttle.SLEEP_SLICE_S]
+
+
+def test_zero_rate_is_unlimited():
+    clock = FakeClock()
+    bucket = _bucket(0, clock)
+    assert bucket.consume(10 ** 9) == 0
+    assert clock.sleeps == []
+
+
+def test_lowering_rate_clamps_saved_tokens():
+    clock = FakeClock()
+    bucket = _bucket(10_000, clock)
+    clock.now += 10
+    bucket.set_rate(100 * 1024)
+    assert bucket.consume(int(bucket.capacity)) == 0
+    assert bucket.consume(1024) > 0
+
+
+@pytest.mark.parametrize('minute,inside', [
+    (22 * 60, True), (23 * 60 + 30, True), (0, True), (5 * 60 + 59, True),
+    (6 * 60, False), (12 * 60, False), (21 * 60 + 59, False),
+])
+def test_window_wrapping_past_midnight(minute, inside):
+    assert ScheduleWindow(22 * 60, 6 * 60, 0).contains(minute) is inside
+
+
+def test_parse_schedule_string_and_profile_forms():
+    expected = [ScheduleWindow(540, 1140, 1024.0), ScheduleWindow(1140, 540, 0.0)]
+    assert parse_schedule('09:00-19:00=1024, 19:00-09:00=0') == expected
+    assert parse_schedule('09:00-19:00=1024;19:00-09:00=0') == expected
+    assert parse_schedule([{'from': '09:00', 'to': '19:00', 'kbps': 1024},
+                           {'from': '19:00', 'to': '09:00'}]) == expected
+    assert parse_schedule('') == [] and parse_schedule(None) == []
+    assert parse_schedule('18:00-24:00=5') == [ScheduleWindow(1080, 1440, 5.0)]
+
+
+@pytest.mark.parametrize('spec', ['9-19', '09:00=5', '25:00-01:00=1', '09:60-10:00=1',
+                                  '09:00-10:00=-5', '09:00-10:00=fast'])
+def test_parse_schedule_rejects_bad_windows(spec):
+    with pytest.raises(ValueError):
+        parse_schedule(spec)
+
+
+def test_limiter_follows_schedule_over_midnight():
+    clock = FakeClock()
+    wall = [datetime(2026, 1, 1, 21, 59)]
+    limiter = UploadLimiter(256, parse_schedule('22:00-06:00=0,12:00-13:00=64'), clock=lambda: wall[0],
+                            monotonic=clock.monotonic, sleep=clock.sleep)
+    assert limiter.current_kbps(datetime(2026, 1, 1, 23, 0)) == 0
+    assert limiter.current_kbps(datetime(2026, 1, 2, 3, 0)) == 0
+    assert limiter.current_kbps(datetime(2026, 1, 2, 12, 30)) == 64
+    assert limiter.current_kbps(datetime(2026, 1, 2, 9, 0)) == 256
+
+    assert limiter.throttle(512 * 1024) > 0
+    # Ночное окно без ограничения вступает в силу при следующей сверке с расписанием
+    wall[0] = datetime(2026, 1, 1, 22, 1)
+    clock.now += throttle.SCHEDULE_CHECK_S
+    clock.sleeps.clear()
+    assert limiter.throttle(512 * 1024) == 0
+    assert clock.sleeps == []
+
+
+class _Profile(dict):
+    pass
+
+
+def test_limiter_from_profile_and_overrides():
+    assert limiter_from_profile(None) is None
+    assert limiter_from_profile(_Profile(upload_limit_kbps=0)) is None
+    profile = _Profile(upload_limit_kbps=512, upload_schedule=[{'from': '09:00', 'to': '18:00', 'kbps': 128}])
+    limiter = limiter_from_profile(profile)
+    assert limiter.limit_kbps == 512 and len(limiter.schedule) == 1
+    assert limiter.describe() == '512 КБ/с, 09:00-18:00 128 КБ/с'
+    # Явные значения из cli.py важнее профиля; 0 снимает ограничение
+    assert limiter_from_profile(profile, 0, '') is None
+    assert limiter_from_profile(profile, 64, None).limit_kbps == 64
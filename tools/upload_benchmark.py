@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сквозной замер скорости загрузки: синтетический каталог фото → run_uploads
+(тот же прогон, что у Worker в окне и у cli.py) → сводка по каждому сочетанию
+параметров.
+
+По умолчанию поднимает в процессе эмулятор Яндекс.Диска (tools/yadisk_stub_server.py)
+с заданной задержкой и скоростью; --api направляет прогон на внешний сервер
+(другой эмулятор или настоящий API с --token).
+
+    python tools/upload_benchmark.py --skus 50 --photos 4 --concurrency 1,2,4,8 --file-kb 200,2000
+    python tools/upload_benchmark.py --compare benchmarks/a1b2c3d.json benchmarks/e4f5a6b.json
+
+Результат — JSON (коммит, параметры, SKU/с, МБ/с, p50/p95/p99 времени файла,
+запросов API на файл) и таблица; --compare сводит несколько JSON в одну таблицу.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import yadisk_stub_server as stub  # noqa: E402
+
+# Показатели в таблице сравнения: (ключ, подпись, больше — лучше)
+COMPARE_METRICS = [
+    ('sku_per_min', 'SKU/мин', True),
+    ('mb_per_s', 'МБ/с', True),
+    ('p95_s', 'p95 файла, с', False),
+    ('api_calls_per_file', 'API/файл', False),
+]
+
+
+def _git_commit() -> Dict[str, object]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+    except Exception:
+        commit, dirty = 'unknown', False
+    return {'commit': commit, 'dirty': dirty}
+
+
+def make_catalog(folder: str, skus: int, photos: int, file_kb: int, seed: int = 0) -> str:
+    """Папка с файлами «BENCH-00001.1.jpg» и т.д.; содержимое — случайные байты"""
+    import random
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    size = file_kb * 1024
+    for i in range(1, skus + 1):
+        for n in range(1, photos + 1):
+            with open(os.path.join(folder, f'BENCH-{i:05d}.{n}.jpg'), 'wb') as f:
+                f.write(rng.randbytes(size))
+    return folder
+
+
+def _parse_list(value: str, cast=int) -> list:
+    return [cast(v) for v in str(value).split(',') if v.strip()]
+
+
+class _Keyring:
+    """keyring-заглушка: токен бенчмарка не сохраняется в системное хранилище"""
+
+    def __init__(self, token: str):
+        self.token = token
+
+    def set_password(self, *args):
+        pass
+
+    def get_password(self, *args):
+        return self.token
+
+
+def run_case(grouped, token: str, root: str, concurrency: int, overwrite: str, max_photos: int,
+             server: Optional['stub.StubServer'], seed_first: bool) -> dict:
+    """Один прогон; при seed_first папка сначала заполняется непомеченным прогоном"""
+    from core.perf import percentile
+    from core.pipeline import run_uploads
+
+    keyring = _Keyring(token)
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        if seed_first:
+            run_uploads(grouped, token, root, 'never', max_photos, concurrency=concurrency, keyring=keyring)
+        before = server.stats.snapshot() if server else None
+        outcome = run_uploads(grouped, token, root, overwrite, max_photos, concurrency=concurrency, keyring=keyring)
+        after = server.stats.snapshot() if server else None
+
+    wall = max(outcome.finished_at - outcome.started_at, 1e-9)
+    files = len(outcome.metrics)
+    latencies = sorted(m.finished_at - m.started_at for m in outcome.metrics)
+    uploaded = sum(m.uploaded_bytes for m in outcome.metrics)
+    done_skus = len(outcome.results)
+    api_calls = None
+    injected = None
+    if before is not None:
+        # Запросы к API без скачиваний по готовым ссылкам
+        calls = {k: after['requests'].get(k, 0) - before['requests'].get(k, 0) for k in after['requests']}
+        api_calls = sum(v for k, v in calls.items() if not k.startswith('GET /download'))
+        injected = {k: after['injected'].get(k, 0) - before['injected'].get(k, 0) for k in after['injected']}
+    return {
+        'concurrency': concurrency,
+        'overwrite': overwrite,
+        'skus': len(grouped.by_sku),
+        'skus_done': done_skus,
+        'files': files,
+        'uploaded_files': sum(1 for m in outcome.metrics if m.action == 'upload'),
+        'uploaded_mb': round(uploaded / 1024 / 1024, 3),
+        'wall_s': round(wall, 3),
+        'sku_per_s': round(done_skus / wall, 3),
+        'sku_per_min': round(done_skus / wall * 60, 2),
+        'mb_per_s': round(uploaded / 1024 / 1024 / wall, 3),
+        'p50_s': round(percentile(latencies, 50), 3),
+        'p95_s': round(percentile(latencies, 95), 3),
+        'p99_s': round(percentile(latencies, 99), 3),
+        'retries': sum(m.retries for m in outcome.metrics),
+        'api_calls': api_calls,
+        'api_calls_per_file': round(api_calls / files, 2) if api_calls is not None and files else None,
+        'injected': injected,
+    }
+
+
+def case_key(case: dict) -> str:
+    key = f"c={case['concurrency']} {case['file_kb']}КБ {case['overwrite']}"
+    return key + ' повтор' if case.get('existing') else key
+
+
+def print_table(rows: List[List[str]], headers: List[str]):
+    widths = [max(len(str(x)) for x in col) for col in zip(headers, *rows)]
+    line = '  '.join(h.ljust(w) for h, w in zip(headers, widths))
+    print(line)
+    print('-' * len(line))
+    for row in rows:
+        print('  '.join(str(x).ljust(w) for x, w in zip(row, widths)))
+
+
+def print_results(result: dict):
+    headers = ['Случай', 'SKU/мин', 'МБ/с', 'p50, с', 'p95, с', 'p99, с', 'API/файл', 'Повторы']
+    rows = [[case_key(c), c['sku_per_min'], c['mb_per_s'], c['p50_s'], c['p95_s'], c['p99_s'],
+             c['api_calls_per_file'] if c['api_calls_per_file'] is not None else '—', c['retries']]
+            for c in result['cases']]
+    print_table(rows, headers)
+
+
+def compare(paths: List[str]):
+    """Таблица по нескольким JSON: значения каждого коммита и изменение к первому"""
+    results = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            results.append(json.load(f))
+    labels = [r['commit'] + ('*' if r.get('dirty') else '') for r in results]
+    keys = []
+    for r in results:
+        for c in r['cases']:
+            if case_key(c) not in keys:
+                keys.append(case_key(c))
+    for metric, title, higher_better in COMPARE_METRICS:
+        print(f"\n{title}")
+        rows = []
+        for key in keys:
+            values = [next((c.get(metric) for c in r['cases'] if case_key(c) == key), None) for r in results]
+            row = [key]
+            base = values[0]
+            for i, v in enumerate(values):
+                if v is None:
+                    row.append('—')
+                elif i == 0 or not base:
+                    row.append(str(v))
+                else:
+                    delta = (v - base) / base * 100
+                    mark = '' if abs(delta) < 5 else ('▲' if (delta > 0) == higher_better else '▼')
+                    row.append(f"{v} ({delta:+.0f}%{mark})")
+            rows.append(row)
+        print_table(rows, ['Случай'] + labels)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Замер скорости загрузки SKU')
+    parser.add_argument('--skus', type=int, default=20, help='SKU в синтетическом каталоге')
+    parser.add_argument('--photos', type=int, default=4, help='Фото на SKU')
+    parser.add_argument('--file-kb', default='500', help='Размеры файлов через запятую, КБ')
+    parser.add_argument('--concurrency', default='1,2,4', help='Значения параллельности через запятую')
+    parser.add_argument('--overwrite', default='never', help='Режимы перезаписи через запятую: never,changed,always')
+    parser.add_argument('--existing', action='store_true',
+                        help='Перед замером заполнить папку на диске, чтобы проверить повторный прогон')
+    parser.add_argument('--api', help='Адрес внешнего API вместо встроенного эмулятора')
+    parser.add_argument('--token', default='benchmark', help='OAuth-токен для --api')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Эмулятор: задержка ответа, мс')
+    parser.add_argument('--bandwidth-kbps', type=float, default=0, help='Эмулятор: скорость передачи на запрос, КБ/с')
+    parser.add_argument('--error-rate', type=float, default=0, help='Эмулятор: доля ответов 5xx')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='Эмулятор: доля ответов 429')
+    parser.add_argument('--seed', type=int, default=1, help='Зерно для каталога и ошибок эмулятора')
+    parser.add_argument('--out', help='Куда сохранить JSON (по умолчанию benchmarks/<коммит>_<время>.json)')
+    parser.add_argument('--compare', nargs='+', metavar='JSON', help='Сравнить сохранённые результаты и выйти')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.compare:
+        compare(args.compare)
+        return 0
+
+    server = None
+    if args.api:
+        os.environ['WB_AUTO_YADISK_API'] = args.api
+    else:
+        config = stub.StubConfig(latency_ms=args.latency_ms, bandwidth_kbps=args.bandwidth_kbps,
+                                 error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=args.seed)
+        server = stub.make_server(config=config).start_background()
+        os.environ['WB_AUTO_YADISK_API'] = server.base_url
+    # Адрес API читается при импорте клиента, поэтому core импортируется только здесь
+    from core.parser import group_photos_flat
+
+    workdir = tempfile.mkdtemp(prefix='wb_bench_')
+    info = _git_commit()
+    result = {
+        **info,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.api or 'stub',
+        'params': {k: v for k, v in vars(args).items() if k not in ('compare', 'out', 'token')},
+        'cases': [],
+    }
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    try:
+        for file_kb in _parse_list(args.file_kb):
+            folder = make_catalog(os.path.join(workdir, f'{file_kb}kb'), args.skus, args.photos, file_kb, args.seed)
+            grouped = group_photos_flat(folder)
+            for concurrency, overwrite in itertools.product(_parse_list(args.concurrency),
+                                                            _parse_list(args.overwrite, str)):
+                root = f"/wb-bench-{stamp}-{file_kb}kb-c{concurrency}-{overwrite}"
+                print(f"⏱️ {file_kb} КБ × {args.skus * args.photos} файлов, параллельно {concurrency}, {overwrite}…",
+                      flush=True)
+                case = run_case(grouped, args.token, root, concurrency, overwrite, args.photos, server, args.existing)
+                case['file_kb'] = file_kb
+                case['existing'] = args.existing
+                result['cases'].append(case)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if server:
+            server.stop()
+
+    out = args.out or os.path.join(ROOT_DIR, 'benchmarks', f"{info['commit']}_{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print()
+    print_results(result)
+    print(f"\n💾 {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Локальный эмулятор REST API Яндекс.Диска для тестов и замеров загрузки без сети.
+
+Поддерживает то, чем пользуется core/yadisk_client: информацию о диске (проверка
+токена), метаданные и листинг ресурсов, создание папок, ссылки на загрузку и сам
+PUT файла, публикацию, публичные ресурсы и скачивание. Файлы лежат во временной
+(или заданной) папке. Можно добавить задержку, ограничить скорость передачи
+и случайно отвечать ошибками 5xx и 429.
+
+    python tools/yadisk_stub_server.py --port 8765 --latency-ms 50 --bandwidth-kbps 2048
+    set WB_AUTO_YADISK_API=http://127.0.0.1:8765
+    python cli.py --token stub --folder D:/photos/batch1
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+# В ссылках-объектах отдаём адрес настоящего API: клиент их не запрашивает,
+# а библиотека yadisk разбирает путь по этому префиксу
+REAL_API = "https://cloud-api.yandex.net"
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0            # задержка перед каждым ответом
+    bandwidth_kbps: float = 0        # ограничение скорости загрузки и скачивания на запрос, 0 — без ограничения
+    error_rate: float = 0            # доля запросов API, отвечающих 500/503
+    throttle_rate: float = 0         # доля запросов API, отвечающих 429
+    upload_error_rate: float = 0     # доля PUT файлов, обрывающихся ошибкой 500
+    retry_after_s: int = 1
+    token: Optional[str] = None      # если задан, другие токены получают 401
+    seed: Optional[int] = None
+
+
+class StubStats:
+    """Счётчики запросов для проверки и отчётов бенчмарка"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.injected = {}
+        self.bytes_uploaded = 0
+        self.bytes_downloaded = 0
+
+    def hit(self, key: str):
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def inject(self, key: str):
+        with self._lock:
+            self.injected[key] = self.injected.get(key, 0) + 1
+
+    def add_bytes(self, uploaded: int = 0, downloaded: int = 0):
+        with self._lock:
+            self.bytes_uploaded += uploaded
+            self.bytes_downloaded += downloaded
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'injected': dict(self.injected),
+                'bytes_uploaded': self.bytes_uploaded,
+                'bytes_downloaded': self.bytes_downloaded,
+            }
+
+
+class DiskState:
+    """Файлы диска в локальной папке и реестр публикаций"""
+
+    def __init__(self, storage_dir: str):
+        self.storage_dir = storage_dir
+        self.lock = threading.Lock()
+        self.public = {}          # public_key -> путь на диске
+        self.public_by_path = {}  # путь на диске -> public_key
+        self.pending_uploads = {}  # id загрузки -> (путь, overwrite)
+        self.operations = set()    # id завершённых загрузок
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        path = (path or '/').strip()
+        if path.startswith('disk:'):
+            path = path[5:]
+        path = '/' + path.strip('/')
+        return path
+
+    def local(self, path: str) -> str:
+        parts = [p for p in self.normalize(path).split('/') if p not in ('', '.', '..')]
+        return os.path.join(self.storage_dir, *parts)
+
+    def resource(self, path: str, limit: int = 20, offset: int = 0, base: str = '') -> Optional[dict]:
+        path = self.normalize(path)
+        local = self.local(path)
+        if not os.path.exists(local):
+            return None
+        st = os.stat(local)
+        modified = datetime.fromtimestamp(int(st.st_mtime), timezone.utc).isoformat()
+        name = os.path.basename(local) if path != '/' else 'disk'
+        data = {
+            'path': 'disk:' + path,
+            'name': name,
+            'created': modified,
+            'modified': modified,
+            'resource_id': hashlib.md5(path.encode('utf-8')).hexdigest(),
+        }
+        public_key = self.public_by_path.get(path)
+        if public_key:
+            data['public_key'] = public_key
+            data['public_url'] = self.public_url(base, public_key)
+        if os.path.isdir(local):
+            data['type'] = 'dir'
+            children = sorted(os.listdir(local))
+            items = [self.resource(path.rstrip('/') + '/' + c, base=base) for c in children[offset:offset + limit]]
+            data['_embedded'] = {
+                'path': 'disk:' + path,
+                'items': [i for i in items if i],
+                'limit': limit,
+                'offset': offset,
+                'total': len(children),
+                'sort': '',
+            }
+        else:
+            data['type'] = 'file'
+            data['size'] = st.st_size
+            data['mime_type'] = 'application/octet-stream'
+            data['media_type'] = 'image'
+            if public_key:
+                data['file'] = f"{base}/download/{public_key}"
+        return data
+
+    @staticmethod
+    def public_url(base: str, public_key: str) -> str:
+        return f"{base}/d/{public_key}"
+
+    def publish(self, path: str) -> str:
+        path = self.normalize(path)
+        with self.lock:
+            key = self.public_by_path.get(path)
+            if key is None:
+                key = uuid.uuid4().hex[:14]
+                self.public[key] = path
+                self.public_by_path[path] = key
+            return key
+
+    def resolve_public(self, public_key: str) -> Optional[str]:
+        """Путь по public_key или по публичной ссылке целиком"""
+        key = public_key.rstrip('/').split('/d/')[-1].split('?')[0]
+        return self.public.get(key)
+
+
+def _link(path: str, method: str = 'GET') -> dict:
+    return {
+        'href': f"{REAL_API}/v1/disk/resources?" + urlencode({'path': 'disk:' + DiskState.normalize(path)}),
+        'method': method,
+        'templated': False,
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'YaDiskStub/1.0'
+
+    # Заполняются в make_server
+    state: DiskState = None
+    config: StubConfig = None
+    stats: StubStats = None
+    rng: random.Random = None
+
+    def log_message(self, format, *args):
+        if getattr(self.server, 'verbose', False):
+            super().log_message(format, *args)
+
+    @property
+    def base(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # --- ответы ---
+
+    def _send_json(self, status: int, data: dict, headers: Optional[dict] = None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, error: str, message: str = '', headers: Optional[dict] = None):
+        self._send_json(status, {'error': error, 'message': message or error, 'description': message or error},
+                        headers)
+
+    def _throttled_write(self, data: bytes):
+        rate = self.config.bandwidth_kbps * 1024
+        for i in range(0, len(data), CHUNK_SIZE):
+            chunk = data[i:i + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            if rate > 0:
+                time.sleep(len(chunk) / rate)
+
+    def _read_body(self) -> bytes:
+        """Тело запроса с учётом chunked и ограничения скорости"""
+        rate = self.config.bandwidth_kbps * 1024
+        parts = []
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+                if rate > 0:
+                    time.sleep(size / rate)
+        else:
+            remaining = int(self.headers.get('Content-Length') or 0)
+            while remaining > 0:
+                chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                parts.append(chunk)
+                remaining -= len(chunk)
+                if rate > 0:
+                    time.sleep(len(chunk) / rate)
+        return b''.join(parts)
+
+    # --- разбор запроса ---
+
+    def _route(self, method: str):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        route = url.path.rstrip('/') or '/'
+        self.stats.hit(f"{method} {route if not route.startswith(('/upload/', '/download/')) else route.rsplit('/', 1)[0]}")
+
+        if self.config.latency_ms:
+            time.sleep(self.config.latency_ms / 1000)
+
+        if route.startswith('/upload/'):
+            return self._upload_target(method, route.rsplit('/', 1)[-1])
+        if route.startswith('/download/'):
+            return self._download(method, route.rsplit('/', 1)[-1])
+
+        if not route.startswith('/v1/disk'):
+            return self._error(404, 'NotFoundError', 'Unknown endpoint')
+        # Публичные ресурсы, как и в настоящем API, доступны без токена
+        if not route.startswith('/v1/disk/public/') and not self._authorized():
+            return self._error(401, 'UnauthorizedError', 'Unauthorized')
+        if self._inject():
+            return
+
+        if method == 'GET' and route.startswith('/v1/disk/operations/'):
+            return self._operation(route.rsplit('/', 1)[-1])
+
+        handler = {
+            ('GET', '/v1/disk'): self._disk_info,
+            ('GET', '/v1/disk/resources'): self._get_meta,
+            ('PUT', '/v1/disk/resources'): self._mkdir,
+            ('DELETE', '/v1/disk/resources'): self._delete,
+            ('GET', '/v1/disk/resources/upload'): self._upload_link,
+            ('PUT', '/v1/disk/resources/publish'): self._publish,
+            ('GET', '/v1/disk/public/resources'): self._public_resource,
+            ('GET', '/v1/disk/public/resources/download'): self._public_download_link,
+        }.get((method, route))
+        if handler is None:
+            return self._error(405 if route.startswith('/v1/disk') else 404, 'MethodNotAllowedError',
+                               f'{method} {route} is not supported by the stub')
+        return handler(query)
+
+    def _authorized(self) -> bool:
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('OAuth '):
+            return False
+        return self.config.token is None or auth[6:] == self.config.token
+
+    def _inject(self) -> bool:
+        """Случайные 429 и 5xx для проверки повторов клиента"""
+        roll = self.rng.random()
+        if roll < self.config.throttle_rate:
+            self.stats.inject('429')
+            self._error(429, 'TooManyRequestsError', 'Too Many Requests',
+                        {'Retry-After': str(self.config.retry_after_s)})
+            return True
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            status = self.rng.choice((500, 503))
+            self.stats.inject(str(status))
+            self._error(status, 'InternalServerError' if status == 500 else 'ServiceUnavailableError',
+                        'Injected failure')
+            return True
+        return False
+
+    # --- обработчики API ---
+
+    def _disk_info(self, query):
+        self._send_json(200, {'total_space': 10 * 1024 ** 4, 'used_space': 0, 'trash_size': 0,
+                              'is_paid': False, 'system_folders': {}, 'user': {'login': 'stub'}})
+
+    def _operation(self, operation_id: str):
+        # Загрузки завершаются синхронно; неизвестный id — так yadisk проверяет токен
+        with self.state.lock:
+            known = operation_id in self.state.operations
+        if not known:
+            return self._error(404, 'DiskOperationNotFoundError', 'Operation not found')
+        self._send_json(200, {'status': 'success'})
+
+    def _get_meta(self, query):
+        data = self.state.resource(query.get('path'), limit=int(query.get('limit', 20)),
+                                   offset=int(query.get('offset', 0)), base=self.base)
+        if data is None:
+            return self._error(404, 'DiskNotFoundError', 'Resource not found')
+        self._send_json(200, data)
+
+    def _mkdir(self, query):
+        path = query.get('path')
+        local = self.state.local(path)
+        if os.path.exists(local):
+            return self._error(409, 'DiskPathPointsToExistentDirectoryError', 'Path exists')
+        if not os.path.isdir(os.path.dirname(local)):
+            return self._error(409, 'DiskPathDoesntExistsError', 'Parent not found')
+        os.mkdir(local)
+        self._send_json(201, _link(path))
+
+    def _delete(self, query):
+        local = self.state.local(query.get('path'))
+        if not os.path.exists(local):
+            return self._error(404, 'DiskNotFoundError', 'Resource not found')
+        if os.path.isdir(local):
+            shutil.rmtree(local)
+        else:
+            os.remove(local)
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _upload_link(self, query):
+        path = query.get('path')
+        overwrite = query.get('overwrite', 'false').lower() == 'true'
+        local = self.state.local(path)
+        if not os.path.isdir(os.path.dirname(local)):
+            return self._error(409, 'DiskPathDoesntExistsError', 'Parent not found')
+        if os.path.exists(local) and not overwrite:
+            return self._error(409, 'DiskResourceAlreadyExistsError', 'Resource already exists')
+        upload_id = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.pending_uploads[upload_id] = (path, overwrite)
+        self._send_json(200, {'href': f"{self.base}/upload/{upload_id}", 'method': 'PUT',
+                              'templated': False, 'operation_id': upload_id})
+
+    def _publish(self, query):
+        path = query.get('path')
+        if not os.path.exists(self.state.local(path)):
+            return self._error(404, 'DiskNotFoundError', 'Resource not found')
+        self.state.publish(path)
+        self._send_json(200, _link(path))
+
+    def _public_resource(self, query):
+        path = self.state.resolve_public(query.get('public_key', ''))
+        if path is None:
+            return self._error(404, 'DiskNotFoundError', 'Resource not found')
+        data = self.state.resource(path, base=self.base)
+        self._send_json(200, data)
+
+    def _public_download_link(self, query):
+        key = query.get('public_key', '')
+        path = self.state.resolve_public(key)
+        if path is None:
+            return self._error(404, 'DiskNotFoundError', 'Resource not found')
+        self._send_json(200, {'href': f"{self.base}/download/{self.state.public_by_path[path]}",
+                              'method': 'GET', 'templated': False})
+
+    # --- передача файлов ---
+
+    def _upload_target(self, method: str, upload_id: str):
+        if method != 'PUT':
+            return self._error(405, 'MethodNotAllowedError', 'Use PUT')
+        with self.state.lock:
+            pending = self.state.pending_uploads.pop(upload_id, None)
+        body = self._read_body()
+        if pending is None:
+            return self._error(404, 'NotFoundError', 'Unknown upload link')
+        if self.rng.random() < self.config.upload_error_rate:
+            self.stats.inject('upload_500')
+            return self._error(500, 'InternalServerError', 'Injected upload failure')
+        path, overwrite = pending
+        local = self.state.local(path)
+        if os.path.exists(local) and not overwrite:
+            return self._error(409, 'DiskResourceAlreadyExistsError', 'Resource already exists')
+        tmp = f"{local}.{upload_id}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, local)
+        with self.state.lock:
+            self.state.operations.add(upload_id)
+        self.stats.add_bytes(uploaded=len(body))
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _download(self, method: str, public_key: str):
+        path = self.state.public.get(public_key)
+        if path is None or method != 'GET' or not os.path.isfile(self.state.local(path)):
+            return self._error(404, 'NotFoundError', 'File not found')
+        with open(self.state.local(path), 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self._throttled_write(data)
+        self.stats.add_bytes(downloaded=len(data))
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_PUT(self):
+        self._route('PUT')
+
+    def do_DELETE(self):
+        self._route('DELETE')
+
+    def do_HEAD(self):
+        self._error(405, 'MethodNotAllowedError', 'HEAD is not supported')
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler, state: DiskState, stats: StubStats, verbose: bool = False):
+        super().__init__(address, handler)
+        self.state = state
+        self.stats = stats
+        self.verbose = verbose
+        self._tempdir = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_background(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self.serve_forever, name='yadisk-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._tempdir:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+
+
+def make_server(host: str = '127.0.0.1', port: int = 0, storage_dir: Optional[str] = None,
+                config: Optional[StubConfig] = None, verbose: bool = False) -> StubServer:
+    """
+    Создаёт сервер эмулятора (port=0 — свободный порт). Без storage_dir файлы
+    хранятся во временной папке, которая удаляется в stop().
+    """
+    config = config or StubConfig()
+    tempdir = None
+    if storage_dir is None:
+        storage_dir = tempdir = tempfile.mkdtemp(prefix='yadisk_stub_')
+    os.makedirs(storage_dir, exist_ok=True)
+    state = DiskState(storage_dir)
+    stats = StubStats()
+    handler = type('BoundStubHandler', (StubHandler,), {
+        'state': state, 'config': config, 'stats': stats, 'rng': random.Random(config.seed),
+    })
+    server = StubServer((host, port), handler, state, stats, verbose)
+    server._tempdir = tempdir
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Локальный эмулятор API Яндекс.Диска')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--storage', help='Папка для файлов (по умолчанию временная)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Задержка каждого ответа, мс')
+    parser.add_argument('--bandwidth-kbps', type=float, default=0, help='Скорость передачи файла, КБ/с (0 — без ограничения)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Доля ответов API 500/503 (0..1)')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='Доля ответов API 429 (0..1)')
+    parser.add_argument('--upload-error-rate', type=float, default=0, help='Доля неудачных PUT файлов (0..1)')
+    parser.add_argument('--token', help='Принимать только этот токен')
+    parser.add_argument('--seed', type=int, help='Зерно генератора ошибок для воспроизводимости')
+    parser.add_argument('--verbose', action='store_true', help='Печатать каждый запрос')
+    args = parser.parse_args(argv)
+
+    config = StubConfig(latency_ms=args.latency_ms, bandwidth_kbps=args.bandwidth_kbps,
+                        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                        upload_error_rate=args.upload_error_rate, token=args.token, seed=args.seed)
+    server = make_server(args.host, args.port, args.storage, config, args.verbose)
+    print(f"🛰️ Эмулятор Яндекс.Диска: {server.base_url} (файлы: {server.state.storage_dir})")
+    print(f"   WB_AUTO_YADISK_API={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats.snapshot(), ensure_ascii=False, indent=2))
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()